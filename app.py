@@ -10,46 +10,53 @@ from reportlab.lib import colors
 import tempfile
 import json
 from config import Config
+from utils.columnar import frame_to_records
+from utils.classification import classify_criticity
 
 app = Flask(__name__)
 app.config.from_object(Config)
 
+# Esquema de /api/zones: valores seguem como lidos do CSV, exceto a criticidade
+ZONES_API_SCHEMA = (
+    ('id', None),
+    ('nome', None),
+    ('regiao', None),
+    ('latitude', None),
+    ('longitude', None),
+    ('temperatura', None),
+    ('ndvi', None),
+    ('densidade_populacional', None),
+    ('indice_criticidade', lambda value: round(value, 2)),
+    ('classificacao', None),
+    ('cor', None)
+)
+
 class HeatIslandAnalyzer:
     def __init__(self, csv_file):
         self.data = pd.read_csv(csv_file)
         self.process_data()
+        
+        # Índice id -> posição da linha (primeira ocorrência prevalece)
+        ids = self.data['id'].tolist()
+        self.id_index = dict(zip(reversed(ids), range(len(ids) - 1, -1, -1)))
     
     def process_data(self):
         """Processa os dados e calcula o índice de criticidade"""
         # Calcula índice de criticidade: temperatura - NDVI * 10
         self.data['indice_criticidade'] = self.data['temperatura'] - (self.data['ndvi'] * 10)
         
-        # Classifica as zonas baseado no índice
-        def classify_zone(index):
-            if index > 35:
-                return 'Crítica'
-            elif index > 25:
-                return 'Média'
-            else:
-                return 'Segura'
-        
-        self.data['classificacao'] = self.data['indice_criticidade'].apply(classify_zone)
-        
-        # Define cores para cada classificação
-        color_map = {
-            'Crítica': '#FF4444',    # Vermelho
-            'Média': '#FFA500',      # Laranja
-            'Segura': '#44FF44'      # Verde
-        }
-        self.data['cor'] = self.data['classificacao'].map(color_map)
+        # Classifica as zonas baseado no índice e define as cores de uma só vez
+        self.data['classificacao'], self.data['cor'] = classify_criticity(
+            self.data['indice_criticidade'], 35, 25
+        )
     
     def get_zone_data(self, zone_id):
         """Retorna dados de uma zona específica"""
-        zone = self.data[self.data['id'] == zone_id]
-        if zone.empty:
+        position = self.id_index.get(zone_id)
+        if position is None:
             return None
         
-        zone_data = zone.iloc[0].to_dict()
+        zone_data = self.data.iloc[position].to_dict()
         
         # Adiciona sugestões de ações baseadas na classificação
         classification = zone_data['classificacao']
@@ -145,21 +152,8 @@ def relatorios():
 @app.route('/api/zones')
 def get_zones():
     """Retorna dados de todas as zonas para o mapa"""
-    zones_data = []
-    for _, row in analyzer.data.iterrows():
-        zones_data.append({
-            'id': row['id'],
-            'nome': row['nome'],
-            'regiao': row.get('regiao', 'São Paulo'),  # Adiciona região se disponível
-            'latitude': row['latitude'],
-            'longitude': row['longitude'],
-            'temperatura': row['temperatura'],
-            'ndvi': row['ndvi'],
-            'densidade_populacional': row['densidade_populacional'],
-            'indice_criticidade': round(row['indice_criticidade'], 2),
-            'classificacao': row['classificacao'],
-            'cor': row['cor']
-        })
+    zones_data = frame_to_records(analyzer.data, schema=ZONES_API_SCHEMA,
+                                  defaults={'regiao': 'São Paulo'})
     
     return jsonify(zones_data)
 
@@ -3,13 +3,23 @@ Sistema Clima Vida - NASA Space Apps Hackathon
 Aplicação Flask principal refatorada
 """
 
-from flask import Flask, render_template, request, jsonify, send_file, session, redirect, url_for
+from flask import Flask, Response, g, render_template, request, jsonify, send_file, session, redirect, url_for
 import os
 import logging
+import time
+import weakref
 from datetime import datetime
 from config import Config
-from services.zone_service import ZoneService
+from services.aggregate_cube import CUBE_DIMENSIONS
+from services.zone_service import ZoneService, SORTABLE_COLUMNS, RANGE_FILTER_COLUMNS, encode_payload
+from services.zone_registry import ZoneRegistry
+from services.data_watcher import DataFileWatcher
+from services.metrics import METRICS, SIZE_BUCKETS, gauge
+from services.profiling import RequestProfiler
 from services.pdf_service import PDFService
+from services.report_cache import ReportCache
+from services.report_jobs import ReportJobQueue, DONE, FAILED
+from services.scenario_service import ScenarioService
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -19,9 +29,130 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 app.config.from_object(Config)
 
-# Inicializar serviços
-zone_service = ZoneService()
-pdf_service = PDFService()
+# Inicializar serviços (a cidade padrão é carregada já na inicialização)
+zone_registry = ZoneRegistry(
+    Config.CITY_DATA_FILES,
+    Config.CITY_MEMORY_BUDGET_MB * 1024 * 1024,
+    pinned=[Config.DEFAULT_CITY],
+    shared_datasets=Config.SHARED_DATASETS,
+    observation_files=Config.CITY_OBSERVATION_FILES
+)
+zone_service = zone_registry.get(Config.DEFAULT_CITY)
+report_cache = ReportCache(
+    Config.REPORT_CACHE_DIR,
+    max_entries=Config.REPORT_CACHE_MAX_ENTRIES,
+    max_bytes=Config.REPORT_CACHE_MAX_MB * 1024 * 1024,
+    orphan_max_age=Config.REPORT_ORPHAN_MAX_AGE_SECONDS
+)
+pdf_service = PDFService(cache=report_cache)
+
+# Renderização dos PDFs em processos separados (criados no primeiro relatório)
+report_queue = ReportJobQueue(
+    report_cache,
+    max_workers=Config.REPORT_WORKERS,
+    max_pending=Config.REPORT_QUEUE_MAX_PENDING,
+    start_method=Config.REPORT_START_METHOD
+)
+
+# Recarga incremental automática das cidades carregadas (opcional)
+data_watcher = DataFileWatcher(zone_registry.loaded_services, Config.DATA_WATCH_INTERVAL_SECONDS)
+if Config.DATA_WATCH_ENABLED:
+    data_watcher.start()
+
+# ============================================================================
+# MÉTRICAS (/metrics)
+# ============================================================================
+
+HTTP_REQUESTS = METRICS.counter('http_requests', 'Requisições atendidas', ('method', 'route', 'status'))
+HTTP_REQUEST_SECONDS = METRICS.histogram('http_request_duration_seconds', 'Latência das requisições',
+                                         ('method', 'route'))
+HTTP_RESPONSE_BYTES = METRICS.histogram('http_response_size_bytes', 'Tamanho das respostas',
+                                        ('method', 'route'), buckets=SIZE_BUCKETS)
+
+def _collect_city_metrics():
+    """
+    Versão dos dados e quantidade de zonas das cidades carregadas
+    """
+    loaded = zone_registry.loaded_cities()
+    return [
+        gauge('zone_data_version', 'Versão dos dados publicados da cidade',
+              [({'city': city}, service.version) for city, service in loaded.items()]),
+        gauge('zone_count', 'Zonas carregadas da cidade',
+              [({'city': city}, len(service.snapshot.data)) for city, service in loaded.items()]),
+        gauge('zone_cities_loaded', 'Cidades carregadas em memória', [({}, len(loaded))])
+    ]
+
+METRICS.register_collector('cities', _collect_city_metrics)
+
+@app.before_request
+def _start_request_timer():
+    """
+    Marca o início da requisição (registrado antes das demais verificações)
+    """
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def _record_request_metrics(response):
+    """
+    Contabiliza a requisição pela regra da rota (ex.: /api/zone/<int:zone_id>)
+    """
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    HTTP_REQUESTS.inc(request.method, route, str(response.status_code))
+    started = g.get('request_started')
+    if started is not None:
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, request.method, route)
+    if response.content_length is not None:
+        HTTP_RESPONSE_BYTES.observe(response.content_length, request.method, route)
+    return response
+
+# ============================================================================
+# PERFILAMENTO SOB DEMANDA (/admin/profiles)
+# ============================================================================
+
+request_profiler = RequestProfiler(
+    Config.PROFILE_DIR,
+    max_files=Config.PROFILE_MAX_FILES,
+    sample_rate=Config.PROFILE_SAMPLE_RATE,
+    min_duration_ms=Config.PROFILE_MIN_DURATION_MS
+)
+
+def _is_profiling_admin():
+    """
+    Gestores logados ou clientes com o token de perfilamento (Config.PROFILE_TOKEN)
+    """
+    if Config.PROFILE_TOKEN and request.headers.get('X-Profile-Token') == Config.PROFILE_TOKEN:
+        return True
+    return session.get('user_profile') == 'gestor'
+
+@app.before_request
+def _start_profiler():
+    """
+    Perfila a requisição pedida com "X-Profile: 1" (apenas administradores) ou sorteada
+    """
+    requested = request.headers.get('X-Profile') == '1' and _is_profiling_admin()
+    g.profile = request_profiler.start(requested)
+
+@app.after_request
+def _finish_profiler(response):
+    """
+    Grava o perfil da requisição e informa o nome dele em X-Profile-Id
+    """
+    active = g.pop('profile', None)
+    if active is not None:
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        name = request_profiler.finish(active, request.method, request.path, route, response.status_code)
+        if name is not None:
+            response.headers['X-Profile-Id'] = name
+    return response
+
+@app.teardown_request
+def _stop_profiler(error=None):
+    """
+    Garante que o perfilador seja desligado mesmo se a requisição falhar
+    """
+    active = g.pop('profile', None)
+    if active is not None:
+        request_profiler.stop(active)
 
 # ============================================================================
 # ROTAS DE AUTENTICAÇÃO E NAVEGAÇÃO
@@ -97,27 +228,157 @@ def logout():
 # API ENDPOINTS
 # ============================================================================
 
+@app.url_value_preprocessor
+def _pop_city(endpoint, values):
+    """
+    Extrai a cidade das rotas /api/<city>/... (sem prefixo usa a cidade padrão)
+    """
+    g.city = (values or {}).pop('city', None) or Config.DEFAULT_CITY
+
+@app.before_request
+def _check_city():
+    """
+    Rejeita cidades não configuradas antes de executar a rota
+    """
+    if not zone_registry.has_city(g.city):
+        return jsonify({'error': f'Cidade não encontrada: {g.city}'}), 404
+
+def _zone_service():
+    """
+    Retorna o serviço de zonas da cidade da requisição, carregando-o se preciso
+    """
+    return zone_registry.get(g.city)
+
+@app.route('/api/cities')
+def get_cities():
+    """
+    Lista as cidades disponíveis e se estão carregadas em memória
+    """
+    return jsonify(zone_registry.cities())
+
+# Tamanho dos pedaços em que payloads mapeados em memória são enviados
+PAYLOAD_CHUNK_BYTES = 256 * 1024
+
+def _encoded_json_response(payload, max_age=None):
+    """
+    Serve um payload JSON pré-codificado, respondendo 304 quando a ETag confere
+    
+    Sem max_age o cliente revalida a cada uso; com max_age (segundos) a
+    resposta pode ser reaproveitada por caches até expirar.
+    """
+    if request.if_none_match.contains_weak(payload.etag):
+        response = Response(status=304)
+    elif isinstance(payload.body, memoryview):
+        # Payload mapeado dos dados compartilhados: enviado em pedaços, sem
+        # copiar o corpo inteiro para a memória do worker
+        body = payload.body
+        response = Response(
+            (bytes(body[start:start + PAYLOAD_CHUNK_BYTES]) for start in range(0, len(body), PAYLOAD_CHUNK_BYTES)),
+            mimetype='application/json'
+        )
+        response.content_length = len(body)
+    else:
+        response = Response(payload.body, mimetype='application/json')
+    
+    response.set_etag(payload.etag)
+    if max_age is None:
+        response.cache_control.no_cache = True
+    else:
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+    return response
+
+def _parse_zone_query():
+    """
+    Lê os parâmetros de paginação, ordenação e filtro de /api/zones
+    
+    Raises:
+        ValueError: se algum parâmetro for inválido
+    """
+    args = request.args
+    
+    def number(name, kind):
+        value = args.get(name)
+        if value is None or value == '':
+            return None
+        try:
+            return kind(value)
+        except ValueError:
+            raise ValueError(f'Parâmetro {name} inválido')
+    
+    page = number('page', int)
+    page = 1 if page is None else page
+    page_size = number('page_size', int)
+    page_size = Config.DEFAULT_PAGE_SIZE if page_size is None else page_size
+    if page < 1 or not 1 <= page_size <= Config.MAX_PAGE_SIZE:
+        raise ValueError(f'page deve ser >= 1 e page_size entre 1 e {Config.MAX_PAGE_SIZE}')
+    
+    sort = args.get('sort') or None
+    if sort is not None and sort not in SORTABLE_COLUMNS:
+        raise ValueError(f'Coluna de ordenação inválida: {sort}')
+    
+    order = args.get('order', 'asc').lower()
+    if order not in ('asc', 'desc'):
+        raise ValueError('order deve ser asc ou desc')
+    
+    ranges = {}
+    for column in RANGE_FILTER_COLUMNS:
+        minimum, maximum = number(f'{column}_min', float), number(f'{column}_max', float)
+        if minimum is not None or maximum is not None:
+            ranges[column] = (minimum, maximum)
+    
+    return {
+        'page': page,
+        'page_size': page_size,
+        'sort': sort,
+        'order': order,
+        'classificacao': [value for value in args.getlist('classificacao') if value] or None,
+        'regiao': [value for value in args.getlist('regiao') if value] or None,
+        'ranges': ranges,
+        'search': args.get('q') or None
+    }
+
 @app.route('/api/zones')
+@app.route('/api/<city>/zones')
 def get_zones():
     """
     Retorna dados de todas as zonas para o mapa
+    
+    Com parâmetros de paginação/ordenação/filtro (page, page_size, sort, order,
+    classificacao, regiao, q, <coluna>_min, <coluna>_max) retorna apenas a página pedida.
     """
+    if request.args:
+        try:
+            query = _parse_zone_query()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        try:
+            result = _zone_service().query_zones(**query)
+            logger.info(f"Retornando página {result['page']} com {len(result['zones'])} de {result['total']} zonas")
+            return jsonify(result)
+            
+        except Exception as e:
+            logger.error(f"Erro ao consultar zonas: {e}")
+            return jsonify({'error': 'Erro ao carregar dados das zonas'}), 500
+    
     try:
-        zones_data = zone_service.get_all_zones()
-        logger.info(f"Retornando {len(zones_data)} zonas")
-        return jsonify(zones_data)
+        payload = _zone_service().get_encoded_payload('zones')
+        logger.info("Retornando dados das zonas")
+        return _encoded_json_response(payload)
         
     except Exception as e:
         logger.error(f"Erro ao buscar zonas: {e}")
         return jsonify({'error': 'Erro ao carregar dados das zonas'}), 500
 
 @app.route('/api/zone/<int:zone_id>')
+@app.route('/api/<city>/zone/<int:zone_id>')
 def get_zone(zone_id):
     """
     Retorna dados detalhados de uma zona específica
     """
     try:
-        zone_data = zone_service.get_zone_by_id(zone_id)
+        zone_data = _zone_service().get_zone_by_id(zone_id)
         
         if zone_data is None:
             return jsonify({'error': 'Zona não encontrada'}), 404
@@ -129,51 +390,467 @@ def get_zone(zone_id):
         logger.error(f"Erro ao buscar zona {zone_id}: {e}")
         return jsonify({'error': 'Erro ao carregar dados da zona'}), 500
 
+@app.route('/api/zone/<int:zone_id>/history')
+@app.route('/api/<city>/zone/<int:zone_id>/history')
+def get_zone_history(zone_id):
+    """
+    Retorna as observações datadas de uma zona (?from=AAAA-MM-DD&to=AAAA-MM-DD)
+    """
+    try:
+        history = _zone_service().get_zone_history(zone_id, request.args.get('from'), request.args.get('to'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Erro ao buscar histórico da zona {zone_id}: {e}")
+        return jsonify({'error': 'Erro ao carregar histórico da zona'}), 500
+
+    if history is None:
+        return jsonify({'error': 'Zona sem observações'}), 404
+
+    logger.info(f"Retornando {len(history['observations'])} observações da zona {zone_id}")
+    return jsonify(history)
+
+@app.route('/api/trends')
+@app.route('/api/<city>/trends')
+def get_trends():
+    """
+    Retorna a série diária com média móvel e anomalias sazonais
+
+    ?measure=temperatura|ndvi, ?window=<dias> (padrão Config.TREND_WINDOW_DAYS),
+    ?zone=<id> (sem ele, média da cidade) e ?from/?to (AAAA-MM-DD).
+    """
+    window = request.args.get('window', default=Config.TREND_WINDOW_DAYS, type=int)
+    if window is None or not 1 <= window <= Config.TREND_MAX_WINDOW_DAYS:
+        return jsonify({'error': f'Parâmetro window deve estar entre 1 e {Config.TREND_MAX_WINDOW_DAYS}'}), 400
+
+    zone_id = None
+    if request.args.get('zone'):
+        zone_id = request.args.get('zone', type=int)
+        if zone_id is None:
+            return jsonify({'error': 'Parâmetro zone inválido'}), 400
+
+    try:
+        trends = _zone_service().get_trends(
+            request.args.get('measure', 'temperatura'), window, zone_id,
+            request.args.get('from'), request.args.get('to')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Erro ao calcular tendências: {e}")
+        return jsonify({'error': 'Erro ao calcular tendências'}), 500
+
+    if trends is None:
+        return jsonify({'error': 'Zona sem observações'}), 404
+
+    return _encoded_json_response(encode_payload(trends))
+
+def _float_args(*names):
+    """
+    Lê parâmetros numéricos obrigatórios da query string
+    
+    Raises:
+        ValueError: se algum parâmetro estiver ausente ou não for numérico
+    """
+    values = []
+    for name in names:
+        value = request.args.get(name, type=float)
+        if value is None:
+            raise ValueError(f'Parâmetro {name} ausente ou inválido')
+        values.append(value)
+    return values
+
+@app.route('/api/zones/bbox')
+@app.route('/api/<city>/zones/bbox')
+def get_zones_in_bbox():
+    """
+    Retorna as zonas dentro de uma caixa delimitadora (?minLat&maxLat&minLon&maxLon)
+    """
+    try:
+        min_lat, max_lat, min_lon, max_lon = _float_args('minLat', 'maxLat', 'minLon', 'maxLon')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if min_lat > max_lat or min_lon > max_lon:
+        return jsonify({'error': 'Caixa delimitadora inválida'}), 400
+    
+    try:
+        zones_data = _zone_service().get_zones_in_bbox(min_lat, max_lat, min_lon, max_lon)
+        logger.info(f"Retornando {len(zones_data)} zonas na área visível")
+        return jsonify(zones_data)
+        
+    except Exception as e:
+        logger.error(f"Erro ao buscar zonas por área: {e}")
+        return jsonify({'error': 'Erro ao carregar dados das zonas'}), 500
+
+@app.route('/api/zones/nearest')
+@app.route('/api/<city>/zones/nearest')
+def get_nearest_zones():
+    """
+    Retorna as k zonas mais próximas de um ponto (?lat&lon&k)
+    """
+    try:
+        lat, lon = _float_args('lat', 'lon')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    k = request.args.get('k', default=5, type=int)
+    if k is None or not 1 <= k <= Config.NEAREST_MAX_K:
+        return jsonify({'error': f'Parâmetro k deve estar entre 1 e {Config.NEAREST_MAX_K}'}), 400
+    
+    try:
+        zones_data = _zone_service().get_nearest_zones(lat, lon, k)
+        logger.info(f"Retornando {len(zones_data)} zonas próximas")
+        return jsonify(zones_data)
+        
+    except Exception as e:
+        logger.error(f"Erro ao buscar zonas próximas: {e}")
+        return jsonify({'error': 'Erro ao carregar dados das zonas'}), 500
+
+@app.route('/api/zones/clusters')
+@app.route('/api/<city>/zones/clusters')
+def get_zone_clusters():
+    """
+    Retorna as zonas agrupadas para o zoom do mapa (?zoom&bbox=oeste,sul,leste,norte)
+
+    Sem bbox, retorna os clusters da cidade inteira.
+    """
+    zoom = request.args.get('zoom', type=int)
+    if zoom is None or zoom < 0:
+        return jsonify({'error': 'Parâmetro zoom ausente ou inválido'}), 400
+
+    bbox = None
+    if request.args.get('bbox'):
+        try:
+            bbox = tuple(float(value) for value in request.args['bbox'].split(','))
+        except ValueError:
+            bbox = ()
+        if len(bbox) != 4 or bbox[0] > bbox[2] or bbox[1] > bbox[3]:
+            return jsonify({'error': 'Parâmetro bbox deve ser oeste,sul,leste,norte'}), 400
+
+    try:
+        clusters = _zone_service().get_zone_clusters(zoom, bbox)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Erro ao agrupar zonas: {e}")
+        return jsonify({'error': 'Erro ao carregar dados das zonas'}), 500
+
+    logger.info(f"Retornando {len(clusters['clusters'])} clusters (zoom {clusters['zoom']})")
+    return _encoded_json_response(encode_payload(clusters), max_age=Config.TILE_CACHE_MAX_AGE_SECONDS)
+
+@app.route('/api/tiles/<int:z>/<int:x>/<int:y>')
+@app.route('/api/<city>/tiles/<int:z>/<int:x>/<int:y>')
+def get_tile(z, x, y):
+    """
+    Retorna o agregado de um tile z/x/y (mesma grade dos tiles do mapa)
+    
+    Traz contagem, criticidade média e classificação dominante do tile e de
+    suas subdivisões até ?depth níveis abaixo (padrão Config.TILE_CELL_DEPTH).
+    """
+    depth = request.args.get('depth', default=Config.TILE_CELL_DEPTH, type=int)
+    if depth is None or not 0 <= depth <= Config.TILE_MAX_CELL_DEPTH:
+        return jsonify({'error': f'Parâmetro depth deve estar entre 0 e {Config.TILE_MAX_CELL_DEPTH}'}), 400
+    
+    try:
+        tile = _zone_service().get_tile(z, x, y, depth)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        logger.error(f"Erro ao montar tile {z}/{x}/{y}: {e}")
+        return jsonify({'error': 'Erro ao carregar tile'}), 500
+    
+    return _encoded_json_response(encode_payload(tile), max_age=Config.TILE_CACHE_MAX_AGE_SECONDS)
+
+@app.route('/api/zones/batch')
+@app.route('/api/<city>/zones/batch')
+def get_zones_batch():
+    """
+    Retorna dados detalhados de várias zonas numa única requisição (?ids=1,2,3)
+    """
+    try:
+        zone_ids = [int(value) for value in request.args.get('ids', '').split(',') if value.strip()]
+    except ValueError:
+        return jsonify({'error': 'Parâmetro ids inválido'}), 400
+    
+    if not zone_ids:
+        return jsonify({'error': 'Informe ao menos um id'}), 400
+    
+    if len(zone_ids) > Config.BATCH_MAX_IDS:
+        return jsonify({'error': f'Máximo de {Config.BATCH_MAX_IDS} ids por consulta'}), 400
+    
+    try:
+        zones_data, not_found = _zone_service().get_zones_by_ids(zone_ids)
+        logger.info(f"Retornando {len(zones_data)} zonas em lote")
+        return jsonify({'zones': zones_data, 'not_found': not_found})
+        
+    except Exception as e:
+        logger.error(f"Erro ao buscar zonas em lote: {e}")
+        return jsonify({'error': 'Erro ao carregar dados das zonas'}), 500
+
 @app.route('/api/statistics')
+@app.route('/api/<city>/statistics')
 def get_statistics():
     """
     Retorna estatísticas gerais das zonas
     """
     try:
-        statistics = zone_service.get_statistics()
+        payload = _zone_service().get_encoded_payload('statistics')
         logger.info("Retornando estatísticas gerais")
-        return jsonify(statistics)
+        return _encoded_json_response(payload)
         
     except Exception as e:
         logger.error(f"Erro ao buscar estatísticas: {e}")
         return jsonify({'error': 'Erro ao carregar estatísticas'}), 500
 
+@app.route('/api/aggregates')
+@app.route('/api/<city>/aggregates')
+def get_aggregates():
+    """
+    Retorna médias e contagens por região e classificação (cubo pré-calculado)
+
+    ?group_by=regiao ou ?group_by=classificacao agregam o cubo por uma só
+    dimensão; ?group_by= (vazio) retorna o total geral.
+    """
+    group_by = request.args.get('group_by')
+    dimensions = CUBE_DIMENSIONS if group_by is None else [
+        dimension.strip() for dimension in group_by.split(',') if dimension.strip()
+    ]
+
+    try:
+        payload = _zone_service().get_aggregates_payload(dimensions)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Erro ao buscar agregados: {e}")
+        return jsonify({'error': 'Erro ao carregar agregados'}), 500
+
+    return _encoded_json_response(payload)
+
+# Simuladores de cenários por serviço de zonas (descartados junto com a cidade)
+scenario_services = weakref.WeakKeyDictionary()
+
+def _scenario_service(service: ZoneService) -> ScenarioService:
+    """
+    Retorna o simulador de cenários do serviço, criando-o na primeira vez
+    """
+    scenarios = scenario_services.get(service)
+    if scenarios is None:
+        scenarios = scenario_services.setdefault(service, ScenarioService(service))
+    return scenarios
+
+@app.route('/api/scenarios', methods=['POST'])
+@app.route('/api/<city>/scenarios', methods=['POST'])
+def simulate_scenarios():
+    """
+    Simula cenários de intervenção (variações de NDVI/temperatura) sem alterar os dados
+    
+    Corpo JSON: {"scenarios": [{"name": ..., "interventions": [{"ndvi_delta": 0.1,
+    "regiao": "Zona Sul", "classificacao": "Crítica"}]}]}; um único cenário
+    também pode ser enviado diretamente ({"interventions": [...]}).
+    """
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({'error': 'Corpo JSON inválido'}), 400
+    scenarios = body.get('scenarios', [body] if 'interventions' in body else None)
+    if not isinstance(scenarios, list):
+        return jsonify({'error': 'Informe scenarios ou interventions'}), 400
+    
+    try:
+        results = _scenario_service(_zone_service()).run(scenarios)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Erro ao simular cenários: {e}")
+        return jsonify({'error': 'Erro ao simular cenários'}), 500
+    
+    logger.info(f"{len(results)} cenários simulados")
+    return jsonify({'scenarios': results})
+
+def _submit_report_job(service: ZoneService):
+    """
+    Enfileira (ou reaproveita) o relatório da cidade atual
+    
+    O relatório é identificado pelo conteúdo dos dados (ZoneSnapshot.content_id),
+    não pela versão local, para ser reaproveitado entre processos e reinícios;
+    o identificador já vem pronto no snapshot, sem codificar as zonas.
+    """
+    snapshot = service.snapshot
+    params = {
+        'zones': snapshot.content_id,
+        'statistics': service.get_encoded_payload('statistics', snapshot).etag
+    }
+    return report_queue.submit(
+        g.city, params, lambda: (service.get_report_frame(), service.get_statistics())
+    )
+
+def _report_job_response(job_status):
+    """
+    Monta a resposta JSON de estado de um job de relatório
+    """
+    job_id = job_status['job_id']
+    body = dict(job_status, status_url=url_for('get_report_job', job_id=job_id))
+    if job_status['status'] == DONE:
+        body['download_url'] = url_for('download_report_job', job_id=job_id)
+    return body
+
+def _send_report(pdf_path, report_key):
+    """
+    Envia um relatório pronto; downloads repetidos recebem 304 pelo ETag
+    """
+    return send_file(
+        pdf_path, 
+        as_attachment=True, 
+        download_name=f'relatorio_clima_vida_{datetime.now().strftime("%Y%m%d_%H%M")}.pdf',
+        mimetype='application/pdf',
+        etag=report_key
+    )
+
 @app.route('/api/report')
+@app.route('/api/<city>/report')
 def generate_report():
     """
     Gera e retorna relatório PDF
+    
+    A renderização roda na fila de relatórios; esta rota apenas aguarda o
+    resultado, sem ocupar o GIL do processo da API. Se o relatório for
+    removido do cache (limite de tamanho, por outro worker) antes do envio,
+    ele é gerado mais uma vez; se sumir de novo, a resposta é 503.
     """
     try:
-        # Busca dados necessários
-        zones_data = zone_service.get_report_data()
-        statistics = zone_service.get_statistics()
-        
-        if not zones_data:
+        service = _zone_service()
+        if service.snapshot.data is None or service.snapshot.data.empty:
             return jsonify({'error': 'Nenhum dado disponível para relatório'}), 404
         
-        # Gera o PDF
-        pdf_path = pdf_service.generate_heat_island_report(zones_data, statistics)
-        
-        logger.info("Relatório PDF gerado com sucesso")
-        
-        # Retorna o arquivo para download
-        return send_file(
-            pdf_path, 
-            as_attachment=True, 
-            download_name=f'relatorio_clima_vida_{datetime.now().strftime("%Y%m%d_%H%M")}.pdf',
-            mimetype='application/pdf'
-        )
+        for _ in range(2):
+            job = _submit_report_job(service)
+            pdf_path = report_queue.wait(job, timeout=Config.REPORT_WAIT_TIMEOUT_SECONDS)
+            if pdf_path is not None:
+                try:
+                    return _send_report(pdf_path, job.id)
+                except FileNotFoundError:
+                    pass
+            logger.warning(f"Relatório {job.id} removido do cache antes do envio")
+        return jsonify({'error': 'Relatório removido do cache, tente novamente em instantes'}), 503
         
+    except OverflowError:
+        return jsonify({'error': 'Muitos relatórios em geração, tente novamente em instantes'}), 503
+    except TimeoutError:
+        return jsonify({'error': 'Relatório ainda em geração', 'job_id': job.id}), 504
     except Exception as e:
         logger.error(f"Erro ao gerar relatório: {e}")
         return jsonify({'error': 'Erro ao gerar relatório PDF'}), 500
 
+@app.route('/api/reports', methods=['POST'])
+@app.route('/api/<city>/reports', methods=['POST'])
+def create_report_job():
+    """
+    Enfileira a geração do relatório PDF e retorna o id do job
+    """
+    try:
+        service = _zone_service()
+        if service.snapshot.data is None or service.snapshot.data.empty:
+            return jsonify({'error': 'Nenhum dado disponível para relatório'}), 404
+        
+        job = _submit_report_job(service)
+        body = _report_job_response({'job_id': job.id, 'status': job.status})
+        return jsonify(body), 202, {'Location': body['status_url']}
+        
+    except OverflowError:
+        return jsonify({'error': 'Muitos relatórios em geração, tente novamente em instantes'}), 503
+    except Exception as e:
+        logger.error(f"Erro ao enfileirar relatório: {e}")
+        return jsonify({'error': 'Erro ao enfileirar relatório PDF'}), 500
+
+@app.route('/api/reports/<job_id>')
+def get_report_job(job_id):
+    """
+    Retorna o estado de um job de relatório
+    """
+    job_status = report_queue.get(job_id)
+    if job_status is None:
+        return jsonify({'error': 'Relatório não encontrado'}), 404
+    return jsonify(_report_job_response(job_status))
+
+@app.route('/api/reports/<job_id>/download')
+def download_report_job(job_id):
+    """
+    Faz o download do relatório de um job concluído
+    """
+    job_status = report_queue.get(job_id)
+    if job_status is None:
+        return jsonify({'error': 'Relatório não encontrado'}), 404
+    if job_status['status'] == FAILED:
+        return jsonify(_report_job_response(job_status)), 500
+    if job_status['status'] != DONE:
+        return jsonify(_report_job_response(job_status)), 409
+    
+    pdf_path = report_cache.get(job_id)
+    if pdf_path is None:
+        return jsonify({'error': 'Relatório não encontrado'}), 404
+    return _send_report(pdf_path, job_id)
+
+@app.route('/api/zones/changes', methods=['POST'])
+@app.route('/api/<city>/zones/changes', methods=['POST'])
+def apply_zone_changes():
+    """
+    Insere, atualiza e remove zonas em memória (apenas para gestores)
+    
+    Corpo JSON: {"upsert": [{"id": 5, "temperatura": 38.2}, ...], "delete": [7, 8]}.
+    As estatísticas são atualizadas por diferença, só com as zonas alteradas;
+    as alterações valem até a próxima recarga do CSV.
+    """
+    if session.get('user_profile') != 'gestor':
+        return jsonify({'error': 'Acesso negado'}), 403
+    
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({'error': 'Corpo JSON inválido'}), 400
+    upserts, deletes = body.get('upsert', []), body.get('delete', [])
+    if not isinstance(upserts, list) or not isinstance(deletes, list):
+        return jsonify({'error': 'upsert e delete devem ser listas'}), 400
+    
+    service = _zone_service()
+    try:
+        result = service.apply_changes(upserts, deletes)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Erro ao alterar zonas: {e}")
+        return jsonify({'error': 'Erro ao alterar zonas'}), 500
+    
+    return jsonify(dict(result, statistics=service.get_statistics()))
+
+@app.route('/api/zones/observations', methods=['POST'])
+@app.route('/api/<city>/zones/observations', methods=['POST'])
+def ingest_zone_observations():
+    """
+    Acrescenta observações datadas às séries históricas (apenas para gestores)
+
+    Corpo JSON: {"observations": [{"id": 5, "data": "2025-01-31", "temperatura": 31.2, "ndvi": 0.41}, ...]}
+    """
+    if session.get('user_profile') != 'gestor':
+        return jsonify({'error': 'Acesso negado'}), 403
+
+    body = request.get_json(silent=True)
+    observations = body.get('observations') if isinstance(body, dict) else None
+    if not isinstance(observations, list) or not all(isinstance(item, dict) for item in observations):
+        return jsonify({'error': 'observations deve ser uma lista de objetos'}), 400
+    if len(observations) > Config.OBSERVATIONS_MAX_PER_REQUEST:
+        return jsonify({'error': f'Máximo de {Config.OBSERVATIONS_MAX_PER_REQUEST} observações por requisição'}), 400
+
+    try:
+        result = _zone_service().ingest_observations(observations)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Erro ao receber observações: {e}")
+        return jsonify({'error': 'Erro ao receber observações'}), 500
+
+    return jsonify(result)
+
 @app.route('/api/zones/classification/<classification>')
+@app.route('/api/<city>/zones/classification/<classification>')
 def get_zones_by_classification(classification):
     """
     Retorna zonas filtradas por classificação
@@ -182,7 +859,7 @@ def get_zones_by_classification(classification):
         if classification not in ['Crítica', 'Média', 'Segura']:
             return jsonify({'error': 'Classificação inválida'}), 400
         
-        zones_data = zone_service.get_zones_by_classification(classification)
+        zones_data = _zone_service().get_zones_by_classification(classification)
         logger.info(f"Retornando {len(zones_data)} zonas {classification}")
         return jsonify(zones_data)
         
@@ -202,15 +879,100 @@ def refresh_data():
     if session.get('user_profile') != 'gestor':
         return jsonify({'error': 'Acesso negado'}), 403
     
+    city = request.args.get('city', Config.DEFAULT_CITY)
+    if not zone_registry.has_city(city):
+        return jsonify({'error': f'Cidade não encontrada: {city}'}), 404
+    
     try:
-        zone_service.refresh_data()
-        logger.info("Dados recarregados por administrador")
+        zone_registry.get(city).refresh_data()
+        logger.info(f"Dados recarregados por administrador: {city}")
         return jsonify({'success': True, 'message': 'Dados recarregados com sucesso'})
         
     except Exception as e:
         logger.error(f"Erro ao recarregar dados: {e}")
         return jsonify({'error': 'Erro ao recarregar dados'}), 500
 
+@app.route('/admin/thresholds', methods=['GET', 'POST'])
+def classification_thresholds():
+    """
+    Consulta ou altera os limiares de classificação de uma cidade (apenas para gestores)
+    
+    A alteração reclassifica os dados já carregados, sem reler o CSV.
+    Corpo JSON do POST: {"critical_threshold": 35, "medium_threshold": 25}
+    """
+    if session.get('user_profile') != 'gestor':
+        return jsonify({'error': 'Acesso negado'}), 403
+    
+    city = request.args.get('city', Config.DEFAULT_CITY)
+    if not zone_registry.has_city(city):
+        return jsonify({'error': f'Cidade não encontrada: {city}'}), 404
+    
+    if request.method == 'GET':
+        service = zone_registry.get(city)
+    else:
+        body = request.get_json(silent=True) or {}
+        try:
+            critical = float(body['critical_threshold'])
+            medium = float(body['medium_threshold'])
+        except (KeyError, TypeError, ValueError):
+            return jsonify({'error': 'Informe critical_threshold e medium_threshold numéricos'}), 400
+        try:
+            service = zone_registry.set_thresholds(city, critical, medium)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        logger.info(f"Limiares alterados por administrador: {city} ({critical}/{medium})")
+    
+    return jsonify(dict(
+        service.thresholds,
+        city=city,
+        data_version=service.version,
+        statistics=service.get_statistics()
+    ))
+
+@app.route('/admin/profiles')
+def list_profiles():
+    """
+    Lista os perfis de requisições guardados (mais recentes primeiro)
+    """
+    if not _is_profiling_admin():
+        return jsonify({'error': 'Acesso negado'}), 403
+    return jsonify({'profiles': request_profiler.list(), 'max_files': request_profiler.max_files})
+
+@app.route('/admin/profiles/<name>')
+def get_profile(name):
+    """
+    Baixa um perfil (.prof, para pstats/snakeviz) ou, com ?format=text, o resumo das
+    funções mais custosas (?sort=cumulative|tottime|calls&limit=N)
+    """
+    if not _is_profiling_admin():
+        return jsonify({'error': 'Acesso negado'}), 403
+    
+    path = request_profiler.path_for(name)
+    if path is None:
+        return jsonify({'error': 'Perfil não encontrado'}), 404
+    
+    if request.args.get('format') == 'text':
+        limit = request.args.get('limit', default=40, type=int)
+        try:
+            text = request_profiler.render_text(name, request.args.get('sort', 'cumulative'), max(limit or 40, 1))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if text is None:
+            return jsonify({'error': 'Perfil não encontrado'}), 404
+        return Response(text, content_type='text/plain; charset=utf-8')
+    
+    return send_file(path, as_attachment=True, download_name=os.path.basename(path),
+                     mimetype='application/octet-stream')
+
+@app.route('/metrics')
+def metrics():
+    """
+    Métricas do processo no formato de texto do Prometheus
+    """
+    if Config.METRICS_TOKEN and request.headers.get('Authorization') != f'Bearer {Config.METRICS_TOKEN}':
+        return jsonify({'error': 'Acesso negado'}), 403
+    return Response(METRICS.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/health')
 def health_check():
     """
@@ -222,6 +984,7 @@ def health_check():
             'status': 'healthy',
             'timestamp': datetime.now().isoformat(),
             'zones_loaded': stats['total_zones'],
+            'data_version': zone_service.version,
             'version': '1.0.0'
         })
     except Exception as e:
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark da serialização de zonas: laço iterrows x caminho colunar
+Sistema Clima Vida - NASA Space Apps Hackathon
+
+Uso:
+    python benchmarks/bench_serialization.py --zones 1000 100000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import logging
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.zone_service import ZoneService, ZoneData
+from utils.columnar import frame_to_records
+from benchmarks.synthetic import write_zones_csv
+
+logging.getLogger('services.zone_service').setLevel(logging.WARNING)
+
+
+def legacy_get_all_zones(service: ZoneService):
+    """Reproduz o laço iterrows original de ZoneService.get_all_zones"""
+    zones = []
+    for _, row in service.snapshot.data.iterrows():
+        zones.append(ZoneData(
+            id=int(row['id']),
+            nome=str(row['nome']),
+            latitude=float(row['latitude']),
+            longitude=float(row['longitude']),
+            temperatura=float(row['temperatura']),
+            ndvi=float(row['ndvi']),
+            densidade_populacional=int(row['densidade_populacional']),
+            regiao=str(row.get('regiao', 'São Paulo')),
+            indice_criticidade=float(row['indice_criticidade']),
+            classificacao=str(row['classificacao']),
+            cor=str(row['cor'])
+        ))
+    return [zone.__dict__ for zone in zones]
+
+
+def columnar_get_all_zones(service: ZoneService):
+    """Executa o caminho colunar sem aproveitar os registros do snapshot"""
+    return frame_to_records(service.snapshot.data, defaults={'regiao': 'São Paulo'})
+
+
+def best_of(func, repeat: int) -> float:
+    """Retorna o menor tempo (s) entre ``repeat`` execuções"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(sizes, repeat: int) -> None:
+    print(f"{'zonas':>10} {'iterrows (s)':>14} {'colunar (s)':>12} {'ganho':>8}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_zones in sizes:
+            csv_path = write_zones_csv(os.path.join(tmp_dir, f'zones_{n_zones}.csv'), n_zones)
+            service = ZoneService(csv_path)
+
+            if legacy_get_all_zones(service) != columnar_get_all_zones(service):
+                raise AssertionError(f"Saídas divergentes para {n_zones} zonas")
+
+            legacy = best_of(lambda: legacy_get_all_zones(service), repeat)
+            columnar = best_of(lambda: columnar_get_all_zones(service), repeat)
+            print(f"{n_zones:>10} {legacy:>14.4f} {columnar:>12.4f} {legacy / columnar:>7.1f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--zones', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    run(args.zones, args.repeat)
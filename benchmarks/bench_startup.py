@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Benchmark da inicialização do ZoneService: sem cache, cache frio e cache quente
+Sistema Clima Vida - NASA Space Apps Hackathon
+
+Uso:
+    python benchmarks/bench_startup.py --zones 1000 100000
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import logging
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from services.zone_service import ZoneService
+from services.data_cache import CACHE_DIR_NAME
+from benchmarks.synthetic import write_zones_csv
+
+logging.getLogger('services.zone_service').setLevel(logging.WARNING)
+logging.getLogger('services.data_cache').setLevel(logging.WARNING)
+
+
+def time_startup(csv_path: str, cache_enabled: bool, clear_cache: bool) -> float:
+    """Retorna o tempo (s) para construir um ZoneService pronto para uso"""
+    if clear_cache:
+        shutil.rmtree(os.path.join(os.path.dirname(csv_path), CACHE_DIR_NAME), ignore_errors=True)
+
+    Config.DATA_CACHE_ENABLED = cache_enabled
+    start = time.perf_counter()
+    ZoneService(csv_path)
+    return time.perf_counter() - start
+
+
+def run(sizes, repeat: int) -> None:
+    print(f"{'zonas':>10} {'sem cache (s)':>14} {'frio (s)':>10} {'quente (s)':>11} {'ganho':>8}")
+    cache_enabled = Config.DATA_CACHE_ENABLED
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for n_zones in sizes:
+                csv_path = write_zones_csv(os.path.join(tmp_dir, f'zones_{n_zones}.csv'), n_zones)
+
+                # Frio: cache inexistente (inclui a gravação); quente: cache já gravado
+                baseline = min(time_startup(csv_path, False, True) for _ in range(repeat))
+                cold = min(time_startup(csv_path, True, True) for _ in range(repeat))
+                warm = min(time_startup(csv_path, True, False) for _ in range(repeat))
+                print(f"{n_zones:>10} {baseline:>14.4f} {cold:>10.4f} {warm:>11.4f} {baseline / warm:>7.1f}x")
+    finally:
+        Config.DATA_CACHE_ENABLED = cache_enabled
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--zones', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    run(args.zones, args.repeat)
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Suíte de micro-benchmarks do ZoneService e do PDFService com saída em JSON
+Sistema Clima Vida - NASA Space Apps Hackathon
+
+Mede, sobre zonas sintéticas, a carga do serviço (CSV e cache colunar),
+get_all_zones, get_zone_by_id, get_statistics, get_report_data e a geração
+do relatório PDF. O JSON traz o commit e as versões das bibliotecas, para
+comparar execuções entre commits (--baseline).
+
+Uso:
+    python benchmarks/bench_suite.py --output resultados.json
+    python benchmarks/bench_suite.py --zones 1000 100000 --baseline anterior.json --fail-above 1.2
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import logging
+from datetime import datetime, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from config import Config
+from services.zone_service import ZoneService
+from services.pdf_service import PDFService
+from services.data_cache import CACHE_DIR_NAME
+from benchmarks.synthetic import write_zones_csv
+
+for name in ('services.zone_service', 'services.data_cache', 'services.pdf_service'):
+    logging.getLogger(name).setLevel(logging.WARNING)
+
+# Consultas por repetição em get_zone_by_id (o tempo reportado é por consulta)
+LOOKUPS_PER_REPEAT = 1000
+
+# Acima deste tamanho o relatório PDF é pulado por padrão (uma página a cada 40 zonas)
+PDF_MAX_ZONES = 100000
+
+
+def measure(func, repeat: int, calls: int = 1) -> dict:
+    """
+    Executa func ``repeat`` vezes e resume os tempos por chamada
+
+    A primeira execução é reportada à parte ('first_s'): nela entram os
+    caches preenchidos sob demanda (registros, payloads, ordenações).
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) / calls)
+    return {
+        'calls': calls,
+        'repeat': repeat,
+        'first_s': timings[0],
+        'min_s': min(timings),
+        'median_s': statistics.median(timings),
+        'max_s': max(timings)
+    }
+
+
+def load_service(csv_path: str, cache_enabled: bool) -> ZoneService:
+    """Constrói um ZoneService com o cache colunar ligado ou desligado"""
+    Config.DATA_CACHE_ENABLED = cache_enabled
+    return ZoneService(csv_path)
+
+
+def bench_size(tmp_dir: str, n_zones: int, repeat: int, pdf_max_zones: int):
+    """Gera os resultados de todas as operações para um tamanho de base"""
+    csv_path = write_zones_csv(os.path.join(tmp_dir, f'zones_{n_zones}.csv'), n_zones)
+    shutil.rmtree(os.path.join(tmp_dir, CACHE_DIR_NAME), ignore_errors=True)
+
+    yield 'load_csv', measure(lambda: load_service(csv_path, False), repeat)
+    # A primeira execução grava o cache; as seguintes só o abrem
+    yield 'load_cached', measure(lambda: load_service(csv_path, True), repeat)
+
+    service = load_service(csv_path, False)
+    ids = np.random.default_rng(0).integers(1, n_zones + 1, LOOKUPS_PER_REPEAT).tolist()
+
+    def lookups():
+        for zone_id in ids:
+            service.get_zone_by_id(zone_id)
+
+    yield 'get_all_zones', measure(service.get_all_zones, repeat)
+    yield 'get_zone_by_id', measure(lookups, repeat, calls=len(ids))
+    yield 'get_statistics', measure(service.get_statistics, repeat)
+    yield 'get_report_data', measure(service.get_report_data, repeat)
+
+    if n_zones > pdf_max_zones:
+        yield 'generate_heat_island_report', {'skipped': f'mais de {pdf_max_zones} zonas (--pdf-max-zones)'}
+        return
+
+    pdf_service = PDFService()
+    sizes = []
+
+    def report():
+        output = pdf_service.generate_heat_island_report(service.iter_report_data(), service.get_statistics(),
+                                                         in_memory=True)
+        sizes.append(len(output.getbuffer()))
+
+    result = measure(report, repeat)
+    result['output_bytes'] = sizes[-1]
+    yield 'generate_heat_island_report', result
+
+
+def environment() -> dict:
+    """Commit, data e versões do ambiente da execução"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__
+    }
+
+
+def compare(results: list, baseline_path: str, fail_above: float) -> bool:
+    """
+    Compara min_s com uma execução anterior e imprime a razão atual/anterior
+
+    Returns:
+        True se nenhuma operação piorou mais que fail_above (razão)
+    """
+    with open(baseline_path, encoding='utf-8') as baseline_file:
+        baseline = {
+            (entry['zones'], entry['operation']): entry
+            for entry in json.load(baseline_file)['results']
+        }
+
+    ok = True
+    print(f"\n{'zonas':>10} {'operação':<30} {'anterior (s)':>13} {'atual (s)':>11} {'razão':>7}", file=sys.stderr)
+    for entry in results:
+        previous = baseline.get((entry['zones'], entry['operation']))
+        if previous is None or 'min_s' not in previous or 'min_s' not in entry:
+            continue
+        ratio = entry['min_s'] / previous['min_s'] if previous['min_s'] else float('inf')
+        flag = ''
+        if fail_above and ratio > fail_above:
+            flag, ok = ' !', False
+        print(f"{entry['zones']:>10} {entry['operation']:<30} {previous['min_s']:>13.6f} "
+              f"{entry['min_s']:>11.6f} {ratio:>6.2f}x{flag}", file=sys.stderr)
+    return ok
+
+
+def run(sizes, repeat: int, pdf_max_zones: int) -> dict:
+    """Executa a suíte e retorna o documento JSON (resumo legível vai para stderr)"""
+    results = []
+    cache_enabled = Config.DATA_CACHE_ENABLED
+    print(f"{'zonas':>10} {'operação':<30} {'primeira (s)':>13} {'mínimo (s)':>12} {'mediana (s)':>12}",
+          file=sys.stderr)
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for n_zones in sizes:
+                for operation, result in bench_size(tmp_dir, n_zones, repeat, pdf_max_zones):
+                    results.append(dict({'zones': n_zones, 'operation': operation}, **result))
+                    if 'skipped' in result:
+                        print(f"{n_zones:>10} {operation:<30} pulado: {result['skipped']}", file=sys.stderr)
+                    else:
+                        print(f"{n_zones:>10} {operation:<30} {result['first_s']:>13.6f} "
+                              f"{result['min_s']:>12.6f} {result['median_s']:>12.6f}", file=sys.stderr)
+    finally:
+        Config.DATA_CACHE_ENABLED = cache_enabled
+
+    return {'environment': environment(), 'results': results}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--zones', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--pdf-max-zones', type=int, default=PDF_MAX_ZONES,
+                        help='maior base em que o relatório PDF é medido')
+    parser.add_argument('--output', help='arquivo JSON de saída (padrão: stdout)')
+    parser.add_argument('--baseline', help='JSON de uma execução anterior para comparar')
+    parser.add_argument('--fail-above', type=float, default=0.0,
+                        help='com --baseline, sai com erro se alguma razão atual/anterior passar deste valor')
+    args = parser.parse_args()
+
+    document = run(args.zones, max(args.repeat, 1), args.pdf_max_zones)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(document, output_file, indent=2, ensure_ascii=False)
+    else:
+        json.dump(document, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+
+    if args.baseline and not compare(document['results'], args.baseline, args.fail_above):
+        sys.exit(1)
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Teste de carga da API com usuários concorrentes e percentis de latência por rota
+Sistema Clima Vida - NASA Space Apps Hackathon
+
+Sobe a aplicação de app_refactored.py no próprio processo, servida por um
+servidor WSGI local com threads (ou pelo test client do Flask), e dispara
+requisições de vários workers seguindo uma mistura de uso realista: carga do
+mapa, cliques em zonas, consulta periódica das estatísticas e relatórios
+ocasionais. Ao final, mostra vazão e latências p50/p95/p99 por rota.
+
+Uso:
+    python benchmarks/load_test.py --workers 16 --duration 30
+    python benchmarks/load_test.py --zones 100000 --mix reports --output carga.json
+"""
+
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import logging
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+import numpy as np
+from config import Config
+from benchmarks.synthetic import write_zones_csv
+
+# Peso de cada cenário em cada mistura (probabilidade proporcional ao peso)
+MIXES = {
+    # Visitantes navegando no mapa, sem relatórios
+    'browse': {'map_load': 5, 'map_clusters': 15, 'zone_click': 40, 'zone_page': 10, 'statistics': 30},
+    # Uso típico: relatórios ocasionais, quase sempre já em cache
+    'default': {'map_load': 5, 'map_clusters': 15, 'zone_click': 40, 'zone_page': 10, 'statistics': 29,
+                'report': 1},
+    # Gestores alterando zonas e pedindo relatórios: cada alteração muda a
+    # versão dos dados e obriga o próximo relatório a ser renderizado
+    'reports': {'map_load': 5, 'map_clusters': 15, 'zone_click': 35, 'zone_page': 10, 'statistics': 25,
+                'report': 5, 'zone_edit': 5}
+}
+
+# Rota (agrupamento do relatório) de cada cenário
+SCENARIO_ROUTES = {
+    'map_load': 'GET /api/zones',
+    'map_clusters': 'GET /api/zones/clusters',
+    'zone_click': 'GET /api/zone/<id>',
+    'zone_page': 'GET /api/zones?page',
+    'statistics': 'GET /api/statistics',
+    'report': 'GET /api/report',
+    'zone_edit': 'POST /api/zones/changes'
+}
+
+
+class Workload:
+    """Monta as requisições de cada cenário a partir das zonas carregadas"""
+
+    def __init__(self, zones, seed: int):
+        self.ids = [zone['id'] for zone in zones]
+        self.latitudes = (min(zone['latitude'] for zone in zones), max(zone['latitude'] for zone in zones))
+        self.longitudes = (min(zone['longitude'] for zone in zones), max(zone['longitude'] for zone in zones))
+        self.pages = max(len(zones) // Config.DEFAULT_PAGE_SIZE, 1)
+        self.seed = seed
+
+    def request(self, scenario: str, rng: random.Random):
+        """Retorna (método, caminho, corpo JSON) de uma requisição do cenário"""
+        if scenario == 'map_load':
+            return 'GET', '/api/zones', None
+        if scenario == 'map_clusters':
+            zoom = rng.randint(10, 15)
+            # Janela visível de ~1/2^(zoom-10) da cidade em cada eixo
+            span = 0.5 ** (zoom - 10)
+            west = rng.uniform(self.longitudes[0], self.longitudes[1] - (self.longitudes[1] - self.longitudes[0]) * span)
+            south = rng.uniform(self.latitudes[0], self.latitudes[1] - (self.latitudes[1] - self.latitudes[0]) * span)
+            east = west + (self.longitudes[1] - self.longitudes[0]) * span
+            north = south + (self.latitudes[1] - self.latitudes[0]) * span
+            return 'GET', f'/api/zones/clusters?zoom={zoom}&bbox={west:.5f},{south:.5f},{east:.5f},{north:.5f}', None
+        if scenario == 'zone_click':
+            return 'GET', f'/api/zone/{rng.choice(self.ids)}', None
+        if scenario == 'zone_page':
+            page = rng.randint(1, min(self.pages, 20))
+            return 'GET', f'/api/zones?page={page}&sort=indice_criticidade&order=desc', None
+        if scenario == 'statistics':
+            return 'GET', '/api/statistics', None
+        if scenario == 'report':
+            return 'GET', '/api/report', None
+        if scenario == 'zone_edit':
+            body = {'upsert': [{'id': rng.choice(self.ids), 'temperatura': round(rng.uniform(25, 45), 1)}]}
+            return 'POST', '/api/zones/changes', body
+        raise ValueError(f'Cenário desconhecido: {scenario}')
+
+
+class ServerClient:
+    """Cliente HTTP de um worker (cookies próprios) contra o servidor local"""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def send(self, method: str, path: str, body=None):
+        """Retorna (status, bytes da resposta)"""
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                         headers={'Content-Type': 'application/json'} if data else {})
+        try:
+            with self.opener.open(request, timeout=Config.REPORT_WAIT_TIMEOUT_SECONDS + 30) as response:
+                return response.status, len(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, len(e.read())
+
+
+class InProcessClient:
+    """Cliente de um worker usando o test client do Flask (sem rede)"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def send(self, method: str, path: str, body=None):
+        """Retorna (status, bytes da resposta)"""
+        response = self.client.open(path, method=method, json=body)
+        try:
+            return response.status_code, len(response.get_data())
+        finally:
+            response.close()
+
+
+def worker(client, workload: Workload, mix: dict, deadline: float, warmup_end: float,
+           seed: int, think_time: float, results: list) -> None:
+    """Executa requisições sorteadas da mistura até o prazo, anotando as medidas"""
+    rng = random.Random(seed)
+    scenarios, weights = list(mix), list(mix.values())
+    client.send('POST', '/auth/login', {'profile': 'gestor'})
+
+    while True:
+        scenario = rng.choices(scenarios, weights)[0]
+        method, path, body = workload.request(scenario, rng)
+        start = time.perf_counter()
+        if start >= deadline:
+            return
+        try:
+            status, size = client.send(method, path, body)
+        except Exception:
+            status, size = 0, 0
+        end = time.perf_counter()
+        if start >= warmup_end:
+            results.append((scenario, status, end - start, size))
+        if think_time:
+            time.sleep(rng.expovariate(1.0 / think_time))
+
+
+def summarize(records: list, elapsed: float) -> list:
+    """Vazão, erros, latências (ms) e tamanho médio por rota"""
+    by_scenario = defaultdict(list)
+    for record in records:
+        by_scenario[record[0]].append(record)
+
+    rows = []
+    for scenario, entries in sorted(by_scenario.items(), key=lambda item: -len(item[1])):
+        latencies = np.array([entry[2] for entry in entries]) * 1000.0
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        rows.append({
+            'route': SCENARIO_ROUTES[scenario],
+            'scenario': scenario,
+            'requests': len(entries),
+            'errors': sum(1 for entry in entries if not 200 <= entry[1] < 400),
+            'throughput_rps': len(entries) / elapsed,
+            'mean_ms': float(latencies.mean()),
+            'p50_ms': float(p50),
+            'p95_ms': float(p95),
+            'p99_ms': float(p99),
+            'max_ms': float(latencies.max()),
+            'mean_bytes': float(np.mean([entry[3] for entry in entries]))
+        })
+    return rows
+
+
+def print_table(rows: list, elapsed: float) -> None:
+    print(f"{'rota':<26} {'reqs':>7} {'erros':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'máx ms':>8} {'bytes':>10}", file=sys.stderr)
+    for row in rows:
+        print(f"{row['route']:<26} {row['requests']:>7} {row['errors']:>6} {row['throughput_rps']:>8.1f} "
+              f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['max_ms']:>8.1f} "
+              f"{row['mean_bytes']:>10.0f}", file=sys.stderr)
+    total = sum(row['requests'] for row in rows)
+    print(f"{'total':<26} {total:>7} {sum(row['errors'] for row in rows):>6} {total / elapsed:>8.1f}",
+          file=sys.stderr)
+
+
+def run(args) -> dict:
+    os.chdir(ROOT)
+    tmp_dir = tempfile.mkdtemp(prefix='load-test-')
+
+    # Configuração aplicada antes de importar a aplicação (que carrega a
+    # cidade padrão e cria os processos de relatório já na importação)
+    Config.REPORT_CACHE_DIR = os.path.join(tmp_dir, 'reports')
+    if args.zones:
+        csv_path = write_zones_csv(os.path.join(tmp_dir, 'zones.csv'), args.zones)
+        Config.CITY_DATA_FILES = dict(Config.CITY_DATA_FILES, **{Config.DEFAULT_CITY: csv_path})
+    logging.disable(logging.INFO)
+
+    import app_refactored
+
+    workload = Workload(app_refactored.zone_service.get_all_zones(), args.seed)
+    server = None
+    if args.mode == 'server':
+        from werkzeug.serving import make_server
+        server = make_server('127.0.0.1', 0, app_refactored.app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f'http://127.0.0.1:{server.server_port}'
+        clients = [ServerClient(base_url) for _ in range(args.workers)]
+    else:
+        clients = [InProcessClient(app_refactored.app) for _ in range(args.workers)]
+
+    results = []
+    start = time.perf_counter()
+    warmup_end = start + args.warmup
+    deadline = warmup_end + args.duration
+    threads = [
+        threading.Thread(target=worker, args=(client, workload, MIXES[args.mix], deadline, warmup_end,
+                                              args.seed + position, args.think_time, results))
+        for position, client in enumerate(clients)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Requisições longas (relatórios) podem terminar depois do prazo
+    elapsed = max(time.perf_counter(), deadline) - warmup_end
+
+    if server is not None:
+        server.shutdown()
+    app_refactored.report_queue.shutdown()
+
+    rows = summarize(results, elapsed)
+    print_table(rows, elapsed)
+    return {
+        'mode': args.mode,
+        'mix': args.mix,
+        'workers': args.workers,
+        'duration_s': elapsed,
+        'zones': len(workload.ids),
+        'routes': rows
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=8, help='usuários concorrentes')
+    parser.add_argument('--duration', type=float, default=20.0, help='duração medida (s)')
+    parser.add_argument('--warmup', type=float, default=2.0, help='aquecimento descartado (s)')
+    parser.add_argument('--mix', choices=sorted(MIXES), default='default')
+    parser.add_argument('--mode', choices=('server', 'client'), default='server',
+                        help='servidor WSGI local com threads ou test client do Flask')
+    parser.add_argument('--zones', type=int, help='usa zonas sintéticas em vez dos dados da cidade padrão')
+    parser.add_argument('--think-time', type=float, default=0.0,
+                        help='pausa média (s) entre requisições de um worker')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='grava o resultado em JSON')
+    args = parser.parse_args()
+
+    document = run(args)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(document, output_file, indent=2, ensure_ascii=False)
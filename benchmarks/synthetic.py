@@ -0,0 +1,87 @@
+"""
+Gerador de zonas sintéticas para benchmarks
+Sistema Clima Vida - NASA Space Apps Hackathon
+"""
+
+import numpy as np
+import pandas as pd
+
+REGIOES = ['Zona Norte', 'Zona Sul', 'Zona Leste', 'Zona Oeste', 'Centro']
+
+
+def generate_zones(n_zones: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Gera um DataFrame com o mesmo esquema de data/sp_zones_data.csv
+
+    Args:
+        n_zones: Quantidade de zonas
+        seed: Semente do gerador aleatório
+
+    Returns:
+        DataFrame com as colunas do CSV de zonas
+    """
+    rng = np.random.default_rng(seed)
+    ids = np.arange(1, n_zones + 1)
+
+    return pd.DataFrame({
+        'id': ids,
+        'nome': [f'Zona {i}' for i in ids],
+        'latitude': np.round(rng.uniform(-23.80, -23.35, n_zones), 4),
+        'longitude': np.round(rng.uniform(-46.85, -46.35, n_zones), 4),
+        'temperatura': np.round(rng.normal(38.0, 4.0, n_zones), 1),
+        'ndvi': np.round(rng.uniform(0.05, 0.85, n_zones), 2),
+        'densidade_populacional': rng.integers(500, 25000, n_zones),
+        'regiao': rng.choice(REGIOES, n_zones)
+    })
+
+
+def write_zones_csv(path: str, n_zones: int, seed: int = 42) -> str:
+    """
+    Grava zonas sintéticas em CSV
+
+    Args:
+        path: Caminho do arquivo de saída
+        n_zones: Quantidade de zonas
+        seed: Semente do gerador aleatório
+
+    Returns:
+        Caminho do arquivo gravado
+    """
+    generate_zones(n_zones, seed).to_csv(path, index=False)
+    return path
+
+
+def generate_observations(n_zones: int, n_days: int, start: str = '2020-01-01',
+                          seed: int = 42) -> pd.DataFrame:
+    """
+    Gera observações diárias com o esquema do CSV de séries históricas
+
+    Cada zona tem ciclo anual, tendência de aquecimento e ruído; as linhas
+    saem em ordem de data (como chegariam de uma ingestão diária).
+
+    Args:
+        n_zones: Quantidade de zonas (ids 1..n_zones)
+        n_days: Quantidade de dias a partir de start
+        start: Primeira data (AAAA-MM-DD)
+        seed: Semente do gerador aleatório
+
+    Returns:
+        DataFrame com as colunas id, data, temperatura e ndvi
+    """
+    rng = np.random.default_rng(seed)
+    days = np.arange(n_days)
+    season = np.cos(2 * np.pi * (days - 15) / 365.25)
+    base = rng.normal(30.0, 3.0, n_zones)
+
+    temperatura = (base[np.newaxis, :] + 4.0 * season[:, np.newaxis] + 0.0008 * days[:, np.newaxis]
+                   + rng.normal(0.0, 1.5, (n_days, n_zones)))
+    ndvi = np.clip(rng.uniform(0.1, 0.8, n_zones)[np.newaxis, :] + 0.05 * season[:, np.newaxis]
+                   + rng.normal(0.0, 0.03, (n_days, n_zones)), 0.0, 1.0)
+
+    dates = np.datetime64(start, 'D') + days
+    return pd.DataFrame({
+        'id': np.tile(np.arange(1, n_zones + 1), n_days),
+        'data': np.repeat(np.datetime_as_string(dates, unit='D'), n_zones),
+        'temperatura': np.round(temperatura.ravel(), 1),
+        'ndvi': np.round(ndvi.ravel(), 2)
+    })
@@ -3,6 +3,7 @@ Configurações do Sistema Cidades Frias, Corações Quentes
 Sistema de Identificação de Ilhas de Calor Urbano - São Paulo
 """
 
+import json
 import os
 
 class Config:
@@ -15,6 +16,100 @@ class Config:
     # Configurações de dados
     CSV_FILE_PATH = 'data/sp_zones_data.csv'
     
+    # Cidades disponíveis (/api/<cidade>/...) e cidade padrão das rotas sem prefixo
+    CITY_DATA_FILES = {
+        'sp': CSV_FILE_PATH,
+        'curitiba': 'data/curitiba_zones_data.csv'
+    }
+    DEFAULT_CITY = 'sp'
+    
+    # Séries históricas por cidade: CSV com id, data (AAAA-MM-DD), temperatura e ndvi
+    # (arquivos ausentes deixam a série vazia até receber observações)
+    CITY_OBSERVATION_FILES = {
+        'sp': 'data/sp_zones_observations.csv',
+        'curitiba': 'data/curitiba_zones_observations.csv'
+    }
+    
+    # Orçamento de memória (MB) para as cidades carregadas ao mesmo tempo
+    CITY_MEMORY_BUDGET_MB = int(os.environ.get('CITY_MEMORY_BUDGET_MB', '512'))
+    
+    # Dados publicados pelo processo pai do servidor pré-fork (cidade -> diretório)
+    SHARED_DATASETS = json.loads(os.environ.get('ZONE_SHARED_DATASETS', '{}'))
+    
+    # Supervisão dos workers do servidor pré-fork: espera antes de recriar um worker
+    # (dobra a cada worker que morre antes de PREFORK_MIN_UPTIME_SECONDS), máximo de
+    # reinícios numa janela (acima dele o servidor é encerrado) e prazo para os
+    # workers terminarem no desligamento
+    PREFORK_RESTART_BACKOFF_SECONDS = float(os.environ.get('PREFORK_RESTART_BACKOFF_SECONDS', '0.5'))
+    PREFORK_RESTART_BACKOFF_MAX_SECONDS = float(os.environ.get('PREFORK_RESTART_BACKOFF_MAX_SECONDS', '30'))
+    PREFORK_MIN_UPTIME_SECONDS = float(os.environ.get('PREFORK_MIN_UPTIME_SECONDS', '10'))
+    PREFORK_MAX_RESTARTS = int(os.environ.get('PREFORK_MAX_RESTARTS', '10'))
+    PREFORK_RESTART_WINDOW_SECONDS = float(os.environ.get('PREFORK_RESTART_WINDOW_SECONDS', '60'))
+    PREFORK_SHUTDOWN_TIMEOUT_SECONDS = float(os.environ.get('PREFORK_SHUTDOWN_TIMEOUT_SECONDS', '10'))
+    
+    # Recarga automática quando o CSV muda (verificação de mtime/tamanho)
+    DATA_WATCH_ENABLED = os.environ.get('DATA_WATCH_ENABLED', 'False').lower() == 'true'
+    DATA_WATCH_INTERVAL_SECONDS = float(os.environ.get('DATA_WATCH_INTERVAL_SECONDS', '30'))
+    
+    # Cache binário (.npy) das colunas processadas, gravado em .cache/ ao lado do CSV
+    DATA_CACHE_ENABLED = os.environ.get('DATA_CACHE_ENABLED', 'True').lower() == 'true'
+    
+    # Ingestão de rasters (services/raster_ingestion.py): lado dos blocos (pixels) e processos
+    # (RASTER_START_METHOD: fork, forkserver ou spawn; vazio = forkserver ou o padrão da plataforma)
+    RASTER_TILE_SIZE = int(os.environ.get('RASTER_TILE_SIZE', '512'))
+    RASTER_WORKERS = int(os.environ.get('RASTER_WORKERS', '1'))
+    RASTER_START_METHOD = os.environ.get('RASTER_START_METHOD', '')
+    
+    # /metrics (formato do Prometheus): se definido, exige "Authorization: Bearer <token>"
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+    # Servidor pré-fork: intervalo (s) em que cada worker grava suas métricas para a soma entre workers
+    METRICS_FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', '5'))
+    
+    # Perfilamento sob demanda (cProfile): requisições com "X-Profile: 1" de gestores (ou com
+    # "X-Profile-Token") e uma fração sorteada (PROFILE_SAMPLE_RATE), gravada só se passar de
+    # PROFILE_MIN_DURATION_MS; os perfis ficam em PROFILE_DIR (/admin/profiles), com rotação
+    PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join('temp', 'profiles'))
+    PROFILE_MAX_FILES = int(os.environ.get('PROFILE_MAX_FILES', '50'))
+    PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+    PROFILE_MIN_DURATION_MS = float(os.environ.get('PROFILE_MIN_DURATION_MS', '500'))
+    PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN', '')
+    
+    # Limite de IDs por consulta em lote (/api/zones/batch)
+    BATCH_MAX_IDS = 500
+    
+    # Índice espacial: ocupação média por célula da grade e limite de /api/zones/nearest
+    SPATIAL_INDEX_ZONES_PER_CELL = 16
+    NEAREST_MAX_K = 100
+    
+    # Pirâmide de tiles (/api/tiles/<z>/<x>/<y>): zoom máximo, subdivisões por tile e cache HTTP
+    TILE_MAX_ZOOM = 18
+    TILE_CELL_DEPTH = 3
+    TILE_MAX_CELL_DEPTH = 5
+    TILE_CACHE_MAX_AGE_SECONDS = int(os.environ.get('TILE_CACHE_MAX_AGE_SECONDS', '60'))
+    
+    # Clusters de /api/zones/clusters: zoom máximo e subdivisões da grade por tile (2 = células de 64 px)
+    CLUSTER_MAX_ZOOM = 16
+    CLUSTER_GRID_LEVELS = 2
+    
+    # Tendências (/api/trends): janela padrão e máxima da média móvel, em dias
+    TREND_WINDOW_DAYS = 30
+    TREND_MAX_WINDOW_DAYS = 365
+    
+    # Limite de observações por requisição em /api/zones/observations
+    OBSERVATIONS_MAX_PER_REQUEST = 100000
+    
+    # Paginação de /api/zones
+    DEFAULT_PAGE_SIZE = 15
+    MAX_PAGE_SIZE = 500
+    
+    # Simulação de cenários (/api/scenarios): limites por requisição
+    SCENARIO_MAX_SCENARIOS = 50
+    SCENARIO_MAX_INTERVENTIONS = 20
+    SCENARIO_MAX_IDS = 10000
+    # Variação máxima (em módulo) de cada intervenção
+    SCENARIO_MAX_NDVI_DELTA = 2.0
+    SCENARIO_MAX_TEMPERATURE_DELTA = 100.0
+    
     # Configurações do mapa - São Paulo
     DEFAULT_LATITUDE = -23.5505
     DEFAULT_LONGITUDE = -46.6333
@@ -31,11 +126,28 @@ class Config:
         'safe': '#44FF44'         # Verde - Segura
     }
     
+    # Cache em disco dos relatórios PDF (limites de quantidade e tamanho, LRU)
+    REPORT_CACHE_DIR = os.environ.get('REPORT_CACHE_DIR', os.path.join('temp', 'reports'))
+    REPORT_CACHE_MAX_ENTRIES = int(os.environ.get('REPORT_CACHE_MAX_ENTRIES', '32'))
+    REPORT_CACHE_MAX_MB = int(os.environ.get('REPORT_CACHE_MAX_MB', '256'))
+    REPORT_ORPHAN_MAX_AGE_SECONDS = 3600
+    
+    # Fila de relatórios: processos de renderização, jobs pendentes e espera do /api/report
+    # (REPORT_START_METHOD: fork, forkserver ou spawn; vazio = forkserver ou o padrão da plataforma)
+    REPORT_WORKERS = int(os.environ.get('REPORT_WORKERS', '2'))
+    REPORT_START_METHOD = os.environ.get('REPORT_START_METHOD', '')
+    REPORT_QUEUE_MAX_PENDING = 16
+    REPORT_WAIT_TIMEOUT_SECONDS = 120
+    
     # Configurações do relatório PDF
     PDF_TITLE = "Relatório de Ilhas de Calor - São Paulo"
     PDF_AUTHOR = "Cidades Frias, Corações Quentes"
     PDF_SUBTITLE = "Sistema de Análise Urbana"
     
+    # Linhas por tabela do relatório (~1 página) e linhas convertidas por lote ao ler os dados
+    PDF_TABLE_ROWS_PER_PAGE = 40
+    REPORT_DATA_CHUNK_ROWS = 5000
+    
     # Perfis de usuário
     USER_PROFILES = {
         'GESTOR': {
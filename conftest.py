@@ -0,0 +1,87 @@
+"""
+Fixtures compartilhadas dos testes do serviço de zonas
+Sistema Clima Vida - NASA Space Apps Hackathon
+"""
+
+import os
+import pandas as pd
+import pytest
+from config import Config
+from benchmarks.synthetic import generate_zones
+from services.aggregate_cube import CUBE_DIMENSIONS
+from services.zone_service import ZoneService
+
+# Caixas e pontos usados para comparar os índices espaciais
+# (inclusive fora dos limites da grade original, onde caem zonas inseridas depois)
+BBOXES = [(-23.80, -23.35, -46.85, -46.35), (-23.60, -23.50, -46.70, -46.55),
+          (-23.0, -22.0, -45.0, -44.0), (-22.6, -22.4, -46.6, -46.4)]
+POINTS = [(-23.55, -46.63), (-23.70, -46.80), (-23.40, -46.40), (-22.50, -46.50)]
+
+
+@pytest.fixture
+def zones_frame() -> pd.DataFrame:
+    """Zonas sintéticas com o esquema do CSV de zonas"""
+    return generate_zones(300, seed=7)
+
+
+@pytest.fixture
+def make_service(tmp_path, monkeypatch):
+    """
+    Cria um ZoneService a partir de um DataFrame gravado em CSV
+
+    Com ``cached=True`` o serviço lê o cache colunar gravado por uma carga
+    anterior (colunas de texto categóricas, como nos processos pré-fork).
+    """
+    counter = iter(range(1_000_000))
+
+    def make(frame: pd.DataFrame, cached: bool = False, **kwargs) -> ZoneService:
+        monkeypatch.setattr(Config, 'DATA_CACHE_ENABLED', cached)
+        path = os.path.join(tmp_path, f'zonas_{next(counter)}.csv')
+        frame.to_csv(path, index=False)
+        if cached:
+            ZoneService(path, **kwargs)
+        return ZoneService(path, **kwargs)
+
+    return make
+
+
+def _zone_ids(zones):
+    return [zone['id'] for zone in zones]
+
+
+@pytest.fixture
+def assert_same_state():
+    """Verifica que dois serviços publicam os mesmos dados, estatísticas, cubo e índices"""
+
+    def check(service: ZoneService, expected: ZoneService) -> None:
+        snapshot, reference = service.snapshot, expected.snapshot
+
+        assert service.get_all_zones() == expected.get_all_zones()
+        assert service.get_statistics() == pytest.approx(expected.get_statistics())
+        assert snapshot.aggregates.class_counts == reference.aggregates.class_counts
+        assert snapshot.aggregates.total_zones == reference.aggregates.total_zones
+        assert snapshot.aggregates.sum_temperature == pytest.approx(reference.aggregates.sum_temperature)
+        assert snapshot.aggregates.sum_criticity == pytest.approx(reference.aggregates.sum_criticity)
+
+        for group_by in (CUBE_DIMENSIONS, ('regiao',), ()):
+            cells = snapshot.cube.rollup(group_by)
+            expected_cells = reference.cube.rollup(group_by)
+            assert len(cells) == len(expected_cells)
+            for cell, expected_cell in zip(cells, expected_cells):
+                assert cell == pytest.approx(expected_cell)
+
+        assert dict(snapshot.id_index) == dict(reference.id_index)
+        for zone_id in list(reference.id_index)[:20]:
+            assert service.get_zone_by_id(zone_id) == expected.get_zone_by_id(zone_id)
+
+        for bbox in BBOXES:
+            assert _zone_ids(service.get_zones_in_bbox(*bbox)) == _zone_ids(expected.get_zones_in_bbox(*bbox))
+        for lat, lon in POINTS:
+            assert _zone_ids(service.get_nearest_zones(lat, lon, 7)) == _zone_ids(expected.get_nearest_zones(lat, lon, 7))
+
+        for sort in ('temperatura', 'nome', 'classificacao', None):
+            page = service.query_zones(page_size=25, sort=sort, order='desc')
+            assert page == expected.query_zones(page_size=25, sort=sort, order='desc')
+        assert service.get_tile(10, 379, 580) == expected.get_tile(10, 379, 580)
+
+    return check
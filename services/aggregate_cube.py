@@ -0,0 +1,170 @@
+"""
+Cubo de Agregados por Região e Classificação
+Sistema Clima Vida - NASA Space Apps Hackathon
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from utils.classification import CLASSIFICATIONS
+
+# Dimensões do cubo (colunas do DataFrame de zonas)
+CUBE_DIMENSIONS = ('regiao', 'classificacao')
+
+# Medidas: coluna de origem, nome na API e casas decimais
+CUBE_MEASURES = (
+    ('temperatura', 'temperature', 1),
+    ('ndvi', 'ndvi', 2),
+    ('indice_criticidade', 'criticity', 2)
+)
+
+# Peso das médias ponderadas
+WEIGHT_COLUMN = 'densidade_populacional'
+
+
+def _sum_columns() -> List[str]:
+    """Colunas de somas guardadas em cada célula, além da contagem"""
+    columns = ['count']
+    for _, name, _ in CUBE_MEASURES:
+        columns += [f'sum_{name}', f'count_{name}', f'wsum_{name}', f'weight_{name}']
+    return columns
+
+
+SUM_COLUMNS = _sum_columns()
+
+
+def _row_sums(data: pd.DataFrame) -> Tuple[List[np.ndarray], Dict[str, np.ndarray]]:
+    """Chaves (uma por dimensão) e contribuição de cada linha para cada coluna de somas"""
+    weights = data[WEIGHT_COLUMN].to_numpy(dtype=np.float64)
+    valid_weights = ~np.isnan(weights)
+    columns = {'count': np.ones(len(data))}
+    for column, name, _ in CUBE_MEASURES:
+        values = data[column].to_numpy(dtype=np.float64)
+        valid = ~np.isnan(values)
+        weighted = valid & valid_weights
+        columns[f'sum_{name}'] = np.where(valid, values, 0.0)
+        columns[f'count_{name}'] = valid.astype(np.float64)
+        columns[f'wsum_{name}'] = np.where(weighted, values * weights, 0.0)
+        columns[f'weight_{name}'] = np.where(weighted, weights, 0.0)
+
+    keys = [data[dimension].astype(object).fillna('Desconhecida').to_numpy()
+            for dimension in CUBE_DIMENSIONS]
+    return keys, columns
+
+
+@dataclass(frozen=True)
+class AggregateCube:
+    """
+    Somas por célula (região, classificação) que sustentam as médias agregadas
+
+    Como ZoneAggregates, guarda somas e contagens em vez de médias, de modo
+    que pode ser atualizado por diferença e reagrupado (roll-up) sem voltar
+    às zonas. Para cada medida há a soma e a contagem dos valores válidos e,
+    para a média ponderada pela densidade populacional, a soma dos produtos
+    valor × peso e a soma dos pesos.
+    """
+    sums: pd.DataFrame
+
+    @classmethod
+    def from_frame(cls, data: Optional[pd.DataFrame]) -> 'AggregateCube':
+        """
+        Calcula as somas de um DataFrame processado (valores nulos são ignorados)
+        """
+        index = pd.MultiIndex.from_arrays([[], []], names=CUBE_DIMENSIONS)
+        if data is None or data.empty:
+            return cls(pd.DataFrame(0.0, index=index, columns=SUM_COLUMNS))
+
+        keys, columns = _row_sums(data)
+        sums = pd.DataFrame(columns).groupby(keys).sum()
+        sums.index.names = CUBE_DIMENSIONS
+        return cls(sums)
+
+    def apply_delta(self, added: 'AggregateCube', removed: 'AggregateCube') -> 'AggregateCube':
+        """
+        Retorna um novo cubo somando as linhas adicionadas e subtraindo as removidas
+        """
+        sums = self.sums.add(added.sums, fill_value=0.0).sub(removed.sums, fill_value=0.0)
+        # Células que ficaram vazias saem do cubo (e levam junto resíduos de arredondamento)
+        return AggregateCube(sums[sums['count'] > 0.5])
+
+    def apply_rows(self, added: Sequence[pd.DataFrame] = (),
+                   removed: Sequence[pd.DataFrame] = ()) -> 'AggregateCube':
+        """
+        Como apply_delta, mas a partir das linhas adicionadas e removidas
+
+        Feito para poucas linhas (API de escrita): a contribuição de cada
+        linha vai direto para a sua célula, sem agrupar nem alinhar
+        DataFrames; o custo depende das linhas e da quantidade de células,
+        não do total de zonas.
+        """
+        values = self.sums[SUM_COLUMNS].to_numpy(dtype=np.float64, copy=True)
+        cells = dict(zip(self.sums.index, values))
+        frames = [(frame, 1.0) for frame in added] + [(frame, -1.0) for frame in removed]
+        for frame, sign in frames:
+            if frame is None or frame.empty:
+                continue
+            keys, columns = _row_sums(frame)
+            rows = np.column_stack([columns[column] for column in SUM_COLUMNS]) * sign
+            for key, row in zip(zip(*(dimension.tolist() for dimension in keys)), rows):
+                cell = cells.get(key)
+                if cell is None:
+                    cells[key] = row.copy()
+                else:
+                    cell += row
+
+        # Células que ficaram vazias saem do cubo, como em apply_delta
+        kept = sorted(key for key, cell in cells.items() if cell[0] > 0.5)
+        if kept:
+            index = pd.MultiIndex.from_tuples(kept, names=CUBE_DIMENSIONS)
+        else:
+            index = pd.MultiIndex.from_arrays([[], []], names=CUBE_DIMENSIONS)
+        sums = np.array([cells[key] for key in kept]).reshape(len(kept), len(SUM_COLUMNS))
+        return AggregateCube(pd.DataFrame(sums, index=index, columns=SUM_COLUMNS))
+
+    def rollup(self, group_by: Sequence[str] = CUBE_DIMENSIONS) -> List[Dict[str, Any]]:
+        """
+        Agrega as células pelas dimensões pedidas e calcula as médias
+
+        Args:
+            group_by: Dimensões mantidas (subconjunto de CUBE_DIMENSIONS);
+                vazio retorna uma única célula com o total
+
+        Returns:
+            Lista de células com as dimensões, 'count' e as médias simples
+            ('avg_*') e ponderadas pela densidade populacional ('weighted_avg_*'),
+            ordenada por região e pela gravidade da classificação
+        """
+        group_by = [dimension for dimension in CUBE_DIMENSIONS if dimension in group_by]
+        if group_by:
+            sums = self.sums.groupby(level=group_by).sum()
+        else:
+            sums = self.sums.sum().to_frame().T
+            sums.index = [()]
+
+        cells = []
+        for key, row in zip(sums.index, sums.to_dict('records')):
+            key = key if isinstance(key, tuple) else (key,)
+            cell = dict(zip(group_by, key))
+            cell['count'] = int(round(row['count']))
+            for _, name, digits in CUBE_MEASURES:
+                cell[f'avg_{name}'] = _mean(row[f'sum_{name}'], row[f'count_{name}'], digits)
+                cell[f'weighted_avg_{name}'] = _mean(row[f'wsum_{name}'], row[f'weight_{name}'], digits)
+            cells.append(cell)
+
+        severity = {classification: position for position, classification in enumerate(CLASSIFICATIONS)}
+        cells.sort(key=lambda cell: (
+            str(cell.get('regiao', '')),
+            severity.get(cell.get('classificacao'), len(severity)),
+            str(cell.get('classificacao', ''))
+        ))
+        return cells
+
+
+def _mean(total: float, count: float, digits: int) -> Optional[float]:
+    """Média arredondada; None quando não há valores (JSON não aceita NaN)"""
+    if count <= 0:
+        return None
+    value = total / count
+    return round(value, digits) if math.isfinite(value) else None
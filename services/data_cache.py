@@ -0,0 +1,265 @@
+"""
+Cache Binário Colunar dos Dados Processados
+Sistema Clima Vida - NASA Space Apps Hackathon
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Incrementar sempre que o processamento (ou o formato do cache) mudar,
+# para invalidar caches gerados por versões anteriores
+CACHE_FORMAT_VERSION = 1
+
+# Subdiretório, ao lado do CSV, onde os caches são gravados
+CACHE_DIR_NAME = '.cache'
+
+# Tamanho dos blocos lidos ao calcular o hash do arquivo de origem
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def source_cache_key(source_path: str, params: Dict[str, Any]) -> str:
+    """
+    Calcula a chave do cache: hash do conteúdo do arquivo e dos parâmetros de processamento
+
+    Args:
+        source_path: Caminho do arquivo de origem
+        params: Parâmetros que alteram o resultado (limiares, cores, versão do formato)
+
+    Returns:
+        Chave hexadecimal
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(source_path, 'rb') as source:
+        for chunk in iter(lambda: source.read(HASH_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    digest.update(json.dumps(params, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+    return digest.hexdigest()
+
+
+@dataclass
+class CachedDataset:
+    """Conteúdo lido do cache: colunas processadas e artefatos derivados"""
+    data: pd.DataFrame
+    source_columns: Tuple[str, ...]
+    arrays: Dict[str, np.ndarray] = field(default_factory=dict)
+    blobs: Dict[str, Union[bytes, memoryview]] = field(default_factory=dict)
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+
+def _map_blob(path: str) -> Union[bytes, memoryview]:
+    """
+    Mapeia um arquivo binário somente leitura (sem copiar o conteúdo para o processo)
+    """
+    with open(path, 'rb') as blob_file:
+        if os.fstat(blob_file.fileno()).st_size == 0:
+            return b''
+        # O mapeamento continua válido depois que o arquivo é fechado
+        return memoryview(mmap.mmap(blob_file.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def load_dataset(path: str) -> Optional[CachedDataset]:
+    """
+    Abre um diretório gravado por ColumnarCache.save
+
+    Nada é copiado para a memória do processo: colunas numéricas e arrays
+    são abertos com mmap, colunas de texto viram Categorical (códigos
+    mapeados mais as categorias) e blobs são memoryviews sobre o arquivo
+    mapeado. Processos que abrem o mesmo diretório compartilham essas
+    páginas no page cache.
+
+    Args:
+        path: Diretório do cache
+
+    Returns:
+        Colunas processadas e artefatos, ou None se o diretório não existir ou for inválido
+    """
+    meta_path = os.path.join(path, 'meta.json')
+    if not os.path.exists(meta_path):
+        return None
+
+    try:
+        with open(meta_path, encoding='utf-8') as meta_file:
+            meta = json.load(meta_file)
+        if meta.get('format') != CACHE_FORMAT_VERSION:
+            return None
+
+        columns = {}
+        for position, column in enumerate(meta['columns']):
+            values = np.load(os.path.join(path, f'col{position}.npy'), mmap_mode='r')
+            if len(values) != meta['rows']:
+                raise ValueError(f"coluna {column['name']} com tamanho inesperado")
+
+            if column['kind'] == 'text':
+                categories = pd.Index(column['categories'], dtype=column['dtype'])
+                # Sem astype: converter de volta para texto criaria um objeto por linha
+                columns[column['name']] = pd.Categorical.from_codes(values, categories=categories)
+            else:
+                columns[column['name']] = values
+
+        arrays = {
+            name: np.load(os.path.join(path, f'arr{position}.npy'), mmap_mode='r')
+            for position, name in enumerate(meta['arrays'])
+        }
+        blobs = {
+            name: _map_blob(os.path.join(path, f'blob{position}.bin'))
+            for position, name in enumerate(meta['blobs'])
+        }
+
+        # copy=False mantém as colunas numéricas apontando para o mmap
+        return CachedDataset(
+            data=pd.DataFrame(columns, copy=False),
+            source_columns=tuple(meta['source_columns']),
+            arrays=arrays,
+            blobs=blobs,
+            attrs=meta['attrs']
+        )
+
+    except Exception as e:
+        logger.warning(f"Cache ignorado ({path}): {e}")
+        return None
+
+
+class ColumnarCache:
+    """
+    Cache das colunas processadas de um CSV, um arquivo .npy por coluna
+
+    Colunas numéricas são gravadas como estão e abertas com mmap (sem cópia
+    nem parsing); colunas de texto são gravadas como códigos inteiros mais a
+    lista de categorias. Artefatos derivados (arrays, blobs e atributos
+    pequenos) podem ser guardados junto para evitar recalculá-los.
+
+    Cada chave ocupa um diretório próprio, gravado num diretório temporário
+    e renomeado ao final, de modo que um cache incompleto nunca é lido.
+    """
+
+    def __init__(self, source_path: str, key: str, root: Optional[str] = None):
+        """
+        Inicializa o cache
+
+        Args:
+            source_path: Caminho do CSV de origem
+            key: Chave calculada por source_cache_key
+            root: Diretório base (padrão: .cache ao lado do CSV)
+        """
+        source_path = os.path.abspath(source_path)
+        self.stem = os.path.splitext(os.path.basename(source_path))[0]
+        self.root = root or os.path.join(os.path.dirname(source_path), CACHE_DIR_NAME)
+        self.key = key
+        self.path = os.path.join(self.root, f'{self.stem}-{key}')
+
+    def load(self) -> Optional[CachedDataset]:
+        """
+        Abre o cache, se existir
+
+        Returns:
+            Colunas processadas e artefatos, ou None se o cache não existir ou for inválido
+        """
+        return load_dataset(self.path)
+
+    def save(self, data: pd.DataFrame, source_columns: Tuple[str, ...],
+             arrays: Optional[Dict[str, np.ndarray]] = None,
+             blobs: Optional[Dict[str, bytes]] = None,
+             attrs: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Grava o cache das colunas processadas e remove caches antigos do mesmo arquivo
+
+        Args:
+            data: DataFrame processado
+            source_columns: Colunas do CSV original
+            arrays: Arrays derivados (abertos com mmap na leitura)
+            blobs: Conteúdos binários derivados
+            attrs: Valores pequenos serializáveis em JSON
+
+        Returns:
+            True se o cache foi gravado
+        """
+        if os.path.exists(os.path.join(self.path, 'meta.json')):
+            return True
+
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            staging = tempfile.mkdtemp(prefix=f'.{self.stem}-', dir=self.root)
+        except OSError as e:
+            logger.warning(f"Não foi possível criar o cache em {self.root}: {e}")
+            return False
+
+        try:
+            columns = []
+            for position, name in enumerate(data.columns):
+                series = data[name]
+                if series.dtype.kind in 'biuf':
+                    values = series.to_numpy()
+                    columns.append({'name': name, 'kind': 'numeric'})
+                elif (pd.api.types.is_string_dtype(series.dtype)
+                      or isinstance(series.dtype, pd.CategoricalDtype)):
+                    categorical = pd.Categorical(series)
+                    # Códigos no tipo que o pandas usa para essa quantidade de
+                    # categorias, para que a leitura os mantenha mapeados
+                    values = categorical.codes
+                    columns.append({
+                        'name': name,
+                        'kind': 'text',
+                        'dtype': str(categorical.categories.dtype),
+                        'categories': [str(category) for category in categorical.categories]
+                    })
+                else:
+                    logger.warning(f"Coluna sem suporte no cache: {name} ({series.dtype})")
+                    return False
+                np.save(os.path.join(staging, f'col{position}.npy'), values, allow_pickle=False)
+
+            arrays = arrays or {}
+            for position, values in enumerate(arrays.values()):
+                np.save(os.path.join(staging, f'arr{position}.npy'), values, allow_pickle=False)
+
+            blobs = blobs or {}
+            for position, content in enumerate(blobs.values()):
+                with open(os.path.join(staging, f'blob{position}.bin'), 'wb') as blob_file:
+                    blob_file.write(content)
+
+            meta = {
+                'format': CACHE_FORMAT_VERSION,
+                'rows': len(data),
+                'source_columns': list(source_columns),
+                'columns': columns,
+                'arrays': list(arrays),
+                'blobs': list(blobs),
+                'attrs': attrs or {}
+            }
+            with open(os.path.join(staging, 'meta.json'), 'w', encoding='utf-8') as meta_file:
+                json.dump(meta, meta_file, ensure_ascii=False)
+
+            try:
+                os.rename(staging, self.path)
+            except OSError:
+                # Outro processo gravou a mesma chave primeiro
+                return os.path.exists(self.path)
+
+            logger.info(f"Cache colunar gravado: {self.path}")
+            self._remove_stale()
+            return True
+
+        except Exception as e:
+            logger.warning(f"Erro ao gravar cache colunar: {e}")
+            return False
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def _remove_stale(self) -> None:
+        """Remove caches do mesmo arquivo gravados com outras chaves"""
+        prefix = f'{self.stem}-'
+        for entry in os.listdir(self.root):
+            path = os.path.join(self.root, entry)
+            stale = entry.startswith(prefix) and len(entry) == len(prefix) + len(self.key)
+            if stale and path != self.path:
+                shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,82 @@
+"""
+Monitoramento dos Arquivos de Dados
+Sistema Clima Vida - NASA Space Apps Hackathon
+"""
+
+import threading
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from services.zone_service import ZoneService
+import logging
+
+logger = logging.getLogger(__name__)
+
+class DataFileWatcher:
+    """
+    Thread em segundo plano que recarrega os serviços quando o CSV muda
+
+    A cada intervalo compara (mtime, tamanho) do arquivo com a última carga.
+    A recarga só acontece quando a assinatura se repete em duas verificações
+    seguidas, para não ler um arquivo que ainda está sendo escrito.
+    """
+
+    def __init__(self, services: Callable[[], Iterable[ZoneService]], interval_seconds: float):
+        """
+        Inicializa o monitor
+
+        Args:
+            services: Função que retorna os serviços a monitorar (ex.: cidades carregadas)
+            interval_seconds: Intervalo entre verificações
+        """
+        self.services = services
+        self.interval_seconds = interval_seconds
+        self._pending: Dict[str, Tuple[int, int]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Inicia a thread de monitoramento (idempotente)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='data-file-watcher', daemon=True)
+        self._thread.start()
+        logger.info(f"Monitoramento de dados ativo (intervalo: {self.interval_seconds}s)")
+
+    def stop(self) -> None:
+        """Interrompe a thread de monitoramento"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def check_once(self) -> int:
+        """
+        Verifica todos os serviços uma vez
+
+        Returns:
+            Quantidade de serviços que publicaram uma nova versão
+        """
+        reloaded = 0
+        for service in list(self.services()):
+            try:
+                if not service.source_changed():
+                    self._pending.pop(service.csv_file, None)
+                    continue
+
+                # Só recarrega quando o arquivo parou de mudar desde a última verificação
+                signature = service._read_source_signature()
+                if self._pending.get(service.csv_file) != signature:
+                    self._pending[service.csv_file] = signature
+                    continue
+
+                del self._pending[service.csv_file]
+                if service.reload_if_changed():
+                    reloaded += 1
+
+            except Exception as e:
+                logger.error(f"Erro ao recarregar {service.csv_file}: {e}")
+        return reloaded
+
+    def _run(self) -> None:
+        """Laço principal da thread"""
+        while not self._stop.wait(self.interval_seconds):
+            self.check_once()
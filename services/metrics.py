@@ -0,0 +1,303 @@
+"""
+Métricas Operacionais no Formato de Texto do Prometheus
+Sistema Clima Vida - NASA Space Apps Hackathon
+"""
+
+import bisect
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Limites (segundos) dos histogramas de latência: de 1 ms a 1 min
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Limites (bytes) dos histogramas de tamanho: de 256 B a 64 MB
+SIZE_BUCKETS = tuple(256 * 4 ** exponent for exponent in range(10))
+
+
+class MetricFamily(NamedTuple):
+    """Métrica pronta para exposição: nome, tipo, descrição e amostras (rótulos, valor)"""
+    name: str
+    kind: str
+    help: str
+    samples: List[Tuple[str, Dict[str, str], float]]
+
+
+class Counter:
+    """Contador monotônico com rótulos"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        """Soma amount à série dos rótulos informados (na ordem de labelnames)"""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        """Valor atual da série"""
+        return self._values.get(labels, 0.0)
+
+    def dump(self) -> List[Any]:
+        """Estado das séries em formato JSON (para somar em outro processo)"""
+        with self._lock:
+            return [[list(labels), value] for labels, value in self._values.items()]
+
+    def collect(self, dumps: Iterable[List[Any]] = ()) -> MetricFamily:
+        """Amostras do processo somadas às de outros processos (dumps)"""
+        with self._lock:
+            values = dict(self._values)
+        for dump in dumps:
+            for labels, value in dump:
+                labels = tuple(labels)
+                values[labels] = values.get(labels, 0.0) + value
+        samples = [(self.name + '_total', dict(zip(self.labelnames, labels)), value)
+                   for labels, value in values.items()]
+        return MetricFamily(self.name, self.kind, self.help, samples)
+
+
+class Histogram:
+    """
+    Histograma com rótulos e limites fixos
+
+    Cada observação custa uma busca binária nos limites e um incremento;
+    as contagens acumuladas só são montadas na exposição.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Por série: [contagem de cada faixa (a última é +Inf), soma]
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Registra uma observação na série dos rótulos informados"""
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][position] += 1
+            series[1][0] += value
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        """Observa a duração (s) do bloco, se ele terminar sem exceção"""
+        start = time.perf_counter()
+        yield
+        self.observe(time.perf_counter() - start, *labels)
+
+    def dump(self) -> List[Any]:
+        """Estado das séries em formato JSON (para somar em outro processo)"""
+        with self._lock:
+            return [[list(labels), list(counts), total[0]] for labels, (counts, total) in self._series.items()]
+
+    def collect(self, dumps: Iterable[List[Any]] = ()) -> MetricFamily:
+        """Amostras do processo somadas às de outros processos (dumps)"""
+        with self._lock:
+            series = {labels: (list(counts), total[0]) for labels, (counts, total) in self._series.items()}
+        for dump in dumps:
+            for labels, counts, total in dump:
+                if len(counts) != len(self.buckets) + 1:
+                    continue
+                labels = tuple(labels)
+                current = series.get(labels)
+                if current is None:
+                    series[labels] = (list(counts), total)
+                else:
+                    series[labels] = ([a + b for a, b in zip(current[0], counts)], current[1] + total)
+
+        samples = []
+        bounds = [_format_value(bound) for bound in self.buckets] + ['+Inf']
+        for labels, (counts, total) in series.items():
+            base = dict(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                samples.append((self.name + '_bucket', dict(base, le=bound), cumulative))
+            samples.append((self.name + '_sum', base, total))
+            samples.append((self.name + '_count', base, cumulative))
+        return MetricFamily(self.name, self.kind, self.help, samples)
+
+
+class MetricsRegistry:
+    """
+    Conjunto de métricas do processo e exposição no formato de texto do Prometheus
+
+    Contadores e histogramas são atualizados pelos serviços; valores que já
+    existem em outro lugar (versão dos dados, acertos do cache de relatórios)
+    são lidos por coletores só no momento da exposição.
+
+    Cada processo tem as suas métricas. No servidor pré-fork (ver share), cada
+    worker grava periodicamente seus contadores e histogramas num arquivo do
+    diretório compartilhado, e o worker que atende /metrics expõe a soma de
+    todos os arquivos com os próprios valores; os gauges dos coletores são
+    do worker que atendeu, identificado pelo rótulo ``worker`` (pid).
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._collectors: Dict[str, Callable[[], Iterable[MetricFamily]]] = {}
+        self._lock = threading.Lock()
+        # Arquivo deste processo no diretório compartilhado (None = métricas só do processo)
+        self._shared_path: Optional[str] = None
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Cria (ou retorna, se já existir) um contador"""
+        return self._register(name, lambda: Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        """Cria (ou retorna, se já existir) um histograma"""
+        return self._register(name, lambda: Histogram(name, help, labelnames, buckets))
+
+    def _register(self, name: str, create):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = create()
+            return metric
+
+    def register_collector(self, name: str, collect: Callable[[], Iterable[MetricFamily]]) -> None:
+        """Registra (ou substitui) uma função que gera métricas na exposição"""
+        with self._lock:
+            self._collectors[name] = collect
+
+    def share(self, directory: str, interval: float) -> None:
+        """
+        Passa a publicar as métricas do processo em directory e a somar as dos demais
+
+        O arquivo do processo é regravado a cada interval segundos (numa thread)
+        e em flush; o de um worker encerrado continua lá, para os contadores
+        não diminuírem. Valores de outros workers chegam com até interval de
+        atraso, e os registrados depois da última gravação de um worker que
+        morreu sem flush se perdem.
+
+        Args:
+            directory: Diretório compartilhado pelos workers (removido pelo pai no fim)
+            interval: Intervalo (s) entre gravações
+        """
+        fd, path = tempfile.mkstemp(prefix=f'{os.getpid()}-', suffix='.json', dir=directory)
+        os.close(fd)
+        self._shared_path = path
+        self.flush()
+        threading.Thread(target=self._flush_periodically, args=(interval,),
+                         name='metrics-flush', daemon=True).start()
+
+    def _flush_periodically(self, interval: float) -> None:
+        while True:
+            time.sleep(interval)
+            try:
+                self.flush()
+            except OSError as e:
+                logger.warning(f"Erro ao gravar as métricas compartilhadas: {e}")
+
+    def flush(self) -> None:
+        """Grava contadores e histogramas do processo no diretório compartilhado (se houver)"""
+        path = self._shared_path
+        if path is None:
+            return
+        with self._lock:
+            metrics = list(self._metrics.items())
+        partial = f'{path}.tmp'
+        with open(partial, 'w') as output:
+            json.dump({name: metric.dump() for name, metric in metrics}, output)
+        os.replace(partial, path)
+
+    def _shared_dumps(self) -> Dict[str, List[List[Any]]]:
+        """Estados gravados pelos outros processos, por métrica"""
+        path = self._shared_path
+        if path is None:
+            return {}
+        directory = os.path.dirname(path)
+        dumps: Dict[str, List[List[Any]]] = {}
+        for name in os.listdir(directory):
+            other = os.path.join(directory, name)
+            if not name.endswith('.json') or other == path:
+                continue
+            try:
+                with open(other) as source:
+                    state = json.load(source)
+            except (OSError, ValueError):
+                # Arquivo recém-criado (vazio) ou removido durante a leitura
+                continue
+            for metric, dump in state.items():
+                dumps.setdefault(metric, []).append(dump)
+        return dumps
+
+    def collect(self) -> List[MetricFamily]:
+        """Todas as métricas do processo (somadas às dos demais workers, se compartilhadas)"""
+        with self._lock:
+            metrics = list(self._metrics.items())
+            collectors = list(self._collectors.values())
+
+        dumps = self._shared_dumps()
+        families = [metric.collect(dumps.get(name, ())) for name, metric in metrics]
+        worker = {'worker': str(os.getpid())} if self._shared_path is not None else {}
+        for collect in collectors:
+            for family in collect():
+                if worker:
+                    family = family._replace(samples=[(name, dict(labels, **worker), value)
+                                                      for name, labels, value in family.samples])
+                families.append(family)
+        return families
+
+    def render(self) -> str:
+        """Métricas no formato de texto do Prometheus (versão 0.0.4)"""
+        lines = []
+        for family in self.collect():
+            lines.append(f'# HELP {family.name} {_escape_help(family.help)}')
+            lines.append(f'# TYPE {family.name} {family.kind}')
+            for name, labels, value in family.samples:
+                if labels:
+                    rendered = ','.join(f'{key}="{_escape_label(str(label))}"' for key, label in labels.items())
+                    lines.append(f'{name}{{{rendered}}} {_format_value(value)}')
+                else:
+                    lines.append(f'{name} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def gauge(name: str, help: str, samples: Iterable[Tuple[Dict[str, str], Optional[float]]]) -> MetricFamily:
+    """Monta um gauge para coletores (amostras com valor None são omitidas)"""
+    return MetricFamily(name, 'gauge', help,
+                        [(name, labels, value) for labels, value in samples if value is not None])
+
+
+def _format_value(value: float) -> str:
+    """Número no formato do Prometheus (inteiros sem casa decimal)"""
+    if value != value:
+        return 'NaN'
+    if value in (float('inf'), float('-inf')):
+        return '+Inf' if value > 0 else '-Inf'
+    return str(int(value)) if float(value).is_integer() and abs(value) < 1e15 else repr(float(value))
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _escape_help(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n')
+
+
+# Métricas do processo (usadas por ZoneService, PDFService e pela aplicação)
+METRICS = MetricsRegistry()
@@ -0,0 +1,323 @@
+"""
+Séries Históricas de Observações por Zona (armazenamento colunar)
+Sistema Clima Vida - NASA Space Apps Hackathon
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+# Medidas observadas e casas decimais nas respostas
+OBSERVATION_MEASURES = {'temperatura': 1, 'ndvi': 2}
+
+# Colunas do CSV de observações
+OBSERVATION_COLUMNS = ('id', 'data') + tuple(OBSERVATION_MEASURES)
+
+# Dias desde 1970-01-01 (unidade das datas no armazenamento)
+EPOCH = np.datetime64('1970-01-01', 'D')
+
+
+def parse_day(value: Any) -> int:
+    """
+    Converte uma data ISO (AAAA-MM-DD) em dias desde 1970-01-01
+
+    Raises:
+        ValueError: se a data for inválida
+    """
+    try:
+        return int((np.datetime64(str(value), 'D') - EPOCH).astype(np.int64))
+    except (TypeError, ValueError):
+        raise ValueError(f'Data inválida: {value} (use AAAA-MM-DD)')
+
+
+def format_days(days: np.ndarray) -> List[str]:
+    """Dias desde 1970-01-01 -> datas ISO"""
+    return np.datetime_as_string(EPOCH + np.asarray(days, dtype=np.int64), unit='D').tolist()
+
+
+def _months(days: np.ndarray) -> np.ndarray:
+    """Mês do ano (0-11) de cada dia"""
+    return (EPOCH + np.asarray(days, dtype=np.int64)).astype('datetime64[M]').astype(np.int64) % 12
+
+
+def _rounded_list(values: np.ndarray, decimals: int) -> List[Optional[float]]:
+    """Valores arredondados; None no lugar de NaN (JSON não aceita NaN)"""
+    values = np.round(np.asarray(values, dtype=np.float64), decimals)
+    return [None if value != value else value for value in values.tolist()]
+
+
+class ObservationStore:
+    """
+    Observações datadas (temperatura, NDVI) de todas as zonas de uma cidade
+
+    As observações ficam em colunas numpy compactas ordenadas por (zona, data):
+    datas em dias (int32) e medidas em float32, cerca de 12 bytes por
+    observação. A zona de cada linha não é guardada: as zonas ocupam trechos
+    contíguos, descritos pelos ids distintos e pelo início de cada trecho
+    (como numa matriz CSR). Assim, o histórico de uma zona num período sai
+    de três buscas binárias, sem varrer a tabela.
+
+    A média diária da cidade é pré-calculada (um valor por dia), de modo que
+    tendências de séries de vários anos ficam em poucos milhares de pontos.
+    """
+
+    def __init__(self, zone_ids: np.ndarray, starts: np.ndarray, days: np.ndarray,
+                 measures: Dict[str, np.ndarray]):
+        """
+        Inicializa a partir de colunas já ordenadas (use from_frame para dados brutos)
+
+        Args:
+            zone_ids: Ids distintos das zonas, em ordem crescente
+            starts: Início do trecho de cada zona (tamanho len(zone_ids) + 1)
+            days: Data de cada observação, em dias desde 1970-01-01
+            measures: Valores de cada medida de OBSERVATION_MEASURES
+        """
+        self.zone_ids = np.asarray(zone_ids, dtype=np.int64)
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.days = np.asarray(days, dtype=np.int32)
+        self.measures = {name: np.asarray(measures[name], dtype=np.float32) for name in OBSERVATION_MEASURES}
+
+        # Média diária da cidade: soma e quantidade de observações válidas por dia
+        self.first_day = int(self.days.min()) if len(self.days) else 0
+        self.last_day = int(self.days.max()) if len(self.days) else 0
+        offsets = self.days - self.first_day
+        self._city_daily = {}
+        for name, values in self.measures.items():
+            valid = ~np.isnan(values)
+            self._city_daily[name] = (
+                np.bincount(offsets[valid], weights=values[valid]),
+                np.bincount(offsets[valid]).astype(np.float64)
+            )
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> 'ObservationStore':
+        """
+        Monta o armazenamento a partir de observações em qualquer ordem
+
+        Linhas sem id ou data válidos são descartadas; se a mesma zona tiver
+        mais de uma observação no mesmo dia, vale a última.
+
+        Args:
+            frame: DataFrame com as colunas 'id', 'data' (AAAA-MM-DD) e as medidas
+
+        Returns:
+            Armazenamento ordenado por (zona, data)
+        """
+        missing = [column for column in OBSERVATION_COLUMNS if column not in frame.columns]
+        if missing:
+            raise ValueError(f"Colunas ausentes nas observações: {', '.join(missing)}")
+
+        zone_ids = pd.to_numeric(frame['id'], errors='coerce').to_numpy(dtype=np.float64)
+
+        # Séries diárias repetem poucas datas distintas: cada uma é convertida uma vez só
+        codes, dates = pd.factorize(frame['data'])
+        dates = pd.to_datetime(pd.Series(dates, dtype=object), errors='coerce', format='ISO8601')
+        unique_days = np.append((dates.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]') - EPOCH)
+                                .astype(np.int64), 0)
+        days = unique_days[codes]
+        valid = ~np.isnan(zone_ids) & (codes >= 0) & np.append(dates.notna().to_numpy(), False)[codes]
+
+        zone_ids = zone_ids[valid].astype(np.int64)
+        days = days[valid]
+        measures = {
+            name: pd.to_numeric(frame[name], errors='coerce').to_numpy(dtype=np.float64)[valid]
+            for name in OBSERVATION_MEASURES
+        }
+        return cls._from_columns(zone_ids, days, measures)
+
+    @classmethod
+    def _from_columns(cls, zone_ids: np.ndarray, days: np.ndarray,
+                      measures: Dict[str, np.ndarray]) -> 'ObservationStore':
+        """Ordena por (zona, data), remove dias repetidos e monta os trechos das zonas"""
+        # Ordenação estável: entre linhas repetidas, a última da entrada fica por último.
+        # Uma chave inteira única (zona, dia) ordena bem mais rápido que lexsort
+        order = np.empty(0, dtype=np.int64)
+        if len(zone_ids):
+            zone_span = int(zone_ids.max()) - int(zone_ids.min()) + 1
+            day_span = int(days.max()) - int(days.min()) + 1
+            if zone_span * day_span < 2 ** 62:
+                keys = (zone_ids - zone_ids.min()) * day_span + (days - days.min())
+                order = np.argsort(keys, kind='stable')
+            else:
+                order = np.lexsort((days, zone_ids))
+        zone_ids, days = zone_ids[order], days[order]
+        last = np.ones(len(order), dtype=bool)
+        last[:-1] = (zone_ids[1:] != zone_ids[:-1]) | (days[1:] != days[:-1])
+        keep = order[last]
+        zone_ids, days = zone_ids[last], days[last]
+
+        unique_ids, starts = np.unique(zone_ids, return_index=True)
+        return cls(
+            zone_ids=unique_ids,
+            starts=np.append(starts, len(zone_ids)),
+            days=days,
+            measures={name: values[keep] for name, values in measures.items()}
+        )
+
+    def merge(self, other: 'ObservationStore') -> 'ObservationStore':
+        """
+        Combina com outras observações; no mesmo dia e zona vale a de other
+
+        Returns:
+            Novo armazenamento (o atual não é alterado)
+        """
+        return self._from_columns(
+            np.concatenate([self._row_zone_ids(), other._row_zone_ids()]),
+            np.concatenate([self.days, other.days]).astype(np.int64),
+            {name: np.concatenate([self.measures[name], other.measures[name]])
+             for name in OBSERVATION_MEASURES}
+        )
+
+    def _row_zone_ids(self) -> np.ndarray:
+        """Id da zona de cada observação (expande os trechos)"""
+        return np.repeat(self.zone_ids, np.diff(self.starts))
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    @property
+    def nbytes(self) -> int:
+        """Memória ocupada pelas colunas e pelas médias diárias da cidade"""
+        total = self.zone_ids.nbytes + self.starts.nbytes + self.days.nbytes
+        total += sum(values.nbytes for values in self.measures.values())
+        total += sum(sums.nbytes + counts.nbytes for sums, counts in self._city_daily.values())
+        return total
+
+    def date_range(self) -> Optional[Tuple[str, str]]:
+        """Primeira e última data observadas"""
+        if not len(self.days):
+            return None
+        first, last = format_days([self.first_day, self.last_day])
+        return first, last
+
+    def _zone_slice(self, zone_id: int) -> Optional[slice]:
+        """Trecho das observações da zona, ou None se ela não tiver observações"""
+        position = int(np.searchsorted(self.zone_ids, zone_id))
+        if position == len(self.zone_ids) or self.zone_ids[position] != zone_id:
+            return None
+        return slice(int(self.starts[position]), int(self.starts[position + 1]))
+
+    def history(self, zone_id: int, start: Optional[int] = None,
+                end: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Observações de uma zona num período
+
+        Args:
+            zone_id: Id da zona
+            start: Primeiro dia incluído (dias desde 1970-01-01); None = desde o início
+            end: Último dia incluído; None = até o fim
+
+        Returns:
+            Lista de {'data', 'temperatura', 'ndvi'} em ordem de data, ou None
+            se a zona não tiver observações
+        """
+        zone = self._zone_slice(zone_id)
+        if zone is None:
+            return None
+
+        days = self.days[zone]
+        first = zone.start + (int(np.searchsorted(days, start, side='left')) if start is not None else 0)
+        last = zone.start + (int(np.searchsorted(days, end, side='right')) if end is not None else len(days))
+        selected = slice(first, max(first, last))
+
+        columns = [format_days(self.days[selected])]
+        columns += [_rounded_list(self.measures[name][selected], decimals)
+                    for name, decimals in OBSERVATION_MEASURES.items()]
+        names = ('data',) + tuple(OBSERVATION_MEASURES)
+        return [dict(zip(names, row)) for row in zip(*columns)]
+
+    def trends(self, measure: str, window: int, zone_id: Optional[int] = None,
+               start: Optional[int] = None, end: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Série diária com média móvel, anomalia sazonal e tendência linear
+
+        A série é a média diária da cidade (ou os valores de uma zona). A
+        anomalia é a diferença para a climatologia do mês (média de todos os
+        dias daquele mês do ano na série inteira); a tendência é a inclinação,
+        por ano, da reta ajustada às anomalias do período. Média móvel e
+        climatologia usam a série completa, então o início do período já tem
+        a janela cheia.
+
+        Args:
+            measure: Medida de OBSERVATION_MEASURES
+            window: Tamanho da média móvel, em dias (janela que termina no dia)
+            zone_id: Zona; None = média da cidade
+            start: Primeiro dia do período (dias desde 1970-01-01); None = início
+            end: Último dia do período; None = fim
+
+        Returns:
+            Dicionário com 'measure', 'window', 'zone', 'climatology' (12 meses),
+            'trend_per_year' e 'series' (dias com observações: data, value,
+            rolling_mean, anomaly e count), ou None se a zona não tiver observações
+
+        Raises:
+            ValueError: se a medida ou a janela forem inválidas
+        """
+        if measure not in OBSERVATION_MEASURES:
+            raise ValueError(f"Medida inválida: {measure} (use {', '.join(OBSERVATION_MEASURES)})")
+        if window < 1:
+            raise ValueError('A janela deve ter ao menos 1 dia')
+        decimals = OBSERVATION_MEASURES[measure]
+
+        if zone_id is None:
+            first_day = self.first_day
+            sums, counts = self._city_daily[measure]
+        else:
+            zone = self._zone_slice(zone_id)
+            if zone is None:
+                return None
+            values = self.measures[measure][zone]
+            valid = ~np.isnan(values)
+            offsets = self.days[zone][valid].astype(np.int64)
+            first_day = int(offsets[0]) if len(offsets) else 0
+            sums = np.bincount(offsets - first_day, weights=values[valid])
+            counts = np.bincount(offsets - first_day).astype(np.float64)
+
+        days = first_day + np.arange(len(sums))
+        observed = counts > 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            daily = sums / counts
+
+            # Média móvel por somas acumuladas: janela [i - window + 1, i]
+            acc_sums = np.concatenate([[0.0], np.cumsum(sums)])
+            acc_counts = np.concatenate([[0.0], np.cumsum(counts)])
+            upper = np.arange(1, len(sums) + 1)
+            lower = np.maximum(upper - window, 0)
+            rolling = (acc_sums[upper] - acc_sums[lower]) / (acc_counts[upper] - acc_counts[lower])
+
+            # Climatologia mensal: média dos valores diários de cada mês do ano
+            months = _months(days)
+            climatology = (np.bincount(months[observed], weights=daily[observed], minlength=12)
+                           / np.bincount(months[observed], minlength=12))
+            anomaly = daily - climatology[months]
+
+        in_range = observed.copy()
+        if start is not None:
+            in_range &= days >= start
+        if end is not None:
+            in_range &= days <= end
+        selected = np.flatnonzero(in_range)
+
+        trend = None
+        if len(selected) > 1 and np.ptp(days[selected]) > 0:
+            slope = np.polyfit(days[selected].astype(np.float64), anomaly[selected], 1)[0]
+            trend = round(float(slope) * 365.25, decimals + 2)
+
+        columns = (
+            format_days(days[selected]),
+            _rounded_list(daily[selected], decimals),
+            _rounded_list(rolling[selected], decimals),
+            _rounded_list(anomaly[selected], decimals),
+            counts[selected].astype(np.int64).tolist()
+        )
+        return {
+            'measure': measure,
+            'window': window,
+            'zone': zone_id,
+            'climatology': _rounded_list(climatology, decimals),
+            'trend_per_year': trend,
+            'series': [
+                {'data': day, 'value': value, 'rolling_mean': mean, 'anomaly': delta, 'count': count}
+                for day, value, mean, delta, count in zip(*columns)
+            ]
+        }
@@ -3,28 +3,165 @@ Serviço de Geração de Relatórios PDF
 Sistema Clima Vida - NASA Space Apps Hackathon
 """
 
-import tempfile
+import io
+import itertools
 import os
+import tempfile
+import time
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, BinaryIO, Iterable, Iterator, Optional, Union
 from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
 from reportlab.lib.units import inch
 from config import Config
+from services.report_cache import ReportCache, report_cache_key
+from services.metrics import METRICS, SIZE_BUCKETS, gauge
+from services.profiling import PhaseTimer, note_phases
 import logging
 
 logger = logging.getLogger(__name__)
 
+PDF_RENDERS = METRICS.counter('pdf_report_renders', 'Relatórios PDF gerados', ('result',))
+PDF_RENDER_SECONDS = METRICS.histogram('pdf_report_render_duration_seconds',
+                                       'Duração da geração dos relatórios PDF')
+PDF_REPORT_PHASE_SECONDS = METRICS.histogram('pdf_report_phase_duration_seconds',
+                                             'Duração de cada fase da geração dos relatórios PDF', ('phase',))
+PDF_REPORT_BYTES = METRICS.histogram('pdf_report_size_bytes', 'Tamanho dos relatórios PDF gerados',
+                                     buckets=SIZE_BUCKETS)
+
+# Incrementar quando o layout do relatório mudar, para invalidar relatórios em cache
+REPORT_LAYOUT_VERSION = 2
+
+# Cabeçalho da tabela de zonas (repetido em cada página) e cor do texto por classificação
+TABLE_HEADER = ['Bairro', 'Região', 'Temp (°C)', 'NDVI', 'Densidade', 'Criticidade', 'Classificação']
+
+# Larguras fixas das colunas (pt, somando a largura útil da página), iguais em todos os blocos
+TABLE_COLUMN_WIDTHS = [107, 62, 60, 36, 63, 64, 76]
+CLASSIFICATION_COLORS = {
+    'Crítica': colors.HexColor('#FF4444'),
+    'Média': colors.HexColor('#FFA500'),
+}
+DEFAULT_CLASSIFICATION_COLOR = colors.HexColor('#44FF44')
+
+
+def report_key(params: Dict[str, Any]) -> str:
+    """
+    Retorna a chave de cache do relatório definido pelos parâmetros (inclui a versão do layout)
+    """
+    return report_cache_key(dict(params, layout=REPORT_LAYOUT_VERSION))
+
+
+def _output_size(output: Union[str, BinaryIO]) -> Optional[int]:
+    """Tamanho (bytes) do PDF gerado, quando é possível medi-lo"""
+    if isinstance(output, str):
+        return os.path.getsize(output)
+    if isinstance(output, io.BytesIO):
+        return output.getbuffer().nbytes
+    return None
+
+
+class FlowableStream:
+    """
+    Sequência de flowables consumida sob demanda pelo ReportLab
+    
+    O DocTemplate.build consome a história pelo início (lê e remove
+    ``flowables[0]`` e devolve partes divididas com inserções no início). Esta
+    classe atende a essas operações mantendo em memória só alguns elementos
+    à frente, de modo que cada tabela é criada quando vai ser desenhada e
+    descartada logo depois.
+    
+    Esse uso da história não é API pública do ReportLab: a versão fica fixa
+    em requirements.txt e test_pdf_report.py confere que um relatório de
+    várias páginas sai igual ao gerado com uma lista comum.
+    """
+    
+    def __init__(self, flowables: Iterable, lookahead: int = 2):
+        """
+        Args:
+            flowables: Iterável (normalmente um gerador) com os elementos do documento
+            lookahead: Elementos mantidos à frente (para keepWithNext)
+        """
+        self._source = iter(flowables)
+        self._buffer: List = []
+        self._lookahead = lookahead
+    
+    def _fill(self, count: int) -> None:
+        """Garante até count elementos no buffer, enquanto houver origem"""
+        while len(self._buffer) < count and self._source is not None:
+            try:
+                self._buffer.append(next(self._source))
+            except StopIteration:
+                self._source = None
+    
+    def __len__(self) -> int:
+        self._fill(self._lookahead)
+        return len(self._buffer)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            self._fill(index.stop if index.stop is not None and index.stop >= 0 else float('inf'))
+        else:
+            self._fill(index + 1 if index >= 0 else float('inf'))
+        return self._buffer[index]
+    
+    def __setitem__(self, index, value) -> None:
+        self._buffer[index] = value
+    
+    def __delitem__(self, index) -> None:
+        self._fill(self._lookahead)
+        del self._buffer[index]
+    
+    def insert(self, index: int, value) -> None:
+        self._buffer.insert(index, value)
+
+
 class PDFService:
     """
     Serviço responsável pela geração de relatórios PDF
     """
     
-    def __init__(self):
+    def __init__(self, cache: Optional[ReportCache] = None):
+        """
+        Inicializa o serviço
+        
+        Args:
+            cache: Cache em disco dos relatórios prontos (opcional)
+        """
         self.styles = getSampleStyleSheet()
         self._setup_custom_styles()
+        self.cache = cache
+        # Fases (s) da última geração deste serviço (lidas pela fila de relatórios)
+        self.last_phases: Dict[str, float] = {}
+        if cache is not None:
+            METRICS.register_collector('report_cache', self._collect_cache_metrics)
+    
+    def _collect_cache_metrics(self):
+        """Acertos e falhas do cache de relatórios (para /metrics)"""
+        return [
+            gauge('report_cache_hits', 'Relatórios servidos do cache', [({}, self.cache.hits)]),
+            gauge('report_cache_misses', 'Relatórios que precisaram ser gerados', [({}, self.cache.misses)]),
+            gauge('report_cache_hit_ratio', 'Taxa de acerto do cache de relatórios',
+                  [({}, self.cache.hit_ratio() if self.cache.hits + self.cache.misses else None)])
+        ]
+    
+    @staticmethod
+    def record_render(seconds: float, size_bytes: Optional[int] = None, ok: bool = True,
+                      phases: Optional[Dict[str, float]] = None) -> None:
+        """
+        Registra uma geração de relatório nas métricas do processo
+        
+        Chamado pela própria geração e pela fila de relatórios, que recebe a
+        duração e as fases medidas nos processos de renderização.
+        """
+        PDF_RENDERS.inc('ok' if ok else 'error')
+        if ok:
+            PDF_RENDER_SECONDS.observe(seconds)
+            if size_bytes is not None:
+                PDF_REPORT_BYTES.observe(size_bytes)
+            for phase, phase_seconds in (phases or {}).items():
+                PDF_REPORT_PHASE_SECONDS.observe(phase_seconds, phase)
     
     def _setup_custom_styles(self):
         """
@@ -58,26 +195,44 @@ class PDFService:
             alignment=1
         ))
     
-    def generate_heat_island_report(self, zones_data: List[Dict[str, Any]], 
-                                  statistics: Dict[str, Any]) -> str:
+    def generate_heat_island_report(self, zones_data: Iterable[Dict[str, Any]], 
+                                  statistics: Dict[str, Any],
+                                  output: Union[str, BinaryIO, None] = None,
+                                  in_memory: bool = False) -> Union[str, BinaryIO]:
         """
         Gera relatório completo de ilhas de calor urbano
         
+        A história do documento é gerada sob demanda: as zonas são lidas do
+        iterável aos poucos e viram tabelas de uma página, desenhadas e
+        descartadas em sequência. A memória usada não cresce com o número de
+        zonas (além do próprio PDF) e o tempo é linear.
+        
         Args:
-            zones_data: Lista com dados das zonas
+            zones_data: Dados das zonas, ordenados (lista ou iterador)
             statistics: Estatísticas gerais
+            output: Caminho ou arquivo binário de destino; se omitido, cria um
+                arquivo temporário que deve ser removido por quem chamou
+            in_memory: Sem output, gera o PDF em memória (io.BytesIO posicionado
+                no início) em vez do arquivo temporário
             
         Returns:
-            Caminho para o arquivo PDF gerado
+            Destino do PDF gerado (o caminho do arquivo temporário, se output for omitido)
         """
+        start = time.perf_counter()
+        temp_path = None
         try:
-            # Cria arquivo temporário
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
-            temp_file.close()
+            in_memory = output is None and in_memory
+            if in_memory:
+                output = io.BytesIO()
+            elif output is None:
+                # Cria arquivo temporário
+                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
+                temp_file.close()
+                output = temp_path = temp_file.name
             
             # Cria o documento PDF
             doc = SimpleDocTemplate(
-                temp_file.name, 
+                output, 
                 pagesize=letter,
                 rightMargin=72,
                 leftMargin=72,
@@ -85,49 +240,58 @@ class PDFService:
                 bottomMargin=18
             )
             
-            # Constrói o conteúdo
-            story = self._build_report_content(zones_data, statistics)
-            
-            # Gera o PDF
-            doc.build(story)
+            # Constrói o conteúdo sob demanda e gera o PDF; o tempo fora das
+            # seções do conteúdo é a diagramação e o desenho das páginas
+            timer = PhaseTimer()
+            build_start = time.perf_counter()
+            doc.build(FlowableStream(self._build_report_content(zones_data, statistics, timer)))
+            timer.add('layout', time.perf_counter() - build_start - sum(timer.phases.values()))
             
-            logger.info(f"Relatório PDF gerado: {temp_file.name}")
-            return temp_file.name
+            if in_memory:
+                output.seek(0)
+            self.last_phases = timer.phases
+            note_phases('pdf_report', timer.phases)
+            self.record_render(time.perf_counter() - start, _output_size(output), phases=timer.phases)
+            logger.info(f"Relatório PDF gerado: {output if isinstance(output, str) else 'em memória'}")
+            return output
             
         except Exception as e:
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
+            self.record_render(time.perf_counter() - start, ok=False)
             logger.error(f"Erro ao gerar relatório PDF: {e}")
             raise
     
-    def _build_report_content(self, zones_data: List[Dict[str, Any]], 
-                            statistics: Dict[str, Any]) -> List:
+    def _build_report_content(self, zones_data: Iterable[Dict[str, Any]], 
+                            statistics: Dict[str, Any],
+                            timer: Optional[PhaseTimer] = None) -> Iterator:
         """
         Constrói o conteúdo do relatório
         
         Args:
             zones_data: Dados das zonas
             statistics: Estatísticas
+            timer: Acumula o tempo gasto em cada seção (sem o desenho das páginas)
             
-        Returns:
-            Lista de elementos para o PDF
+        Yields:
+            Elementos para o PDF, na ordem do documento
         """
-        story = []
+        timer = timer or PhaseTimer()
         
         # Cabeçalho
-        story.extend(self._build_header())
+        yield from timer.timed('header', self._build_header())
         
         # Resumo executivo
-        story.extend(self._build_executive_summary(statistics))
+        yield from timer.timed('summary', self._build_executive_summary(statistics))
         
-        # Tabela de dados
-        story.extend(self._build_data_table(zones_data))
+        # Tabela de dados (inclui a leitura das zonas)
+        yield from timer.timed('table', self._build_data_table(zones_data))
         
         # Análise e recomendações
-        story.extend(self._build_analysis_section(statistics))
+        yield from timer.timed('analysis', self._build_analysis_section(statistics))
         
         # Ações prioritárias
-        story.extend(self._build_action_plan())
-        
-        return story
+        yield from timer.timed('action_plan', self._build_action_plan())
     
     def _build_header(self) -> List:
         """
@@ -165,17 +329,32 @@ class PDFService:
             Spacer(1, 20)
         ]
     
-    def _build_data_table(self, zones_data: List[Dict[str, Any]]) -> List:
+    def _build_data_table(self, zones_data: Iterable[Dict[str, Any]]) -> Iterator:
         """
         Constrói a tabela de dados das zonas
+        
+        A tabela é dividida em blocos de Config.PDF_TABLE_ROWS_PER_PAGE linhas,
+        cada um uma Table com o cabeçalho repetido; os blocos só são criados
+        quando o documento chega até eles.
         """
-        # Cabeçalho da tabela
-        table_data = [
-            ['Bairro', 'Região', 'Temp (°C)', 'NDVI', 'Densidade', 'Criticidade', 'Classificação']
-        ]
+        yield Paragraph("Dados Detalhados das Zonas", self.styles['CustomHeading2'])
+        yield Spacer(1, 12)
+        
+        zones = iter(zones_data)
+        while True:
+            chunk = list(itertools.islice(zones, Config.PDF_TABLE_ROWS_PER_PAGE))
+            if not chunk:
+                break
+            yield self._build_table_chunk(chunk)
         
-        # Dados das zonas
-        for zone in zones_data:
+        yield Spacer(1, 20)
+    
+    def _build_table_chunk(self, zones: List[Dict[str, Any]]) -> Table:
+        """
+        Constrói um bloco da tabela de zonas, com cabeçalho
+        """
+        table_data = [TABLE_HEADER]
+        for zone in zones:
             table_data.append([
                 zone['bairro'],
                 zone['regiao'],
@@ -186,9 +365,7 @@ class PDFService:
                 zone['classificacao']
             ])
         
-        # Cria a tabela
-        table = Table(table_data, repeatRows=1)
-        table.setStyle(TableStyle([
+        style = [
             # Cabeçalho
             ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2E86AB')),
             ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
@@ -202,31 +379,26 @@ class PDFService:
             ('FONTSIZE', (0, 1), (-1, -1), 8),
             ('GRID', (0, 0), (-1, -1), 1, colors.black),
             ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            
-            # Coloração por classificação
-            ('TEXTCOLOR', (6, 1), (6, -1), self._get_classification_color),
-        ]))
-        
-        return [
-            Paragraph("Dados Detalhados das Zonas", self.styles['CustomHeading2']),
-            Spacer(1, 12),
-            table,
-            Spacer(1, 20)
         ]
+        
+        # Coloração por classificação: um comando por sequência de linhas
+        # iguais (as zonas vêm ordenadas por criticidade)
+        row = 1
+        for classification, group in itertools.groupby(zone['classificacao'] for zone in zones):
+            count = sum(1 for _ in group)
+            style.append(('TEXTCOLOR', (6, row), (6, row + count - 1),
+                          self._get_classification_color(classification)))
+            row += count
+        
+        table = Table(table_data, colWidths=TABLE_COLUMN_WIDTHS, repeatRows=1)
+        table.setStyle(TableStyle(style))
+        return table
     
-    def _get_classification_color(self, table, row, col):
+    def _get_classification_color(self, classification: str):
         """
         Retorna cor baseada na classificação da zona
         """
-        if row > 0:  # Pula o cabeçalho
-            classification = table._cellvalues[row][6]  # Coluna de classificação
-            if classification == 'Crítica':
-                return colors.HexColor('#FF4444')
-            elif classification == 'Média':
-                return colors.HexColor('#FFA500')
-            else:
-                return colors.HexColor('#44FF44')
-        return colors.black
+        return CLASSIFICATION_COLORS.get(classification, DEFAULT_CLASSIFICATION_COLOR)
     
     def _build_analysis_section(self, statistics: Dict[str, Any]) -> List:
         """
@@ -0,0 +1,252 @@
+"""
+Perfilamento Sob Demanda de Requisições e Medição de Fases
+Sistema Clima Vida - NASA Space Apps Hackathon
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Nomes dos perfis gravados (sem separadores de diretório)
+PROFILE_NAME_PATTERN = re.compile(r'[0-9]{8}T[0-9]{6}-[0-9]{6}-[A-Za-z0-9_.-]+')
+PROFILE_SUFFIX = '.prof'
+META_SUFFIX = '.json'
+
+# Fases registradas pela requisição perfilada na thread atual
+_active = threading.local()
+
+
+class PhaseTimer:
+    """
+    Acumula a duração (s) de fases nomeadas de uma operação
+
+    As fases ficam na ordem em que foram medidas pela primeira vez; medir
+    a mesma fase de novo soma à duração anterior.
+    """
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        """Soma seconds à fase"""
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Mede o bloco como parte da fase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def timed(self, name: str, iterable: Iterable) -> Iterator:
+        """
+        Repassa os itens de um iterável medindo só o tempo gasto para produzi-los
+
+        O tempo de quem consome os itens (ex.: o desenho das páginas do PDF)
+        entre um item e o seguinte não entra na fase.
+        """
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add(name, time.perf_counter() - start)
+                return
+            self.add(name, time.perf_counter() - start)
+            yield item
+
+
+def note_phases(component: str, phases: Dict[str, float]) -> None:
+    """
+    Anexa as fases medidas ao perfil da requisição em andamento na thread, se houver
+
+    Args:
+        component: Origem das fases (ex.: 'zone_load', 'pdf_report')
+        phases: Duração (s) de cada fase
+    """
+    collected = getattr(_active, 'phases', None)
+    if collected is not None:
+        collected.append({'component': component, 'phases': {name: round(seconds, 6) for name, seconds in phases.items()}})
+
+
+class ActiveProfile:
+    """Perfil em andamento de uma requisição"""
+
+    def __init__(self, requested: bool):
+        self.requested = requested
+        self.profile = cProfile.Profile()
+        self.started = time.perf_counter()
+        self.phases: List[Dict[str, Any]] = []
+
+
+class RequestProfiler:
+    """
+    Perfila requisições com cProfile e guarda os resultados num diretório com rotação
+
+    Uma requisição é perfilada quando pedida explicitamente (cabeçalho de
+    administrador) ou sorteada pela taxa de amostragem. Perfis sorteados só
+    são gravados se a requisição passar da duração mínima; cada perfil é um
+    arquivo .prof (pstats) mais um .json com rota, status, duração e as
+    fases medidas por PhaseTimer durante a requisição. Além de max_files
+    perfis, os mais antigos são apagados.
+
+    O cProfile mede só a thread da requisição.
+    """
+
+    def __init__(self, directory: str, max_files: int, sample_rate: float = 0.0,
+                 min_duration_ms: float = 0.0):
+        """
+        Inicializa o perfilador
+
+        Args:
+            directory: Diretório dos perfis
+            max_files: Quantidade máxima de perfis guardados
+            sample_rate: Fração das requisições perfiladas sem pedido (0 = nenhuma)
+            min_duration_ms: Duração mínima para gravar um perfil sorteado
+        """
+        self.directory = directory
+        self.max_files = max_files
+        self.sample_rate = sample_rate
+        self.min_duration_ms = min_duration_ms
+        self._lock = threading.Lock()
+
+    def start(self, requested: bool) -> Optional[ActiveProfile]:
+        """
+        Começa a perfilar a requisição atual, se pedida ou sorteada
+
+        Returns:
+            Perfil em andamento, ou None se a requisição não for perfilada
+        """
+        if not requested and not (self.sample_rate and random.random() < self.sample_rate):
+            return None
+
+        active = ActiveProfile(requested)
+        try:
+            active.profile.enable()
+        except ValueError:
+            # Outro perfilador já ativo no processo
+            return None
+        _active.phases = active.phases
+        return active
+
+    def stop(self, active: ActiveProfile) -> float:
+        """Para o perfil (pode ser chamado mais de uma vez); retorna a duração (s)"""
+        active.profile.disable()
+        _active.phases = None
+        return time.perf_counter() - active.started
+
+    def finish(self, active: ActiveProfile, method: str, path: str, route: str,
+               status: int) -> Optional[str]:
+        """
+        Para o perfil e o grava, se for o caso
+
+        Returns:
+            Nome do perfil gravado, ou None se foi descartado
+        """
+        duration_ms = self.stop(active) * 1000.0
+        if not active.requested and duration_ms < self.min_duration_ms:
+            return None
+
+        now = datetime.now()
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', route).strip('_') or 'root'
+        name = f"{now.strftime('%Y%m%dT%H%M%S-%f')}-{method}-{slug}"[:120]
+        meta = {
+            'name': name,
+            'created_at': now.isoformat(timespec='milliseconds'),
+            'method': method,
+            'path': path,
+            'route': route,
+            'status': status,
+            'duration_ms': round(duration_ms, 3),
+            'requested': active.requested,
+            'phases': active.phases
+        }
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            active.profile.dump_stats(os.path.join(self.directory, name + PROFILE_SUFFIX))
+            with open(os.path.join(self.directory, name + META_SUFFIX), 'w', encoding='utf-8') as meta_file:
+                json.dump(meta, meta_file, ensure_ascii=False)
+        except OSError as e:
+            logger.warning(f"Não foi possível gravar o perfil {name}: {e}")
+            return None
+
+        self._rotate()
+        logger.info(f"Perfil gravado: {name} ({duration_ms:.1f} ms)")
+        return name
+
+    def _rotate(self) -> None:
+        """Apaga os perfis mais antigos além do limite"""
+        with self._lock:
+            names = sorted(entry[:-len(PROFILE_SUFFIX)] for entry in os.listdir(self.directory)
+                           if entry.endswith(PROFILE_SUFFIX))
+            for name in names[:max(len(names) - self.max_files, 0)]:
+                for suffix in (PROFILE_SUFFIX, META_SUFFIX):
+                    try:
+                        os.remove(os.path.join(self.directory, name + suffix))
+                    except FileNotFoundError:
+                        pass
+
+    def list(self) -> List[Dict[str, Any]]:
+        """
+        Perfis guardados, do mais recente para o mais antigo
+
+        Returns:
+            Metadados de cada perfil (rota, status, duração, fases) e o tamanho do arquivo
+        """
+        if not os.path.isdir(self.directory):
+            return []
+
+        profiles = []
+        for entry in sorted(os.listdir(self.directory), reverse=True):
+            if not entry.endswith(PROFILE_SUFFIX):
+                continue
+            name = entry[:-len(PROFILE_SUFFIX)]
+            try:
+                size = os.path.getsize(os.path.join(self.directory, entry))
+                with open(os.path.join(self.directory, name + META_SUFFIX), encoding='utf-8') as meta_file:
+                    meta = json.load(meta_file)
+            except (OSError, ValueError):
+                meta, size = {'name': name}, None
+            profiles.append(dict(meta, size_bytes=size))
+        return profiles
+
+    def path_for(self, name: str) -> Optional[str]:
+        """Caminho do arquivo .prof do perfil, ou None se o nome for inválido ou não existir"""
+        if not PROFILE_NAME_PATTERN.fullmatch(name):
+            return None
+        path = os.path.join(self.directory, name + PROFILE_SUFFIX)
+        return path if os.path.exists(path) else None
+
+    def render_text(self, name: str, sort: str = 'cumulative', limit: int = 40) -> Optional[str]:
+        """
+        Resumo em texto (pstats) das funções mais custosas do perfil
+
+        Raises:
+            ValueError: se a ordenação for inválida
+        """
+        path = self.path_for(name)
+        if path is None:
+            return None
+        if sort not in ('cumulative', 'tottime', 'calls'):
+            raise ValueError('sort deve ser cumulative, tottime ou calls')
+
+        output = io.StringIO()
+        stats = pstats.Stats(path, stream=output)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return output.getvalue()
@@ -0,0 +1,500 @@
+"""
+Ingestão de Rasters de Satélite (temperatura de superfície e NDVI)
+Sistema Clima Vida - NASA Space Apps Hackathon
+
+Calcula a temperatura e o NDVI médios de cada zona a partir de grades em
+disco, bloco a bloco, e grava o CSV de zonas lido pelo ZoneService.
+
+Uso:
+    python -m services.raster_ingestion --zones zonas.csv --labels zonas.npy \\
+        --temperature lst.npy --ndvi ndvi.npy --output data/sp_zones_data.csv
+"""
+
+import argparse
+import json
+import os
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from config import Config
+from services.zone_service import RECORD_DEFAULTS, REQUIRED_COLUMNS
+from utils.processes import process_context
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Arquivo de metadados de cada raster: mesmo nome, extensão .json
+SIDECAR_SUFFIX = '.json'
+
+# Colunas obrigatórias da tabela de atributos e colunas do CSV gerado
+ATTRIBUTE_COLUMNS = ('id', 'nome', 'densidade_populacional')
+OUTPUT_COLUMNS = REQUIRED_COLUMNS + ('regiao',)
+
+# Casas decimais gravadas no CSV
+OUTPUT_DECIMALS = {'latitude': 6, 'longitude': 6, 'temperatura': 2, 'ndvi': 4}
+
+# Tamanho mínimo da tabela direta id -> posição (ids esparsos usam busca binária)
+DENSE_LOOKUP_MIN_SIZE = 1 << 20
+
+# Janela de um bloco: (linha inicial, linha final, coluna inicial, coluna final)
+Window = Tuple[int, int, int, int]
+
+# Resultado de um bloco: posições das zonas, somas (uma linha por valor) e contagens
+TileSums = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+@dataclass(frozen=True)
+class Raster:
+    """
+    Grade 2D em disco (.npy ou binário bruto) aberta com mmap, sem carregar na memória
+
+    O arquivo de metadados (JSON) traz a transformação afim e, opcionalmente,
+    'nodata', 'scale' e 'offset' (valor = bruto × scale + offset, p.ex. para
+    converter Kelvin em °C) e, para binários brutos, 'dtype' e 'shape'.
+
+    A transformação segue a convenção (a, b, c, d, e, f):
+    x = a·coluna + b·linha + c e y = d·coluna + e·linha + f, com (coluna, linha)
+    no canto superior esquerdo do pixel e (x, y) = (longitude, latitude) em graus.
+    """
+    path: str
+    transform: Tuple[float, float, float, float, float, float]
+    shape: Tuple[int, int]
+    nodata: Optional[float] = None
+    scale: float = 1.0
+    offset: float = 0.0
+    dtype: Optional[str] = None
+
+    @classmethod
+    def open(cls, path: str, sidecar: Optional[str] = None) -> 'Raster':
+        """
+        Abre um raster e seus metadados
+
+        Args:
+            path: Arquivo .npy (ou binário bruto com 'dtype' e 'shape' nos metadados)
+            sidecar: Arquivo de metadados (padrão: mesmo nome com extensão .json)
+
+        Raises:
+            ValueError: se os metadados forem inválidos ou a grade não for 2D
+        """
+        sidecar = sidecar or os.path.splitext(path)[0] + SIDECAR_SUFFIX
+        with open(sidecar, encoding='utf-8') as sidecar_file:
+            meta = json.load(sidecar_file)
+
+        try:
+            transform = tuple(float(value) for value in meta['transform'])
+            raster = cls(
+                path=path,
+                transform=transform,
+                shape=tuple(int(size) for size in meta.get('shape', ())),
+                nodata=None if meta.get('nodata') is None else float(meta['nodata']),
+                scale=float(meta.get('scale', 1.0)),
+                offset=float(meta.get('offset', 0.0)),
+                dtype=meta.get('dtype')
+            )
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f'Metadados inválidos: {sidecar}')
+
+        if len(transform) != 6 or transform[0] * transform[4] - transform[1] * transform[3] == 0:
+            raise ValueError(f'Transformação afim inválida em {sidecar}')
+
+        array = _open_array(raster)
+        if array.ndim != 2:
+            raise ValueError(f'Raster deve ser 2D: {path}')
+        return replace(raster, shape=array.shape)
+
+    def windows(self, tile_size: int) -> List[Window]:
+        """Divide a grade em blocos de até tile_size × tile_size pixels"""
+        rows, cols = self.shape
+        return [
+            (row, min(row + tile_size, rows), col, min(col + tile_size, cols))
+            for row in range(0, rows, tile_size)
+            for col in range(0, cols, tile_size)
+        ]
+
+    def read_raw(self, window: Window) -> np.ndarray:
+        """Lê os valores brutos de uma janela (só essa parte sai do disco)"""
+        row0, row1, col0, col1 = window
+        return np.asarray(_open_array(self)[row0:row1, col0:col1])
+
+    def read(self, window: Window) -> np.ndarray:
+        """Lê uma janela em float64, com escala aplicada e nodata como NaN"""
+        raw = self.read_raw(window)
+        values = raw.astype(np.float64) * self.scale + self.offset
+        if self.nodata is not None:
+            values[raw == self.nodata] = np.nan
+        return values
+
+    @property
+    def axis_aligned(self) -> bool:
+        """Se a grade não tem rotação (linhas seguem a latitude e colunas a longitude)"""
+        return self.transform[1] == 0 and self.transform[3] == 0
+
+    def pixel_centers(self, window: Window) -> Tuple[np.ndarray, np.ndarray]:
+        """Coordenadas (x, y) do centro de cada pixel da janela"""
+        row0, row1, col0, col1 = window
+        a, b, c, d, e, f = self.transform
+        cols = np.arange(col0, col1, dtype=np.float64)[np.newaxis, :] + 0.5
+        rows = np.arange(row0, row1, dtype=np.float64)[:, np.newaxis] + 0.5
+        return a * cols + b * rows + c, d * cols + e * rows + f
+
+    def pixel_index(self, x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Linha e coluna do pixel que contém cada coordenada (transformação inversa)"""
+        a, b, c, d, e, f = self.transform
+        det = a * e - b * d
+        dx, dy = x - c, y - f
+        cols = np.floor((e * dx - b * dy) / det).astype(np.int64)
+        rows = np.floor((a * dy - d * dx) / det).astype(np.int64)
+        return rows, cols
+
+
+@lru_cache(maxsize=16)
+def _open_array(raster: Raster) -> np.ndarray:
+    """Abre (uma vez por processo) o arquivo do raster como array mapeado em memória"""
+    if raster.path.endswith('.npy'):
+        return np.load(raster.path, mmap_mode='r')
+    if raster.dtype is None or len(raster.shape) != 2:
+        raise ValueError(f'Binário bruto sem dtype/shape nos metadados: {raster.path}')
+    return np.memmap(raster.path, dtype=raster.dtype, mode='r', shape=raster.shape)
+
+
+class ZoneGrid:
+    """
+    Raster de rótulos: cada pixel traz o id da zona a que pertence
+
+    Converte ids em posições na tabela de atributos (tabela direta quando os
+    ids são densos, busca binária nos ids ordenados caso contrário) e localiza
+    a zona dos pixels de outras grades, lendo só a janela de rótulos que
+    cobre cada bloco.
+    """
+
+    def __init__(self, labels: Raster, zone_ids: np.ndarray):
+        """
+        Args:
+            labels: Raster de ids das zonas (nodata ou ids ausentes = fora das zonas)
+            zone_ids: Ids na ordem da tabela de atributos
+        """
+        zone_ids = np.asarray(zone_ids, dtype=np.int64)
+        self.labels = labels
+        self.n_zones = len(zone_ids)
+        self._lookup: Optional[np.ndarray] = None
+        self._first_id = int(zone_ids.min()) if self.n_zones else 0
+
+        span = int(zone_ids.max()) - self._first_id + 1 if self.n_zones else 0
+        if self.n_zones and span <= max(4 * self.n_zones, DENSE_LOOKUP_MIN_SIZE):
+            self._lookup = np.full(span, -1, dtype=np.int64)
+            self._lookup[zone_ids - self._first_id] = np.arange(self.n_zones)
+        else:
+            self._order = np.argsort(zone_ids, kind='stable')
+            self._sorted_ids = zone_ids[self._order]
+
+    def positions(self, labels: np.ndarray) -> np.ndarray:
+        """Posição de cada rótulo na tabela de atributos (-1 = fora das zonas)"""
+        labels = np.asarray(labels)
+        if self.n_zones == 0:
+            return np.full(labels.shape, -1, dtype=np.int64)
+
+        if self._lookup is not None:
+            offsets = labels.astype(np.int64) - self._first_id
+            positions = self._lookup.take(offsets, mode='clip')
+            positions[(offsets < 0) | (offsets >= len(self._lookup))] = -1
+        else:
+            found = np.minimum(np.searchsorted(self._sorted_ids, labels), self.n_zones - 1)
+            positions = np.where(self._sorted_ids[found] == labels, self._order[found], -1)
+
+        if self.labels.nodata is not None:
+            positions[labels == self.labels.nodata] = -1
+        return positions
+
+    def locate(self, values: Raster, window: Window) -> np.ndarray:
+        """Posição da zona sob o centro de cada pixel de uma janela de outra grade (-1 = fora)"""
+        if values.axis_aligned and self.labels.axis_aligned:
+            return self._locate_aligned(values, window)
+
+        x, y = values.pixel_centers(window)
+        rows, cols = self.labels.pixel_index(x, y)
+        height, width = self.labels.shape
+        inside = (rows >= 0) & (rows < height) & (cols >= 0) & (cols < width)
+        positions = np.full(x.shape, -1, dtype=np.int64)
+        if not inside.any():
+            return positions
+
+        rows, cols = rows[inside], cols[inside]
+        row0, col0 = int(rows.min()), int(cols.min())
+        labels = self.labels.read_raw((row0, int(rows.max()) + 1, col0, int(cols.max()) + 1))
+        positions[inside] = self.positions(labels[rows - row0, cols - col0])
+        return positions
+
+    def _locate_aligned(self, values: Raster, window: Window) -> np.ndarray:
+        """
+        Versão de locate para grades sem rotação
+
+        A linha de rótulos depende só da linha do pixel (e a coluna só da
+        coluna), então a conversão de coordenadas é feita em 1D e a janela de
+        rótulos é lida com um produto externo de índices.
+        """
+        row0, row1, col0, col1 = window
+        a, _, c, _, e, f = values.transform
+        label_a, _, label_c, _, label_e, label_f = self.labels.transform
+        x = a * (np.arange(col0, col1) + 0.5) + c
+        y = e * (np.arange(row0, row1) + 0.5) + f
+        cols = np.floor((x - label_c) / label_a).astype(np.int64)
+        rows = np.floor((y - label_f) / label_e).astype(np.int64)
+
+        height, width = self.labels.shape
+        inside_rows = (rows >= 0) & (rows < height)
+        inside_cols = (cols >= 0) & (cols < width)
+        positions = np.full((row1 - row0, col1 - col0), -1, dtype=np.int64)
+        if not inside_rows.any() or not inside_cols.any():
+            return positions
+
+        rows, cols = rows[inside_rows], cols[inside_cols]
+        first_row, first_col = int(rows.min()), int(cols.min())
+        labels = self.labels.read_raw((first_row, int(rows.max()) + 1, first_col, int(cols.max()) + 1))
+        positions[np.ix_(inside_rows, inside_cols)] = self.positions(
+            labels[np.ix_(rows - first_row, cols - first_col)]
+        )
+        return positions
+
+
+def _group_sums(positions: np.ndarray, columns: Sequence[np.ndarray]) -> TileSums:
+    """Soma os valores de cada zona presente no bloco"""
+    if len(positions) == 0:
+        return positions, np.zeros((len(columns), 0)), np.zeros(0, dtype=np.int64)
+
+    first, span = int(positions.min()), int(positions.max() - positions.min()) + 1
+    if span <= 4 * len(positions):
+        # Zonas do bloco em posições próximas (caso comum): contagem direta, sem ordenar
+        offsets = positions - first
+        counts = np.bincount(offsets, minlength=span)
+        present = np.flatnonzero(counts)
+        sums = np.stack([np.bincount(offsets, weights=values, minlength=span)[present] for values in columns])
+        return present + first, sums, counts[present]
+
+    unique, inverse = np.unique(positions, return_inverse=True)
+    sums = np.stack([np.bincount(inverse, weights=values, minlength=len(unique)) for values in columns])
+    return unique, sums, np.bincount(inverse, minlength=len(unique))
+
+
+def _measure_tile(zones: ZoneGrid, values: Raster, window: Window) -> TileSums:
+    """Somas e contagens dos pixels válidos de um bloco de medida, por zona"""
+    data = values.read(window)
+    positions = zones.locate(values, window)
+    valid = (positions >= 0) & ~np.isnan(data)
+    return _group_sums(positions[valid], [data[valid]])
+
+
+def _centroid_tile(zones: ZoneGrid, window: Window) -> TileSums:
+    """Somas das coordenadas dos pixels de cada zona num bloco do raster de rótulos"""
+    positions = zones.positions(zones.labels.read_raw(window))
+    x, y = zones.labels.pixel_centers(window)
+    inside = positions >= 0
+    return _group_sums(positions[inside], [x[inside], y[inside]])
+
+
+# Grade de zonas dos processos da pool (recebida pelo initializer)
+_worker_zones: Optional[ZoneGrid] = None
+
+
+def _init_worker(zones: ZoneGrid) -> None:
+    global _worker_zones
+    _worker_zones = zones
+
+
+def _run_worker_tile(task: Callable[..., TileSums], *args) -> TileSums:
+    """Executa uma tarefa de bloco num processo da pool"""
+    return task(_worker_zones, *args)
+
+
+class RasterIngestion:
+    """
+    Estatísticas zonais blockwise e geração do CSV de zonas
+
+    Cada raster é percorrido em blocos de tamanho fixo lidos por mmap; de
+    cada bloco saem apenas somas e contagens por zona, acumuladas num array
+    por zona. A memória usada depende do tamanho do bloco e da quantidade de
+    zonas, não da resolução da grade. Com mais de um processo, os blocos são
+    distribuídos numa pool com poucos blocos em andamento por vez; se a pool
+    não puder ser criada, os blocos são calculados no próprio processo.
+    """
+
+    def __init__(self, tile_size: int = Config.RASTER_TILE_SIZE, workers: int = Config.RASTER_WORKERS,
+                 start_method: str = Config.RASTER_START_METHOD):
+        """
+        Args:
+            tile_size: Lado dos blocos, em pixels
+            workers: Processos de cálculo (1 = no próprio processo)
+            start_method: Criação dos processos ('fork', 'forkserver', 'spawn';
+                vazio = forkserver ou o padrão da plataforma)
+        """
+        if tile_size < 1:
+            raise ValueError('tile_size deve ser positivo')
+        self.tile_size = tile_size
+        self.workers = max(1, workers)
+        self.start_method = start_method
+
+    def zonal_means(self, values: Raster, zones: ZoneGrid) -> np.ndarray:
+        """
+        Média dos pixels válidos de cada zona (NaN para zonas sem pixels)
+
+        Cada pixel de ``values`` conta para a zona do rótulo sob seu centro,
+        de modo que as duas grades podem ter resoluções e extensões diferentes.
+        """
+        tasks = [(_measure_tile, values, window) for window in values.windows(self.tile_size)]
+        sums, counts = self._accumulate(zones, tasks, n_values=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, sums[0] / counts, np.nan)
+
+    def zone_centroids(self, zones: ZoneGrid) -> Tuple[np.ndarray, np.ndarray]:
+        """Centroide (longitude, latitude) dos pixels de cada zona (NaN para zonas sem pixels)"""
+        tasks = [(_centroid_tile, window) for window in zones.labels.windows(self.tile_size)]
+        sums, counts = self._accumulate(zones, tasks, n_values=2)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.where(counts > 0, sums / counts, np.nan)
+        return means[0], means[1]
+
+    def _accumulate(self, zones: ZoneGrid, tasks: List[tuple], n_values: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Executa as tarefas de bloco e soma os resultados por zona"""
+        sums = np.zeros((n_values, zones.n_zones))
+        counts = np.zeros(zones.n_zones, dtype=np.int64)
+        for positions, tile_sums, tile_counts in self._run_tiles(zones, tasks):
+            # Posições são únicas dentro de cada bloco
+            sums[:, positions] += tile_sums
+            counts[positions] += tile_counts
+        return sums, counts
+
+    def _run_tiles(self, zones: ZoneGrid, tasks: List[tuple]) -> Iterator[TileSums]:
+        """Gera o resultado de cada bloco, no próprio processo ou numa pool limitada"""
+        executor = None
+        if self.workers > 1 and len(tasks) > 1:
+            try:
+                executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=process_context(self.start_method, preload=(__name__,)),
+                    initializer=_init_worker,
+                    initargs=(zones,)
+                )
+            except (OSError, NotImplementedError) as e:
+                logger.warning(f"Pool de processos indisponível ({e}); calculando os blocos no próprio processo")
+
+        if executor is None:
+            for task, *args in tasks:
+                yield task(zones, *args)
+            return
+
+        with executor:
+            pending = set()
+            for task, *args in tasks:
+                if len(pending) >= 2 * self.workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+                pending.add(executor.submit(_run_worker_tile, task, *args))
+            for future in pending:
+                yield future.result()
+
+    def build_zones(self, attributes: pd.DataFrame, labels: Raster,
+                    temperature: Raster, ndvi: Raster) -> pd.DataFrame:
+        """
+        Monta a tabela de zonas no esquema do CSV lido pelo ZoneService
+
+        Args:
+            attributes: Atributos das zonas ('id', 'nome', 'densidade_populacional'
+                e, opcionalmente, 'regiao', 'latitude' e 'longitude')
+            labels: Raster com o id da zona de cada pixel
+            temperature: Raster de temperatura de superfície (°C após a escala)
+            ndvi: Raster de NDVI
+
+        Returns:
+            DataFrame com as colunas de OUTPUT_COLUMNS
+
+        Raises:
+            ValueError: se faltarem colunas ou houver ids repetidos
+        """
+        missing = [column for column in ATTRIBUTE_COLUMNS if column not in attributes.columns]
+        if missing:
+            raise ValueError(f"Colunas obrigatórias ausentes: {missing}")
+        if not attributes['id'].is_unique:
+            raise ValueError('Ids de zona repetidos na tabela de atributos')
+
+        zones = attributes.reset_index(drop=True)
+        grid = ZoneGrid(labels, zones['id'].to_numpy(dtype=np.int64))
+        zones['temperatura'] = self.zonal_means(temperature, grid)
+        zones['ndvi'] = self.zonal_means(ndvi, grid)
+
+        # Coordenadas ausentes: centroide dos pixels da zona
+        coordinates = zones.reindex(columns=['latitude', 'longitude']).astype(np.float64)
+        if coordinates.isna().to_numpy().any():
+            longitude, latitude = self.zone_centroids(grid)
+            zones['latitude'] = coordinates['latitude'].fillna(pd.Series(latitude, index=zones.index))
+            zones['longitude'] = coordinates['longitude'].fillna(pd.Series(longitude, index=zones.index))
+
+        if 'regiao' not in zones.columns:
+            zones['regiao'] = RECORD_DEFAULTS['regiao']
+        zones['regiao'] = zones['regiao'].fillna(RECORD_DEFAULTS['regiao'])
+
+        empty = int(zones[['temperatura', 'ndvi']].isna().any(axis=1).sum())
+        if empty:
+            logger.warning(f"{empty} zonas sem pixels válidos de temperatura ou NDVI")
+
+        return zones[list(OUTPUT_COLUMNS)].round(OUTPUT_DECIMALS)
+
+    def run(self, zones_csv: str, labels: Raster, temperature: Raster, ndvi: Raster, output: str) -> pd.DataFrame:
+        """
+        Calcula as estatísticas zonais e grava o CSV de zonas
+
+        O arquivo é gravado num temporário e renomeado ao final, de modo que
+        o ZoneService (ou o observador de arquivos) nunca lê um CSV pela metade.
+
+        Returns:
+            Tabela de zonas gravada
+        """
+        zones = self.build_zones(pd.read_csv(zones_csv), labels, temperature, ndvi)
+
+        directory = os.path.dirname(os.path.abspath(output))
+        fd, partial = tempfile.mkstemp(prefix='.partial-', suffix='.csv', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as output_file:
+                zones.to_csv(output_file, index=False)
+            os.replace(partial, output)
+        except BaseException:
+            try:
+                os.remove(partial)
+            except OSError:
+                pass
+            raise
+
+        logger.info(f"CSV de zonas gravado: {output} ({len(zones)} zonas)")
+        return zones
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Gera o CSV de zonas a partir de rasters de temperatura e NDVI')
+    parser.add_argument('--zones', required=True, help='CSV de atributos das zonas (id, nome, densidade_populacional...)')
+    parser.add_argument('--labels', required=True, help='Raster com o id da zona de cada pixel')
+    parser.add_argument('--temperature', required=True, help='Raster de temperatura de superfície')
+    parser.add_argument('--ndvi', required=True, help='Raster de NDVI')
+    parser.add_argument('--output', required=True, help='CSV de zonas gerado')
+    parser.add_argument('--tile-size', type=int, default=Config.RASTER_TILE_SIZE)
+    parser.add_argument('--workers', type=int, default=Config.RASTER_WORKERS)
+    parser.add_argument('--start-method', default=Config.RASTER_START_METHOD,
+                        choices=['', 'fork', 'forkserver', 'spawn'],
+                        help='Criação dos processos (vazio = forkserver ou o padrão da plataforma)')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    ingestion = RasterIngestion(tile_size=args.tile_size, workers=args.workers, start_method=args.start_method)
+    ingestion.run(
+        args.zones,
+        labels=Raster.open(args.labels),
+        temperature=Raster.open(args.temperature),
+        ndvi=Raster.open(args.ndvi),
+        output=args.output
+    )
+
+
+if __name__ == '__main__':
+    main()
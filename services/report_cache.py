@@ -0,0 +1,179 @@
+"""
+Cache em Disco dos Relatórios PDF
+Sistema Clima Vida - NASA Space Apps Hackathon
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Extensão dos relatórios prontos e prefixo dos arquivos ainda em escrita
+REPORT_SUFFIX = '.pdf'
+PARTIAL_PREFIX = '.partial-'
+
+
+def report_cache_key(params: Dict[str, Any]) -> str:
+    """
+    Calcula a chave de um relatório a partir dos parâmetros que definem seu conteúdo
+
+    Args:
+        params: Parâmetros do relatório (cidade, versão dos dados, layout...)
+
+    Returns:
+        Chave hexadecimal
+    """
+    encoded = json.dumps(params, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+class ReportCache:
+    """
+    Armazena relatórios prontos em disco, com limite de quantidade e tamanho
+
+    O mtime de cada arquivo funciona como relógio LRU (atualizado a cada
+    acerto), de modo que vários processos podem compartilhar o diretório.
+    Os relatórios são escritos num arquivo parcial e renomeados ao final;
+    parciais abandonados (ex.: processo encerrado no meio da geração) são
+    removidos como órfãos.
+    """
+
+    def __init__(self, directory: str, max_entries: int, max_bytes: int, orphan_max_age: float):
+        """
+        Inicializa o cache
+
+        Args:
+            directory: Diretório dos relatórios
+            max_entries: Quantidade máxima de relatórios guardados
+            max_bytes: Tamanho total máximo (bytes)
+            orphan_max_age: Idade (s) a partir da qual um arquivo parcial é considerado órfão
+        """
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.orphan_max_age = orphan_max_age
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(self.directory, exist_ok=True)
+        self.cleanup_orphans()
+
+    def path_for(self, key: str) -> str:
+        """Retorna o caminho do relatório de uma chave"""
+        return os.path.join(self.directory, key + REPORT_SUFFIX)
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Retorna o caminho do relatório, se estiver em cache, e o marca como usado
+
+        Args:
+            key: Chave do relatório
+
+        Returns:
+            Caminho do arquivo ou None
+        """
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def record_lookup(self, hit: bool) -> None:
+        """Contabiliza acertos e falhas do cache"""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def new_partial(self) -> str:
+        """
+        Cria um arquivo parcial vazio no diretório do cache
+
+        O arquivo pode ser escrito por outro processo e depois publicado com commit.
+        """
+        fd, partial = tempfile.mkstemp(prefix=PARTIAL_PREFIX, suffix=REPORT_SUFFIX, dir=self.directory)
+        os.close(fd)
+        return partial
+
+    def commit(self, key: str, partial: str) -> str:
+        """
+        Publica um arquivo parcial como o relatório da chave e aplica os limites
+
+        Returns:
+            Caminho do relatório publicado
+        """
+        path = self.path_for(key)
+        os.replace(partial, path)
+        self._evict(keep=path)
+        self.cleanup_orphans()
+        return path
+
+    def discard(self, partial: str) -> None:
+        """Remove um arquivo parcial que não será publicado"""
+        try:
+            os.remove(partial)
+        except OSError:
+            pass
+
+    def _evict(self, keep: str) -> None:
+        """Remove os relatórios menos usados até respeitar os limites de quantidade e tamanho"""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(REPORT_SUFFIX) and not entry.name.startswith(PARTIAL_PREFIX):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        entries.sort()
+        count = len(entries)
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                logger.info(f"Relatório removido do cache: {os.path.basename(path)}")
+            except FileNotFoundError:
+                pass
+            count -= 1
+            total -= size
+
+    def cleanup_orphans(self) -> int:
+        """
+        Remove arquivos auxiliares abandonados (parciais e marcadores ocultos)
+
+        Returns:
+            Quantidade de arquivos removidos
+        """
+        removed = 0
+        limit = time.time() - self.orphan_max_age
+        for entry in os.scandir(self.directory):
+            if not entry.name.startswith('.'):
+                continue
+            try:
+                if entry.stat().st_mtime < limit:
+                    os.remove(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        if removed:
+            logger.info(f"{removed} arquivos órfãos removidos do cache de relatórios")
+        return removed
+
+    def hit_ratio(self) -> float:
+        """Proporção de acertos desde o início do processo"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
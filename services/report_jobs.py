@@ -0,0 +1,340 @@
+"""
+Fila Assíncrona de Geração de Relatórios PDF
+Sistema Clima Vida - NASA Space Apps Hackathon
+"""
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+import pandas as pd
+from services.pdf_service import PDFService, report_key
+from services.report_cache import ReportCache
+from services.zone_service import iter_report_records
+from utils.processes import process_context
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Estados de um job
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+# Formato dos ids de job (chaves do cache de relatórios)
+JOB_ID_PATTERN = re.compile(r'[0-9a-f]{32}')
+
+# Marcadores (ocultos) no diretório do cache, visíveis para todos os processos
+PENDING_MARKER = '.job-{key}.pending'
+FAILED_MARKER = '.job-{key}.failed'
+
+# PDFService de cada processo da pool (criado na primeira renderização)
+_worker_pdf_service: Optional[PDFService] = None
+
+
+def _render_report(partial: str, report: pd.DataFrame,
+                   statistics: Dict[str, Any]) -> Tuple[float, Dict[str, float]]:
+    """
+    Renderiza o relatório num arquivo parcial (executado nos processos da pool)
+
+    O processo recebe as colunas do relatório (compactas para enviar entre
+    processos) e converte as zonas em registros aos poucos, durante a geração.
+
+    Returns:
+        Duração da geração (s) e de cada fase, registradas nas métricas pelo processo da API
+    """
+    global _worker_pdf_service
+    if _worker_pdf_service is None:
+        _worker_pdf_service = PDFService()
+    start = time.perf_counter()
+    _worker_pdf_service.generate_heat_island_report(iter_report_records(report), statistics, partial)
+    return time.perf_counter() - start, _worker_pdf_service.last_phases
+
+
+def _warm_up() -> int:
+    """Tarefa vazia usada para criar os processos da pool antecipadamente"""
+    return os.getpid()
+
+
+@dataclass
+class ReportJob:
+    """Job de geração de relatório; o id é a chave do relatório no cache"""
+    id: str
+    city: str
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    future: Optional[Future] = field(default=None, repr=False)
+    finished: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def status(self) -> str:
+        """Estado atual do job"""
+        if self.finished.is_set():
+            return FAILED if self.error else DONE
+        if self.future is not None and self.future.running():
+            return RUNNING
+        return QUEUED
+
+    def mark_finished(self, error: Optional[str] = None) -> None:
+        """Registra a conclusão do job"""
+        self.error = error
+        self.finished_at = time.time()
+        self.finished.set()
+
+
+class ReportJobQueue:
+    """
+    Gera relatórios PDF numa ProcessPoolExecutor limitada
+
+    A renderização com ReportLab roda em outros processos, sem disputar o
+    GIL com as threads que atendem a API. O id do job é a chave do relatório
+    no ReportCache: pedidos repetidos reaproveitam o job em andamento ou o
+    arquivo pronto, e o estado de jobs concluídos (ou com falha) é visível
+    para todos os processos que compartilham o diretório do cache.
+
+    A pool só é criada no primeiro relatório gerado (ou em start), com o
+    contexto de utils.processes.process_context: importar a aplicação não
+    cria processos, e os processos nunca são um fork do servidor com threads
+    (exceto se start_method='fork' for configurado).
+    """
+
+    def __init__(self, cache: ReportCache, max_workers: int, max_pending: int, max_jobs: int = 256,
+                 start_method: str = ''):
+        """
+        Inicializa a fila
+
+        Args:
+            cache: Cache onde os relatórios prontos são publicados
+            max_workers: Processos de renderização
+            max_pending: Limite de jobs aguardando ou em execução
+            max_jobs: Jobs concluídos mantidos em memória para consulta
+            start_method: Método de criação dos processos ('' = forkserver ou o padrão da plataforma)
+        """
+        self.cache = cache
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, ReportJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.start_method = start_method
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self) -> None:
+        """
+        Cria os processos da pool antecipadamente (opcional)
+
+        Sem esta chamada, a pool é criada no primeiro relatório gerado.
+        """
+        with self._lock:
+            executor = self._get_executor()
+        executor.submit(_warm_up).result()
+        logger.info(f"Fila de relatórios ativa com {self.max_workers} processos")
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Retorna a pool, criando-a se necessário (chamado com o lock)"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=process_context(self.start_method, preload=(__name__,))
+            )
+        return self._executor
+
+    def submit(self, city: str, params: Dict[str, Any],
+               load_data: Callable[[], Tuple[pd.DataFrame, Dict[str, Any]]]) -> ReportJob:
+        """
+        Enfileira a geração de um relatório (ou reaproveita o existente)
+
+        Args:
+            city: Cidade do relatório
+            params: Parâmetros que definem o conteúdo (versão dos dados etc.)
+            load_data: Função que retorna (ZoneService.get_report_frame(), statistics);
+                só é chamada se for preciso gerar
+
+        Returns:
+            Job do relatório
+
+        Raises:
+            OverflowError: se a fila estiver cheia
+        """
+        key = report_key(dict(params, city=city))
+
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.status in (QUEUED, RUNNING):
+                return job
+
+            if self.cache.get(key) is not None:
+                self.cache.record_lookup(hit=True)
+                job = ReportJob(id=key, city=city)
+                job.mark_finished()
+                self._remember(job)
+                return job
+
+            pending = sum(1 for item in self._jobs.values() if item.status in (QUEUED, RUNNING))
+            if pending >= self.max_pending:
+                raise OverflowError('Fila de relatórios cheia')
+
+            self.cache.record_lookup(hit=False)
+            self._remove_marker(FAILED_MARKER, key)
+            self._write_marker(PENDING_MARKER, key)
+
+            job = ReportJob(id=key, city=city)
+            self._remember(job)
+
+        partial = self.cache.new_partial()
+        try:
+            report, statistics = load_data()
+            job.future = self._submit_render(partial, report, statistics)
+        except Exception as e:
+            self._finish(job, partial, e)
+            return job
+
+        job.future.add_done_callback(lambda future: self._on_render_done(job, partial, future))
+        return job
+
+    def _submit_render(self, partial: str, report: pd.DataFrame,
+                       statistics: Dict[str, Any]) -> Future:
+        """Envia a renderização para a pool, recriando-a se algum processo tiver morrido"""
+        with self._lock:
+            executor = self._get_executor()
+        try:
+            return executor.submit(_render_report, partial, report, statistics)
+        except BrokenProcessPool:
+            logger.warning("Pool de relatórios quebrada; recriando")
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+                executor = self._get_executor()
+            return executor.submit(_render_report, partial, report, statistics)
+
+    def _on_render_done(self, job: ReportJob, partial: str, future: Future) -> None:
+        """Callback de conclusão da renderização (roda numa thread da pool)"""
+        error = CancelledError('Geração cancelada') if future.cancelled() else future.exception()
+        if error is None:
+            size = os.path.getsize(partial) if os.path.exists(partial) else None
+            seconds, phases = future.result()
+            PDFService.record_render(seconds, size, phases=phases)
+        else:
+            PDFService.record_render(0.0, ok=False)
+        self._finish(job, partial, error)
+
+    def _finish(self, job: ReportJob, partial: str, error: Optional[BaseException]) -> None:
+        """Publica o relatório gerado ou registra a falha"""
+        if error is None:
+            try:
+                self.cache.commit(job.id, partial)
+            except OSError as e:
+                error = e
+        else:
+            self.cache.discard(partial)
+
+        message = None
+        if error is not None:
+            message = str(error) or error.__class__.__name__
+            self._write_marker(FAILED_MARKER, job.id, message)
+            logger.error(f"Erro ao gerar relatório {job.id}: {message}")
+        else:
+            logger.info(f"Relatório gerado: {job.id}")
+
+        self._remove_marker(PENDING_MARKER, job.id)
+        job.mark_finished(message)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Retorna o estado de um job
+
+        Jobs de outros processos são resolvidos pelos arquivos do cache.
+
+        Returns:
+            Dicionário com 'job_id', 'status' e 'error' (se houver), ou None
+        """
+        if not JOB_ID_PATTERN.fullmatch(job_id):
+            return None
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+
+        if job is not None:
+            status, error = job.status, job.error
+        elif self.cache.get(job_id) is not None:
+            status, error = DONE, None
+        elif os.path.exists(self._marker_path(FAILED_MARKER, job_id)):
+            status, error = FAILED, self._read_marker(FAILED_MARKER, job_id)
+        elif os.path.exists(self._marker_path(PENDING_MARKER, job_id)):
+            status, error = RUNNING, None
+        else:
+            return None
+
+        if status == DONE and self.cache.get(job_id) is None:
+            # Relatório já descartado pelo limite do cache
+            return None
+
+        result = {'job_id': job_id, 'status': status}
+        if error:
+            result['error'] = error
+        return result
+
+    def wait(self, job: ReportJob, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Aguarda um job terminar
+
+        Returns:
+            Caminho do relatório pronto, ou None se ele já foi removido do
+            cache (ex.: pelo limite, ao publicar o relatório de outro processo)
+
+        Raises:
+            TimeoutError: se o job não terminar no prazo
+            RuntimeError: se a geração falhou
+        """
+        if not job.finished.wait(timeout):
+            raise TimeoutError(f'Relatório {job.id} ainda em geração')
+        if job.error:
+            raise RuntimeError(job.error)
+        return self.cache.get(job.id)
+
+    def shutdown(self) -> None:
+        """Encerra os processos da pool"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _remember(self, job: ReportJob) -> None:
+        """Guarda o job, descartando os concluídos mais antigos além do limite (chamado com o lock)"""
+        self._jobs[job.id] = job
+        self._jobs.move_to_end(job.id)
+        while len(self._jobs) > self.max_jobs:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if oldest.status in (QUEUED, RUNNING):
+                break
+            del self._jobs[oldest_id]
+
+    def _marker_path(self, marker: str, key: str) -> str:
+        return os.path.join(self.cache.directory, marker.format(key=key))
+
+    def _write_marker(self, marker: str, key: str, content: str = '') -> None:
+        try:
+            with open(self._marker_path(marker, key), 'w', encoding='utf-8') as marker_file:
+                marker_file.write(content)
+        except OSError as e:
+            logger.warning(f"Não foi possível gravar marcador do job {key}: {e}")
+
+    def _read_marker(self, marker: str, key: str) -> str:
+        try:
+            with open(self._marker_path(marker, key), encoding='utf-8') as marker_file:
+                return marker_file.read()
+        except OSError:
+            return ''
+
+    def _remove_marker(self, marker: str, key: str) -> None:
+        try:
+            os.remove(self._marker_path(marker, key))
+        except OSError:
+            pass
@@ -0,0 +1,325 @@
+"""
+Simulação de Cenários de Intervenção (E se...?)
+Sistema Clima Vida - NASA Space Apps Hackathon
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from config import Config
+from services.zone_service import RECORD_DEFAULTS, ZoneAggregates, ZoneService, ZoneSnapshot
+from utils.classification import CLASSIFICATIONS, COLOR_KEYS, classification_buckets
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Faixa válida do NDVI: valores simulados são limitados a ela
+NDVI_RANGE = (-1.0, 1.0)
+
+
+def _as_tuple(value: Any) -> Tuple:
+    """Aceita um valor único ou uma lista"""
+    if value is None:
+        return ()
+    if isinstance(value, (list, tuple)):
+        return tuple(value)
+    return (value,)
+
+
+@dataclass(frozen=True)
+class Intervention:
+    """
+    Intervenção de um cenário: variações de NDVI e temperatura nas zonas selecionadas
+
+    Os filtros se combinam (E) e cada um aceita vários valores (OU); sem
+    filtros, a intervenção vale para todas as zonas. A seleção usa sempre os
+    dados atuais, não o resultado de outras intervenções do mesmo cenário.
+    """
+    ndvi_delta: float = 0.0
+    temperature_delta: float = 0.0
+    regions: Tuple[str, ...] = ()
+    classifications: Tuple[str, ...] = ()
+    ids: Tuple[int, ...] = ()
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> 'Intervention':
+        """
+        Cria a intervenção a partir do JSON da API
+
+        Campos: ndvi_delta, temperatura_delta, regiao, classificacao e ids.
+
+        Raises:
+            ValueError: se algum campo for inválido
+        """
+        if not isinstance(payload, dict):
+            raise ValueError('Cada intervenção deve ser um objeto')
+
+        try:
+            ndvi_delta = float(payload.get('ndvi_delta', 0.0))
+            temperature_delta = float(payload.get('temperatura_delta', 0.0))
+            ids = tuple(int(value) for value in _as_tuple(payload.get('ids')))
+        except (TypeError, ValueError):
+            raise ValueError('ndvi_delta, temperatura_delta e ids devem ser numéricos')
+
+        if not np.isfinite([ndvi_delta, temperature_delta]).all():
+            raise ValueError('Variações devem ser finitas')
+        if abs(ndvi_delta) > Config.SCENARIO_MAX_NDVI_DELTA:
+            raise ValueError(f'ndvi_delta deve estar entre -{Config.SCENARIO_MAX_NDVI_DELTA} '
+                             f'e {Config.SCENARIO_MAX_NDVI_DELTA}')
+        if abs(temperature_delta) > Config.SCENARIO_MAX_TEMPERATURE_DELTA:
+            raise ValueError(f'temperatura_delta deve estar entre -{Config.SCENARIO_MAX_TEMPERATURE_DELTA} '
+                             f'e {Config.SCENARIO_MAX_TEMPERATURE_DELTA}')
+        if len(ids) > Config.SCENARIO_MAX_IDS:
+            raise ValueError(f'Máximo de {Config.SCENARIO_MAX_IDS} ids por intervenção')
+
+        classifications = tuple(str(value) for value in _as_tuple(payload.get('classificacao')))
+        invalid = [value for value in classifications if value not in CLASSIFICATIONS]
+        if invalid:
+            raise ValueError(f'Classificações inválidas: {invalid}')
+
+        return cls(
+            ndvi_delta=ndvi_delta,
+            temperature_delta=temperature_delta,
+            regions=tuple(str(value) for value in _as_tuple(payload.get('regiao'))),
+            classifications=classifications,
+            ids=ids
+        )
+
+
+@dataclass(frozen=True)
+class ScenarioBaseline:
+    """Colunas de um snapshot preparadas para simulação (views, sem cópia quando possível)"""
+    version: int
+    temperature: np.ndarray
+    ndvi: np.ndarray
+    criticity: np.ndarray
+    buckets: np.ndarray
+    region_codes: np.ndarray
+    region_index: Dict[str, int]
+
+
+class ScenarioService:
+    """
+    Simula intervenções de arborização sobre os dados de um ZoneService
+
+    Os dados publicados não são alterados: as colunas do snapshot são lidas
+    como arrays e só as linhas selecionadas pelas intervenções são
+    recalculadas. As estatísticas do cenário saem dos agregados do snapshot
+    por diferença (saem as linhas afetadas, entram as simuladas), em tempo
+    proporcional ao número de zonas afetadas.
+    """
+
+    def __init__(self, zone_service: ZoneService):
+        """
+        Args:
+            zone_service: Serviço cujos dados servem de base para os cenários
+        """
+        self.zone_service = zone_service
+        self._baseline: Optional[ScenarioBaseline] = None
+        self._lock = threading.Lock()
+
+    def _get_baseline(self, snapshot: ZoneSnapshot) -> ScenarioBaseline:
+        """Prepara (uma vez por versão dos dados) as colunas usadas nas simulações"""
+        baseline = self._baseline
+        if baseline is not None and baseline.version == snapshot.version:
+            return baseline
+
+        with self._lock:
+            baseline = self._baseline
+            if baseline is not None and baseline.version == snapshot.version:
+                return baseline
+
+            data = snapshot.data
+            if 'regiao' in data.columns:
+                region_codes, regions = pd.factorize(data['regiao'])
+            else:
+                region_codes, regions = np.zeros(len(data), dtype=np.intp), [RECORD_DEFAULTS['regiao']]
+
+            baseline = ScenarioBaseline(
+                version=snapshot.version,
+                temperature=data['temperatura'].to_numpy(dtype=np.float64),
+                ndvi=data['ndvi'].to_numpy(dtype=np.float64),
+                criticity=data['indice_criticidade'].to_numpy(dtype=np.float64),
+                buckets=pd.Categorical(data['classificacao'], categories=CLASSIFICATIONS).codes,
+                region_codes=region_codes,
+                region_index={str(region): code for code, region in enumerate(regions)}
+            )
+            self._baseline = baseline
+            return baseline
+
+    def _select(self, snapshot: ZoneSnapshot, baseline: ScenarioBaseline,
+                intervention: Intervention) -> np.ndarray:
+        """Máscara booleana das zonas selecionadas pelos filtros da intervenção"""
+        mask = np.ones(len(baseline.temperature), dtype=bool)
+
+        if intervention.regions:
+            codes = [baseline.region_index[region] for region in intervention.regions
+                     if region in baseline.region_index]
+            mask &= self._lookup(codes, len(baseline.region_index))[baseline.region_codes]
+
+        if intervention.classifications:
+            codes = [CLASSIFICATIONS.index(value) for value in intervention.classifications]
+            mask &= self._lookup(codes, len(CLASSIFICATIONS))[baseline.buckets]
+
+        if intervention.ids:
+            positions = [snapshot.id_index[zone_id] for zone_id in intervention.ids
+                         if zone_id in snapshot.id_index]
+            selected = np.zeros(len(mask), dtype=bool)
+            selected[positions] = True
+            mask &= selected
+
+        return mask
+
+    def _lookup(self, codes: List[int], n_codes: int) -> np.ndarray:
+        """
+        Tabela código -> selecionado, indexada direto pelos códigos das zonas
+
+        A posição extra no fim (falsa) atende o código -1 de valores nulos.
+        """
+        table = np.zeros(n_codes + 1, dtype=bool)
+        table[codes] = True
+        return table
+
+    def simulate(self, interventions: Sequence[Intervention], name: Optional[str] = None,
+                 include_zones: bool = False) -> Dict[str, Any]:
+        """
+        Simula um cenário (conjunto de intervenções aplicadas juntas)
+
+        Args:
+            interventions: Intervenções do cenário; variações sobre a mesma zona se somam
+            name: Nome do cenário (devolvido na resposta)
+            include_zones: Se True, devolve as zonas que mudaram de classificação
+
+        Returns:
+            Dicionário com estatísticas atuais e simuladas, diferenças e
+            mudanças de classificação
+        """
+        service = self.zone_service
+        snapshot = service.snapshot
+        baseline = self._get_baseline(snapshot)
+        n_zones = len(baseline.temperature)
+
+        # Soma as variações de todas as intervenções por zona
+        affected = np.zeros(n_zones, dtype=bool)
+        ndvi_delta = np.zeros(n_zones)
+        temperature_delta = np.zeros(n_zones)
+        for intervention in interventions:
+            mask = self._select(snapshot, baseline, intervention)
+            if intervention.ndvi_delta:
+                ndvi_delta[mask] += intervention.ndvi_delta
+            if intervention.temperature_delta:
+                temperature_delta[mask] += intervention.temperature_delta
+            affected |= mask
+
+        # Recalcula só as linhas afetadas
+        positions = np.flatnonzero(affected)
+        old_temperature = baseline.temperature[positions]
+        old_ndvi = baseline.ndvi[positions]
+        old_criticity = baseline.criticity[positions]
+        old_buckets = baseline.buckets[positions]
+
+        new_temperature = old_temperature + temperature_delta[positions]
+        new_ndvi = np.clip(old_ndvi + ndvi_delta[positions], *NDVI_RANGE)
+        new_criticity = new_temperature - (new_ndvi * 10)
+        # Limiares do próprio snapshot: os do serviço podem já ser de uma versão mais nova
+        new_buckets = classification_buckets(new_criticity, *snapshot.thresholds)
+
+        # Estatísticas por diferença sobre os agregados do snapshot
+        aggregates = snapshot.aggregates.apply_delta(
+            added=ZoneAggregates.from_arrays(
+                new_temperature, new_ndvi, new_criticity, self._class_counts(new_buckets)
+            ),
+            removed=ZoneAggregates.from_arrays(
+                old_temperature, old_ndvi, old_criticity, self._class_counts(old_buckets)
+            )
+        )
+        before = service.format_statistics(snapshot.statistics)
+        after = service.format_statistics(aggregates.to_statistics())
+
+        # Mudanças de classificação (origem x destino)
+        changed = (old_buckets != new_buckets) & (old_buckets >= 0)
+        pairs = np.bincount(
+            old_buckets[changed].astype(np.intp) * len(CLASSIFICATIONS) + new_buckets[changed],
+            minlength=len(CLASSIFICATIONS) ** 2
+        )
+        transitions = [
+            {'from': CLASSIFICATIONS[pair // len(CLASSIFICATIONS)],
+             'to': CLASSIFICATIONS[pair % len(CLASSIFICATIONS)],
+             'zones': int(count)}
+            for pair, count in enumerate(pairs.tolist()) if count
+        ]
+
+        result = {
+            'name': name,
+            'data_version': snapshot.version,
+            'affected_zones': int(len(positions)),
+            'reclassified_zones': int(changed.sum()),
+            'baseline': before,
+            'statistics': after,
+            'delta': {
+                key: round(after[key] - before[key], 2) if isinstance(after[key], float) else after[key] - before[key]
+                for key in after
+            },
+            'transitions': transitions
+        }
+
+        if include_zones:
+            result['zones'] = self._changed_zones(snapshot, positions[changed], new_criticity[changed],
+                                                  new_buckets[changed])
+        return result
+
+    def _class_counts(self, buckets: np.ndarray) -> Dict[str, int]:
+        """Contagem por classificação a partir das faixas (faixas inválidas são ignoradas)"""
+        counts = np.bincount(buckets[buckets >= 0], minlength=len(CLASSIFICATIONS))
+        return dict(zip(CLASSIFICATIONS, counts.tolist()))
+
+    def _changed_zones(self, snapshot: ZoneSnapshot, positions: np.ndarray,
+                       criticity: np.ndarray, buckets: np.ndarray) -> List[Dict[str, Any]]:
+        """Zonas reclassificadas no cenário, com o novo índice, classificação e cor"""
+        ids = snapshot.data['id'].to_numpy()[positions].tolist()
+        colors = [Config.COLORS[key] for key in COLOR_KEYS]
+        return [
+            {
+                'id': zone_id,
+                'indice_criticidade': round(value, 2),
+                'classificacao': CLASSIFICATIONS[bucket],
+                'cor': colors[bucket]
+            }
+            for zone_id, value, bucket in zip(ids, criticity.tolist(), buckets.tolist())
+        ]
+
+    def run(self, scenarios: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Valida e simula um lote de cenários no formato da API
+
+        Cada cenário: {"name": ..., "interventions": [...], "include_zones": false}
+
+        Raises:
+            ValueError: se algum cenário ou intervenção for inválido
+        """
+        if not scenarios:
+            raise ValueError('Informe ao menos um cenário')
+        if len(scenarios) > Config.SCENARIO_MAX_SCENARIOS:
+            raise ValueError(f'Máximo de {Config.SCENARIO_MAX_SCENARIOS} cenários por requisição')
+
+        parsed = []
+        for scenario in scenarios:
+            if not isinstance(scenario, dict):
+                raise ValueError('Cada cenário deve ser um objeto')
+            interventions = scenario.get('interventions')
+            if not isinstance(interventions, list) or not interventions:
+                raise ValueError('Cada cenário deve ter uma lista de interventions')
+            if len(interventions) > Config.SCENARIO_MAX_INTERVENTIONS:
+                raise ValueError(f'Máximo de {Config.SCENARIO_MAX_INTERVENTIONS} intervenções por cenário')
+            parsed.append((
+                [Intervention.from_dict(item) for item in interventions],
+                scenario.get('name'),
+                bool(scenario.get('include_zones', False))
+            ))
+
+        return [
+            self.simulate(interventions, name=name, include_zones=include_zones)
+            for interventions, name, include_zones in parsed
+        ]
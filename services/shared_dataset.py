@@ -0,0 +1,96 @@
+"""
+Publicação dos Dados Processados para Vários Processos
+Sistema Clima Vida - NASA Space Apps Hackathon
+"""
+
+import os
+import shutil
+import tempfile
+from typing import Dict, Optional
+from services.zone_service import ZoneService
+from services.data_cache import CachedDataset, ColumnarCache, load_dataset
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Diretório em memória (tmpfs) preferido para os dados publicados
+SHARED_MEMORY_DIR = '/dev/shm'
+
+
+def shared_memory_root() -> str:
+    """Retorna o diretório base da publicação: /dev/shm, se disponível, ou o temporário do sistema"""
+    if os.path.isdir(SHARED_MEMORY_DIR) and os.access(SHARED_MEMORY_DIR, os.W_OK):
+        return SHARED_MEMORY_DIR
+    return tempfile.gettempdir()
+
+
+class SharedDatasetPublisher:
+    """
+    Carrega e processa os dados uma vez e os publica como arquivos mapeáveis
+
+    Cada cidade é gravada no formato do ColumnarCache num diretório em
+    memória. Os processos trabalhadores abrem esses arquivos com mmap
+    somente leitura (ver load_dataset): as colunas numéricas, os códigos
+    das colunas de texto, as ordenações e o payload de zonas ficam numa
+    única cópia no page cache, compartilhada por todos.
+
+    Continuam por worker: as categorias das colunas de texto, o índice
+    id -> posição, o índice espacial, a pirâmide de tiles e os clusters,
+    montados por cada processo a partir das colunas compartilhadas, além
+    de qualquer versão nova dos dados (recarga, limiares, API de escrita).
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        """
+        Inicializa o publicador
+
+        Args:
+            root: Diretório base (padrão: /dev/shm ou o temporário do sistema)
+        """
+        self.directory = tempfile.mkdtemp(prefix='clima-vida-', dir=root or shared_memory_root())
+        self.published: Dict[str, str] = {}
+
+    def publish(self, city_files: Dict[str, str]) -> Dict[str, str]:
+        """
+        Processa e publica as cidades informadas
+
+        Args:
+            city_files: Mapeamento cidade -> caminho do CSV
+
+        Returns:
+            Mapeamento cidade -> diretório publicado
+        """
+        for city, csv_file in city_files.items():
+            if not os.path.exists(csv_file):
+                logger.warning(f"Cidade não publicada, arquivo ausente: {csv_file}")
+                continue
+
+            service = ZoneService(csv_file)
+            cache = ColumnarCache(csv_file, city, root=self.directory)
+            if service.export_dataset(cache):
+                self.published[city] = cache.path
+                logger.info(f"Cidade publicada para os workers: {city} ({cache.path})")
+            del service
+
+        return dict(self.published)
+
+    def close(self) -> None:
+        """Remove os dados publicados (chamar após encerrar os workers)"""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.published.clear()
+
+
+def attach_dataset(path: str) -> Optional[CachedDataset]:
+    """
+    Anexa, somente leitura, os dados publicados por SharedDatasetPublisher
+
+    Args:
+        path: Diretório publicado da cidade
+
+    Returns:
+        Dados processados (colunas, ordenações e payload mapeados sem cópia) ou None
+    """
+    dataset = load_dataset(path)
+    if dataset is None:
+        logger.warning(f"Dados publicados indisponíveis: {path}")
+    return dataset
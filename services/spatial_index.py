@@ -0,0 +1,242 @@
+"""
+Índice Espacial de Zonas (grade uniforme)
+Sistema Clima Vida - NASA Space Apps Hackathon
+"""
+
+import copy
+import math
+from typing import Tuple
+import numpy as np
+
+# Raio médio da Terra (km) e comprimento de um grau de latitude
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180.0
+
+
+def haversine_km(lat: float, lon: float, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """
+    Calcula, de forma vetorizada, a distância de um ponto a vários pontos
+
+    Args:
+        lat: Latitude do ponto de referência
+        lon: Longitude do ponto de referência
+        latitudes: Latitudes dos pontos de destino
+        longitudes: Longitudes dos pontos de destino
+
+    Returns:
+        Distâncias em quilômetros
+    """
+    lat1 = math.radians(lat)
+    lat2 = np.radians(latitudes)
+    dlat = lat2 - lat1
+    dlon = np.radians(longitudes) - math.radians(lon)
+
+    a = np.sin(dlat / 2.0) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class SpatialGridIndex:
+    """
+    Grade uniforme sobre latitude/longitude para consultas espaciais
+
+    Os pontos são ordenados pela célula da grade e cada célula guarda o
+    intervalo correspondente nessa ordem (layout CSR). Uma faixa de colunas
+    de uma mesma linha da grade é, portanto, um único intervalo contíguo.
+
+    Zonas inseridas ou movidas depois da construção (with_points) ficam numa
+    lista à parte, verificada em toda consulta, até o índice ser refeito.
+    """
+
+    def __init__(self, latitudes: np.ndarray, longitudes: np.ndarray, zones_per_cell: int = 16):
+        """
+        Constrói o índice
+
+        Args:
+            latitudes: Latitude de cada zona (posição = linha do DataFrame)
+            longitudes: Longitude de cada zona
+            zones_per_cell: Ocupação média desejada por célula
+        """
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+
+        valid = np.flatnonzero(np.isfinite(self.latitudes) & np.isfinite(self.longitudes))
+        self.size = len(valid)
+        self._extra = np.empty(0, dtype=np.int64)
+        self._extra_rows = self._extra_cols = self._extra
+
+        if self.size == 0:
+            self.min_lat = self.min_lon = 0.0
+            self.cell_lat = self.cell_lon = 1.0
+            self.rows = self.cols = 1
+            self._order = valid
+            self._offsets = np.zeros(2, dtype=np.int64)
+            return
+
+        lats = self.latitudes[valid]
+        lons = self.longitudes[valid]
+        self.min_lat, max_lat = float(lats.min()), float(lats.max())
+        self.min_lon, max_lon = float(lons.min()), float(lons.max())
+        height = max(max_lat - self.min_lat, 1e-9)
+        width = max(max_lon - self.min_lon, 1e-9)
+
+        # Dimensiona a grade para ~zones_per_cell zonas por célula, respeitando a proporção
+        n_cells = max(1, self.size // max(1, zones_per_cell))
+        self.cols = max(1, int(math.ceil(math.sqrt(n_cells * width / height))))
+        self.rows = max(1, int(math.ceil(n_cells / self.cols)))
+        self.cell_lat = height / self.rows
+        self.cell_lon = width / self.cols
+
+        cells = self._row_of(lats) * self.cols + self._col_of(lons)
+        order = np.argsort(cells, kind='stable')
+        self._order = valid[order]
+        self._offsets = np.searchsorted(cells[order], np.arange(self.rows * self.cols + 1))
+
+    @property
+    def nbytes(self) -> int:
+        """Memória ocupada pelos arrays do índice"""
+        extra = self._extra.nbytes + self._extra_rows.nbytes + self._extra_cols.nbytes
+        return self.latitudes.nbytes + self.longitudes.nbytes + self._order.nbytes + self._offsets.nbytes + extra
+
+    @property
+    def n_extra(self) -> int:
+        """Zonas guardadas fora da grade (inseridas ou movidas depois da construção)"""
+        return len(self._extra)
+
+    def with_points(self, latitudes: np.ndarray, longitudes: np.ndarray,
+                    positions: np.ndarray) -> 'SpatialGridIndex':
+        """
+        Novo índice com coordenadas atualizadas, sem refazer a grade
+
+        As posições informadas (zonas movidas, ou novas no fim dos arrays)
+        entram na lista à parte; entradas antigas delas na grade continuam lá,
+        mas são filtradas pelas coordenadas atuais. O custo depende das
+        posições informadas e das que já estavam na lista, não do total de zonas.
+
+        Args:
+            latitudes: Latitude de cada zona, já com as alterações
+            longitudes: Longitude de cada zona, já com as alterações
+            positions: Posições (distintas) das zonas movidas ou inseridas
+
+        Returns:
+            Novo índice; o atual não é alterado
+        """
+        index = copy.copy(self)
+        index.latitudes = np.asarray(latitudes, dtype=np.float64)
+        index.longitudes = np.asarray(longitudes, dtype=np.float64)
+
+        positions = np.asarray(positions, dtype=np.int64)
+        existing = positions[positions < len(self.latitudes)]
+        was_valid = np.isfinite(self.latitudes[existing]) & np.isfinite(self.longitudes[existing])
+        lats, lons = index.latitudes[positions], index.longitudes[positions]
+        valid = np.isfinite(lats) & np.isfinite(lons)
+        index.size = self.size - int(was_valid.sum()) + int(valid.sum())
+
+        # A célula de cada zona da lista sai das coordenadas atuais, com o mesmo
+        # recorte nas bordas da grade usado nas consultas
+        keep = ~np.isin(self._extra, positions)
+        index._extra = np.concatenate([self._extra[keep], positions[valid]])
+        index._extra_rows = np.concatenate([self._extra_rows[keep], index._row_of(lats[valid])])
+        index._extra_cols = np.concatenate([self._extra_cols[keep], index._col_of(lons[valid])])
+        return index
+
+    def _row_of(self, latitudes):
+        """Retorna a linha da grade de cada latitude"""
+        return np.clip(((latitudes - self.min_lat) / self.cell_lat).astype(np.int64), 0, self.rows - 1)
+
+    def _col_of(self, longitudes):
+        """Retorna a coluna da grade de cada longitude"""
+        return np.clip(((longitudes - self.min_lon) / self.cell_lon).astype(np.int64), 0, self.cols - 1)
+
+    def _cell_range(self, min_lat: float, max_lat: float, min_lon: float, max_lon: float) -> Tuple[int, int, int, int]:
+        """Retorna (linha inicial, linha final, coluna inicial, coluna final) da caixa"""
+        row_start, row_end = self._row_of(np.array([min_lat, max_lat]))
+        col_start, col_end = self._col_of(np.array([min_lon, max_lon]))
+        return int(row_start), int(row_end), int(col_start), int(col_end)
+
+    def _candidates(self, row_start: int, row_end: int, col_start: int, col_end: int) -> np.ndarray:
+        """Retorna as posições das zonas contidas no retângulo de células"""
+        offsets = self._offsets
+        slices = [
+            self._order[offsets[row * self.cols + col_start]:offsets[row * self.cols + col_end + 1]]
+            for row in range(row_start, row_end + 1)
+        ]
+        candidates = np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+        if len(self._extra):
+            inside = ((self._extra_rows >= row_start) & (self._extra_rows <= row_end) &
+                      (self._extra_cols >= col_start) & (self._extra_cols <= col_end))
+            # Zonas movidas podem aparecer também na célula antiga
+            candidates = np.unique(np.concatenate([candidates, self._extra[inside]]))
+        return candidates
+
+    def query_bbox(self, min_lat: float, max_lat: float, min_lon: float, max_lon: float) -> np.ndarray:
+        """
+        Retorna as zonas dentro de uma caixa delimitadora (limites inclusivos)
+
+        Args:
+            min_lat: Latitude mínima
+            max_lat: Latitude máxima
+            min_lon: Longitude mínima
+            max_lon: Longitude máxima
+
+        Returns:
+            Posições das zonas, em ordem crescente
+        """
+        if self.size == 0:
+            return np.empty(0, dtype=np.int64)
+        # Fora dos limites da grade só há zonas da lista à parte
+        outside = (max_lat < self.min_lat or max_lon < self.min_lon or
+                   min_lat > self.min_lat + self.cell_lat * self.rows or
+                   min_lon > self.min_lon + self.cell_lon * self.cols)
+        if outside and not len(self._extra):
+            return np.empty(0, dtype=np.int64)
+
+        candidates = self._candidates(*self._cell_range(min_lat, max_lat, min_lon, max_lon))
+        lats = self.latitudes[candidates]
+        lons = self.longitudes[candidates]
+        inside = (lats >= min_lat) & (lats <= max_lat) & (lons >= min_lon) & (lons <= max_lon)
+        return np.sort(candidates[inside])
+
+    def nearest(self, lat: float, lon: float, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Retorna as k zonas mais próximas de um ponto (distância haversine)
+
+        Args:
+            lat: Latitude do ponto
+            lon: Longitude do ponto
+            k: Quantidade de zonas
+
+        Returns:
+            Tupla (posições, distâncias em km), da mais próxima para a mais distante
+        """
+        k = min(int(k), self.size)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+        # Expande um anel de células ao redor do ponto até reunir k candidatas
+        row, _, col, _ = self._cell_range(lat, lat, lon, lon)
+        radius = 0
+        while True:
+            candidates = self._candidates(
+                max(0, row - radius), min(self.rows - 1, row + radius),
+                max(0, col - radius), min(self.cols - 1, col + radius)
+            )
+            if len(candidates) >= k:
+                break
+            radius = radius * 2 + 1
+
+        # A k-ésima distância limita a busca: toda zona mais próxima está
+        # na caixa que envolve o círculo com esse raio
+        distances = haversine_km(lat, lon, self.latitudes[candidates], self.longitudes[candidates])
+        reach_km = float(np.partition(distances, k - 1)[k - 1])
+        reach_lat = reach_km / KM_PER_DEGREE
+        max_abs_lat = min(abs(lat) + reach_lat, 89.9)
+        reach_lon = min(reach_km / (KM_PER_DEGREE * math.cos(math.radians(max_abs_lat))), 360.0)
+
+        candidates = self._candidates(*self._cell_range(
+            lat - reach_lat, lat + reach_lat, lon - reach_lon, lon + reach_lon
+        ))
+        distances = haversine_km(lat, lon, self.latitudes[candidates], self.longitudes[candidates])
+
+        top = np.argpartition(distances, k - 1)[:k] if len(candidates) > k else np.arange(len(candidates))
+        top = top[np.argsort(distances[top], kind='stable')]
+        return candidates[top], distances[top]
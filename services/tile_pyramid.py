@@ -0,0 +1,196 @@
+"""
+Pirâmide de Tiles das Zonas (quadtree na ordem de Morton)
+Sistema Clima Vida - NASA Space Apps Hackathon
+"""
+
+import math
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from utils.classification import CLASSIFICATIONS
+
+# Latitude máxima da projeção Web Mercator (tiles quadrados)
+MAX_MERCATOR_LATITUDE = 85.05112878
+
+# Zoom máximo representável: chaves de Morton com 2 bits por nível em 64 bits
+MAX_SUPPORTED_ZOOM = 30
+
+
+def tile_coordinates(latitudes: Any, longitudes: Any, zoom: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Converte coordenadas em índices de tile (x, y) do Web Mercator, de forma vetorizada
+
+    Args:
+        latitudes: Latitudes em graus (limitadas à faixa do Mercator)
+        longitudes: Longitudes em graus
+        zoom: Nível de zoom (2^zoom tiles por eixo)
+
+    Returns:
+        Arrays (x, y) de inteiros, com a origem no canto noroeste
+    """
+    n = 1 << zoom
+    latitudes = np.radians(np.clip(np.asarray(latitudes, dtype=np.float64),
+                                   -MAX_MERCATOR_LATITUDE, MAX_MERCATOR_LATITUDE))
+    x = np.floor((np.asarray(longitudes, dtype=np.float64) + 180.0) / 360.0 * n)
+    y = np.floor((1.0 - np.arcsinh(np.tan(latitudes)) / math.pi) / 2.0 * n)
+    return np.clip(x, 0, n - 1).astype(np.int64), np.clip(y, 0, n - 1).astype(np.int64)
+
+
+def _spread_bits(values: np.ndarray) -> np.ndarray:
+    """Intercala zeros entre os bits (32 bits -> posições pares de 64 bits)"""
+    v = np.asarray(values).astype(np.uint64) & np.uint64(0xFFFFFFFF)
+    for shift, mask in ((16, 0x0000FFFF0000FFFF), (8, 0x00FF00FF00FF00FF), (4, 0x0F0F0F0F0F0F0F0F),
+                        (2, 0x3333333333333333), (1, 0x5555555555555555)):
+        v = (v | (v << np.uint64(shift))) & np.uint64(mask)
+    return v
+
+
+def _compact_bits(values: np.ndarray) -> np.ndarray:
+    """Inverso de _spread_bits: recolhe os bits das posições pares"""
+    v = np.asarray(values).astype(np.uint64) & np.uint64(0x5555555555555555)
+    for shift, mask in ((1, 0x3333333333333333), (2, 0x0F0F0F0F0F0F0F0F), (4, 0x00FF00FF00FF00FF),
+                        (8, 0x0000FFFF0000FFFF), (16, 0x00000000FFFFFFFF)):
+        v = (v | (v >> np.uint64(shift))) & np.uint64(mask)
+    return v.astype(np.int64)
+
+
+def morton_keys(x: Any, y: Any) -> np.ndarray:
+    """Chave de Morton (ordem Z) dos tiles: bits de x e y intercalados"""
+    return _spread_bits(x) | (_spread_bits(y) << np.uint64(1))
+
+
+def morton_decode(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Inverso de morton_keys: índices (x, y) dos tiles"""
+    return _compact_bits(keys), _compact_bits(np.asarray(keys, dtype=np.uint64) >> np.uint64(1))
+
+
+class TilePyramid:
+    """
+    Agregados das zonas por tile (z/x/y do Web Mercator) em todos os zooms até max_zoom
+
+    As zonas são ordenadas pela chave de Morton do tile que ocupam no zoom
+    máximo. Nessa ordem, as zonas de qualquer tile, em qualquer zoom, formam
+    um intervalo contíguo (a quadtree fica implícita), e somas acumuladas de
+    contagem, criticidade e classificações dão o agregado de um tile com duas
+    buscas binárias. A pirâmide inteira ocupa poucos bytes por zona.
+    """
+
+    def __init__(self, latitudes: Any, longitudes: Any, criticity: Any, classifications: Any,
+                 max_zoom: int):
+        """
+        Constrói a pirâmide
+
+        Args:
+            latitudes: Latitude de cada zona
+            longitudes: Longitude de cada zona
+            criticity: Índice de criticidade de cada zona
+            classifications: Classificação de cada zona (valores de CLASSIFICATIONS)
+            max_zoom: Zoom mais detalhado da pirâmide
+        """
+        if not 0 <= max_zoom <= MAX_SUPPORTED_ZOOM:
+            raise ValueError(f'max_zoom deve estar entre 0 e {MAX_SUPPORTED_ZOOM}')
+        self.max_zoom = max_zoom
+
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        valid = np.flatnonzero(np.isfinite(latitudes) & np.isfinite(longitudes))
+        self.size = len(valid)
+
+        x, y = tile_coordinates(latitudes[valid], longitudes[valid], max_zoom)
+        keys = morton_keys(x, y)
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+
+        positions = valid[order]
+        criticity = np.asarray(criticity, dtype=np.float64)[positions]
+        scored = ~np.isnan(criticity)
+        codes = pd.Categorical(np.asarray(classifications, dtype=object)[positions],
+                               categories=CLASSIFICATIONS).codes
+        classes = (codes[:, np.newaxis] == np.arange(len(CLASSIFICATIONS))).astype(np.int32)
+
+        # Somas acumuladas com uma linha inicial de zeros: soma de [i, j) = acc[j] - acc[i]
+        self._criticity = np.concatenate([[0.0], np.cumsum(np.where(scored, criticity, 0.0))])
+        self._scored = np.concatenate([[0], np.cumsum(scored, dtype=np.int32)])
+        self._classes = np.vstack([np.zeros((1, len(CLASSIFICATIONS)), dtype=np.int32),
+                                   np.cumsum(classes, axis=0, dtype=np.int32)])
+
+    @property
+    def nbytes(self) -> int:
+        """Memória ocupada pelos arrays da pirâmide"""
+        return self.keys.nbytes + self._criticity.nbytes + self._scored.nbytes + self._classes.nbytes
+
+    def tile(self, zoom: int, x: int, y: int, depth: int = 0) -> Dict[str, Any]:
+        """
+        Agregado de um tile e de suas subdivisões
+
+        Args:
+            zoom: Zoom do tile
+            x: Coluna do tile
+            y: Linha do tile
+            depth: Níveis de subdivisão devolvidos em 'cells' (até 4^depth células,
+                limitadas ao zoom máximo)
+
+        Returns:
+            Dicionário com 'z', 'x', 'y', 'count', 'avg_criticity',
+            'classificacao' (dominante), 'class_counts', 'cell_zoom' e 'cells'
+            (só células com zonas, cada uma com x, y, count, avg_criticity e
+            classificacao)
+
+        Raises:
+            ValueError: se o tile não existir na pirâmide
+        """
+        if not 0 <= zoom <= self.max_zoom:
+            raise ValueError(f'Zoom deve estar entre 0 e {self.max_zoom}')
+        if not (0 <= x < (1 << zoom) and 0 <= y < (1 << zoom)):
+            raise ValueError('Tile fora dos limites do zoom')
+
+        cell_zoom = min(zoom + max(depth, 0), self.max_zoom)
+        levels = cell_zoom - zoom
+        first_cell = int(morton_keys(x, y)) << (2 * levels)
+        cells = np.uint64(first_cell) + np.arange((1 << (2 * levels)) + 1, dtype=np.uint64)
+        edges = np.searchsorted(self.keys, cells << np.uint64(2 * (self.max_zoom - cell_zoom)))
+
+        occupied = np.flatnonzero(np.diff(edges))
+        start, end = edges[occupied], edges[occupied + 1]
+        cell_keys = cells[occupied]
+        cell_stats = self._aggregate(start, end)
+
+        result = {'z': zoom, 'x': x, 'y': y}
+        result.update(self._aggregate(edges[:1], edges[-1:])[0])
+        result['class_counts'] = self._class_counts(edges[0], edges[-1])
+        result['cell_zoom'] = cell_zoom
+        result['cells'] = [
+            dict(stats, x=cell_x, y=cell_y)
+            for stats, cell_x, cell_y in zip(cell_stats, *(axis.tolist() for axis in morton_decode(cell_keys)))
+        ]
+        return result
+
+    def _aggregate(self, start: np.ndarray, end: np.ndarray) -> List[Dict[str, Any]]:
+        """Contagem, criticidade média e classificação dominante dos intervalos [start, end)"""
+        counts = end - start
+        scored = self._scored[end] - self._scored[start]
+        criticity = self._criticity[end] - self._criticity[start]
+        classes = self._classes[end] - self._classes[start]
+        # Empate entre classificações fica com a mais grave (primeira em CLASSIFICATIONS)
+        dominant = np.argmax(classes, axis=1)
+
+        return [
+            {
+                'count': int(count),
+                'avg_criticity': _mean(total, n_scored),
+                'classificacao': CLASSIFICATIONS[winner] if class_row[winner] else None
+            }
+            for count, total, n_scored, winner, class_row in zip(
+                counts.tolist(), criticity.tolist(), scored.tolist(), dominant.tolist(), classes
+            )
+        ]
+
+    def _class_counts(self, start: int, end: int) -> Dict[str, int]:
+        """Quantidade de zonas de cada classificação no intervalo [start, end)"""
+        counts = self._classes[end] - self._classes[start]
+        return {classification: int(count) for classification, count in zip(CLASSIFICATIONS, counts)}
+
+
+def _mean(total: float, count: int) -> Optional[float]:
+    """Média arredondada; None quando não há valores (JSON não aceita NaN)"""
+    return round(total / count, 2) if count else None
@@ -0,0 +1,148 @@
+"""
+Agrupamento de Zonas por Zoom (grid hash no Web Mercator)
+Sistema Clima Vida - NASA Space Apps Hackathon
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from services.tile_pyramid import morton_decode, morton_keys, tile_coordinates
+from utils.classification import CLASSIFICATIONS
+
+
+@dataclass(frozen=True)
+class ClusterLevel:
+    """Clusters de um zoom: uma posição por célula ocupada da grade"""
+    x: np.ndarray
+    y: np.ndarray
+    count: np.ndarray
+    latitude: np.ndarray
+    longitude: np.ndarray
+    worst: np.ndarray
+    first: np.ndarray
+
+    @property
+    def nbytes(self) -> int:
+        """Memória ocupada pelos arrays do zoom"""
+        return sum(getattr(self, name).nbytes for name in self.__dataclass_fields__)
+
+
+class ZoneClusters:
+    """
+    Clusters de zonas pré-calculados para cada zoom do mapa
+
+    Em cada zoom, as zonas são agrupadas pela célula de uma grade fixa sobre
+    os tiles do mapa (grid_levels níveis abaixo do tile: 2 = células de 64 px
+    em tiles de 256 px). As zonas são ordenadas uma vez pela chave de Morton
+    da célula mais fina; como a célula de um zoom menor é um prefixo dessa
+    chave, as células de todos os zooms são trechos contíguos da mesma ordem
+    e saem com reduceat, sem reagrupar.
+    """
+
+    def __init__(self, latitudes: Any, longitudes: Any, classifications: Any,
+                 max_zoom: int, grid_levels: int = 2):
+        """
+        Calcula os clusters de todos os zooms
+
+        Args:
+            latitudes: Latitude de cada zona
+            longitudes: Longitude de cada zona
+            classifications: Classificação de cada zona (valores de CLASSIFICATIONS)
+            max_zoom: Zoom mais detalhado com clusters (acima dele vale o último)
+            grid_levels: Subdivisões da grade por tile, em níveis de quadtree
+        """
+        self.max_zoom = max_zoom
+        self.grid_levels = grid_levels
+
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        valid = np.flatnonzero(np.isfinite(latitudes) & np.isfinite(longitudes))
+
+        finest = max_zoom + grid_levels
+        x, y = tile_coordinates(latitudes[valid], longitudes[valid], finest)
+        keys = morton_keys(x, y)
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        self._positions = valid[order]
+
+        lats = latitudes[self._positions]
+        lons = longitudes[self._positions]
+        codes = pd.Categorical(np.asarray(classifications, dtype=object)[self._positions],
+                               categories=CLASSIFICATIONS).codes.astype(np.int8)
+        # Classificação desconhecida fica depois da mais branda
+        codes[codes < 0] = len(CLASSIFICATIONS)
+
+        self.levels: List[ClusterLevel] = []
+        for zoom in range(max_zoom + 1):
+            # Célula do zoom = prefixo da chave da célula mais fina; cada
+            # célula começa onde a chave muda (o prepend diferente marca a posição 0)
+            cell_keys = keys >> np.uint64(2 * (max_zoom - zoom))
+            starts = np.flatnonzero(np.diff(cell_keys, prepend=cell_keys[:1] ^ np.uint64(1)))
+            counts = np.diff(np.append(starts, len(keys)))
+            x, y = morton_decode(cell_keys[starts])
+            self.levels.append(ClusterLevel(
+                x=x.astype(np.int32),
+                y=y.astype(np.int32),
+                count=counts.astype(np.int32),
+                latitude=_reduce(np.add, lats, starts) / counts,
+                longitude=_reduce(np.add, lons, starts) / counts,
+                worst=_reduce(np.minimum, codes, starts),
+                first=starts
+            ))
+
+    @property
+    def nbytes(self) -> int:
+        """Memória ocupada pelos clusters de todos os zooms"""
+        return self._positions.nbytes + sum(level.nbytes for level in self.levels)
+
+    def query(self, zoom: int, bbox: Optional[Tuple[float, float, float, float]] = None
+              ) -> Tuple[int, List[Dict[str, Any]], List[int]]:
+        """
+        Clusters de um zoom cujas células tocam a caixa delimitadora
+
+        Args:
+            zoom: Zoom do mapa (acima de max_zoom usa os clusters de max_zoom)
+            bbox: (oeste, sul, leste, norte) em graus; None = todos
+
+        Returns:
+            Tupla (zoom dos clusters, clusters, posição da zona de cada cluster
+            unitário ou -1). Cada cluster traz 'count', 'latitude', 'longitude'
+            (centroide) e 'classificacao' (a mais grave entre suas zonas).
+
+        Raises:
+            ValueError: se o zoom for negativo
+        """
+        if zoom < 0:
+            raise ValueError('Zoom deve ser maior ou igual a 0')
+        zoom = min(zoom, self.max_zoom)
+        level = self.levels[zoom]
+
+        selected = slice(None)
+        if bbox is not None:
+            west, south, east, north = bbox
+            grid_zoom = zoom + self.grid_levels
+            (x0, x1), (y1, y0) = tile_coordinates([south, north], [west, east], grid_zoom)
+            selected = np.flatnonzero((level.x >= x0) & (level.x <= x1) & (level.y >= y0) & (level.y <= y1))
+
+        labels = CLASSIFICATIONS + (None,)
+        counts = level.count[selected]
+        singles = np.where(counts == 1, self._positions[level.first[selected]], -1)
+        clusters = [
+            {
+                'count': count,
+                'latitude': round(latitude, 6),
+                'longitude': round(longitude, 6),
+                'classificacao': labels[worst]
+            }
+            for count, latitude, longitude, worst in zip(
+                counts.tolist(), level.latitude[selected].tolist(),
+                level.longitude[selected].tolist(), level.worst[selected].tolist()
+            )
+        ]
+        return zoom, clusters, singles.tolist()
+
+
+def _reduce(ufunc: np.ufunc, values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """ufunc.reduceat sobre trechos contíguos (aceita nenhum trecho)"""
+    return ufunc.reduceat(values, starts) if len(starts) else values[:0]
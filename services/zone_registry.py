@@ -0,0 +1,184 @@
+"""
+Registro de Serviços de Zonas por Cidade
+Sistema Clima Vida - NASA Space Apps Hackathon
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Any, Optional, Tuple
+from services.zone_service import ZoneService
+from services.shared_dataset import attach_dataset
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ZoneRegistry:
+    """
+    Mantém um ZoneService por cidade, carregado sob demanda
+
+    As cidades carregadas ficam em ordem LRU; quando o uso estimado de memória
+    passa do orçamento, as menos usadas recentemente são descartadas (exceto as
+    fixadas e a que acabou de ser carregada).
+
+    Cidades publicadas por um processo pai (SharedDatasetPublisher) são
+    anexadas em vez de lidas do CSV.
+    """
+
+    def __init__(self, city_files: Dict[str, str], memory_budget_bytes: int,
+                 pinned: Iterable[str] = (), shared_datasets: Optional[Dict[str, str]] = None,
+                 observation_files: Optional[Dict[str, str]] = None):
+        """
+        Inicializa o registro
+
+        Args:
+            city_files: Mapeamento cidade -> caminho do CSV
+            memory_budget_bytes: Orçamento de memória para as cidades carregadas
+            pinned: Cidades que nunca são descartadas
+            shared_datasets: Mapeamento cidade -> diretório publicado pelo processo pai
+            observation_files: Mapeamento cidade -> CSV de observações datadas
+        """
+        self.city_files = dict(city_files)
+        self.shared_datasets = dict(shared_datasets or {})
+        self.observation_files = dict(observation_files or {})
+        self.memory_budget_bytes = memory_budget_bytes
+        self.pinned = set(pinned)
+        self._services: "OrderedDict[str, ZoneService]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._thresholds: Dict[str, Tuple[float, float]] = {}
+
+    def has_city(self, city: str) -> bool:
+        """Indica se a cidade está configurada"""
+        return city in self.city_files
+
+    def cities(self) -> List[Dict[str, Any]]:
+        """
+        Lista as cidades configuradas e seu estado de carga
+
+        Returns:
+            Lista de dicionários com 'city', 'loaded' e 'memory_bytes'
+        """
+        with self._lock:
+            loaded = dict(self._services)
+        return [
+            {
+                'city': city,
+                'loaded': city in loaded,
+                'memory_bytes': loaded[city].memory_usage() if city in loaded else 0
+            }
+            for city in self.city_files
+        ]
+
+    def get(self, city: str) -> ZoneService:
+        """
+        Retorna o serviço da cidade, carregando-o na primeira requisição
+
+        Cargas de cidades diferentes acontecem em paralelo; requisições
+        simultâneas para a mesma cidade aguardam uma única carga.
+
+        Args:
+            city: Identificador da cidade
+
+        Returns:
+            Serviço de zonas da cidade
+
+        Raises:
+            KeyError: se a cidade não estiver configurada
+        """
+        if city not in self.city_files:
+            raise KeyError(city)
+
+        with self._lock:
+            service = self._services.get(city)
+            if service is not None:
+                self._services.move_to_end(city)
+                return service
+            load_lock = self._load_locks.setdefault(city, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                service = self._services.get(city)
+                if service is not None:
+                    self._services.move_to_end(city)
+                    return service
+
+            logger.info(f"Carregando cidade sob demanda: {city}")
+            shared_path = self.shared_datasets.get(city)
+            dataset = attach_dataset(shared_path) if shared_path else None
+            service = ZoneService(self.city_files[city], dataset=dataset,
+                                  thresholds=self._thresholds.get(city),
+                                  observations_file=self.observation_files.get(city))
+            self.register(city, service)
+            return service
+
+    def register(self, city: str, service: ZoneService) -> None:
+        """
+        Registra um serviço já carregado e aplica o orçamento de memória
+
+        Args:
+            city: Identificador da cidade
+            service: Serviço de zonas da cidade
+        """
+        with self._lock:
+            self._services[city] = service
+            self._services.move_to_end(city)
+            self._enforce_budget(keep=city)
+
+    def set_thresholds(self, city: str, critical_threshold: float, medium_threshold: float) -> ZoneService:
+        """
+        Altera os limiares de classificação da cidade
+
+        O serviço é carregado (se preciso) e reclassificado; os limiares
+        continuam valendo se a cidade for descartada e carregada de novo.
+
+        Returns:
+            Serviço de zonas da cidade, já reclassificado
+
+        Raises:
+            KeyError: se a cidade não estiver configurada
+            ValueError: se o limiar médio não for menor que o crítico
+        """
+        service = self.get(city)
+        service.set_thresholds(critical_threshold, medium_threshold)
+        with self._lock:
+            self._thresholds[city] = (service.critical_threshold, service.medium_threshold)
+        return service
+
+    def evict(self, city: str) -> bool:
+        """
+        Descarta a cidade da memória
+
+        Returns:
+            True se a cidade estava carregada
+        """
+        with self._lock:
+            return self._services.pop(city, None) is not None
+
+    def loaded_services(self) -> List[ZoneService]:
+        """Retorna os serviços das cidades carregadas no momento"""
+        with self._lock:
+            return list(self._services.values())
+
+    def loaded_cities(self) -> Dict[str, ZoneService]:
+        """Retorna cidade -> serviço das cidades carregadas no momento"""
+        with self._lock:
+            return dict(self._services)
+
+    def memory_usage(self) -> int:
+        """Retorna o uso de memória estimado (bytes) das cidades carregadas"""
+        with self._lock:
+            return sum(service.memory_usage() for service in self._services.values())
+
+    def _enforce_budget(self, keep: str) -> None:
+        """Descarta as cidades menos usadas até caber no orçamento (chamado com o lock)"""
+        usage = {city: service.memory_usage() for city, service in self._services.items()}
+        total = sum(usage.values())
+
+        for city in list(self._services):
+            if total <= self.memory_budget_bytes:
+                break
+            if city == keep or city in self.pinned:
+                continue
+            del self._services[city]
+            total -= usage[city]
+            logger.info(f"Cidade descartada por orçamento de memória: {city}")
@@ -3,11 +3,32 @@ Serviço de Processamento de Zonas de Calor Urbano
 Sistema Clima Vida - NASA Space Apps Hackathon
 """
 
+import hashlib
+import itertools
+import json
+import math
+import os
+import sys
+import threading
+import time
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass
+from typing import Dict, Iterator, List, Any, Mapping, Optional, Sequence, Tuple, Union
+from collections import ChainMap
+from contextlib import contextmanager
+from pandas.api.types import union_categoricals
+from dataclasses import dataclass, replace
 from config import Config
+from utils.columnar import LazyRecords, frame_to_records
+from utils.classification import classify_criticity
+from services.aggregate_cube import CUBE_DIMENSIONS, AggregateCube
+from services.spatial_index import SpatialGridIndex
+from services.tile_pyramid import TilePyramid
+from services.zone_clusters import ZoneClusters
+from services.observation_store import OBSERVATION_COLUMNS, OBSERVATION_MEASURES, ObservationStore, parse_day
+from services.data_cache import CACHE_FORMAT_VERSION, CachedDataset, ColumnarCache, source_cache_key
+from services.metrics import METRICS, gauge
+from services.profiling import PhaseTimer, note_phases
 import logging
 
 # Configurar logging
@@ -40,175 +61,1114 @@ class ZoneStatistics:
     avg_ndvi: float
     avg_criticity: float
 
+@dataclass(frozen=True)
+class ZoneAggregates:
+    """
+    Somas e contagens que sustentam as estatísticas gerais
+    
+    Como guarda somas (e não médias), pode ser atualizado por diferença:
+    basta somar as linhas novas e subtrair as removidas.
+    """
+    total_zones: int
+    class_counts: Dict[str, int]
+    sum_temperature: float
+    count_temperature: int
+    sum_ndvi: float
+    count_ndvi: int
+    sum_criticity: float
+    count_criticity: int
+    
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame) -> 'ZoneAggregates':
+        """
+        Calcula as somas e contagens de um DataFrame processado (valores nulos são ignorados)
+        """
+        if data is None or data.empty:
+            return cls(0, {}, 0.0, 0, 0.0, 0, 0.0, 0)
+        
+        return cls.from_arrays(
+            data['temperatura'].to_numpy(dtype=np.float64),
+            data['ndvi'].to_numpy(dtype=np.float64),
+            data['indice_criticidade'].to_numpy(dtype=np.float64),
+            {str(k): int(v) for k, v in data['classificacao'].value_counts().items()}
+        )
+    
+    @classmethod
+    def from_arrays(cls, temperature: np.ndarray, ndvi: np.ndarray, criticity: np.ndarray,
+                    class_counts: Dict[str, int]) -> 'ZoneAggregates':
+        """
+        Calcula as somas e contagens a partir das colunas em arrays (valores nulos são ignorados)
+        """
+        sums = []
+        for values in (temperature, ndvi, criticity):
+            valid = ~np.isnan(values)
+            sums.append((float(values[valid].sum()), int(valid.sum())))
+        
+        return cls(
+            total_zones=len(temperature),
+            class_counts={k: v for k, v in class_counts.items() if v},
+            sum_temperature=sums[0][0],
+            count_temperature=sums[0][1],
+            sum_ndvi=sums[1][0],
+            count_ndvi=sums[1][1],
+            sum_criticity=sums[2][0],
+            count_criticity=sums[2][1]
+        )
+    
+    def apply_delta(self, added: 'ZoneAggregates', removed: 'ZoneAggregates') -> 'ZoneAggregates':
+        """
+        Retorna novos agregados somando as linhas adicionadas e subtraindo as removidas
+        """
+        class_counts = dict(self.class_counts)
+        for classification, count in added.class_counts.items():
+            class_counts[classification] = class_counts.get(classification, 0) + count
+        for classification, count in removed.class_counts.items():
+            class_counts[classification] = class_counts.get(classification, 0) - count
+        
+        return ZoneAggregates(
+            total_zones=self.total_zones + added.total_zones - removed.total_zones,
+            class_counts={k: v for k, v in class_counts.items() if v},
+            sum_temperature=self.sum_temperature + added.sum_temperature - removed.sum_temperature,
+            count_temperature=self.count_temperature + added.count_temperature - removed.count_temperature,
+            sum_ndvi=self.sum_ndvi + added.sum_ndvi - removed.sum_ndvi,
+            count_ndvi=self.count_ndvi + added.count_ndvi - removed.count_ndvi,
+            sum_criticity=self.sum_criticity + added.sum_criticity - removed.sum_criticity,
+            count_criticity=self.count_criticity + added.count_criticity - removed.count_criticity
+        )
+    
+    def to_statistics(self) -> ZoneStatistics:
+        """
+        Converte as somas em estatísticas (médias)
+        """
+        if self.total_zones == 0:
+            return ZoneStatistics(0, 0, 0, 0, 0.0, 0.0, 0.0)
+        
+        def mean(total: float, count: int) -> float:
+            return total / count if count else float('nan')
+        
+        return ZoneStatistics(
+            total_zones=self.total_zones,
+            critical_zones=self.class_counts.get('Crítica', 0),
+            medium_zones=self.class_counts.get('Média', 0),
+            safe_zones=self.class_counts.get('Segura', 0),
+            avg_temperature=mean(self.sum_temperature, self.count_temperature),
+            avg_ndvi=mean(self.sum_ndvi, self.count_ndvi),
+            avg_criticity=mean(self.sum_criticity, self.count_criticity)
+        )
+
+@dataclass(frozen=True)
+class EncodedPayload:
+    """
+    Resposta JSON pré-codificada com sua ETag forte
+    
+    O corpo é um memoryview quando vem de dados compartilhados mapeados em
+    memória (ver services.data_cache.load_dataset).
+    """
+    body: Union[bytes, memoryview]
+    etag: str
+
+def encode_payload(data: Any) -> EncodedPayload:
+    """
+    Codifica dados em JSON compacto (UTF-8) e calcula a ETag pelo conteúdo
+    
+    Args:
+        data: Estrutura serializável em JSON
+    
+    Returns:
+        Payload codificado com ETag derivada do hash do corpo
+    """
+    body = json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return EncodedPayload(body=body, etag=hashlib.blake2b(body, digest_size=16).hexdigest())
+
+def derive_content_id(parent: str, change: Any) -> str:
+    """
+    Identificador do conteúdo de um snapshot derivado de outro por uma alteração
+    
+    A mesma alteração aplicada ao mesmo conteúdo gera o mesmo identificador
+    em qualquer processo, sem codificar as zonas.
+    
+    Args:
+        parent: content_id do snapshot de origem
+        change: Descrição serializável em JSON da alteração aplicada
+    """
+    body = json.dumps([parent, change], ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.blake2b(body.encode('utf-8'), digest_size=16).hexdigest()
+
+@dataclass(frozen=True)
+class ZoneSnapshot:
+    """
+    Versão imutável dos dados processados e de tudo que deriva deles
+    
+    Um snapshot é montado por completo antes de ser publicado; depois disso
+    nenhum de seus campos é alterado. Leitores pegam a referência uma vez e
+    trabalham sobre um estado consistente mesmo durante uma recarga.
+    
+    ``views`` guarda estruturas espaciais derivadas (pirâmide de tiles, clusters):
+    montadas na carga e, em snapshots derivados por alteração, no primeiro uso.
+    
+    ``content_id`` identifica o conteúdo entre processos (ex.: chave dos
+    relatórios): é a ETag do payload de zonas quando ele é codificado na
+    montagem e, em snapshots derivados, derive_content_id da origem e da
+    alteração. ``version`` só é única dentro do processo.
+    
+    ``thresholds`` são os limiares (crítico, médio) com que ``data`` foi
+    classificado; quem classifica outros valores contra o snapshot (ex.:
+    cenários) deve usá-los, e não os do serviço, que podem já ser de outra
+    versão.
+    """
+    version: int
+    content_id: str
+    thresholds: Tuple[float, float]
+    data: pd.DataFrame
+    aggregates: ZoneAggregates
+    statistics: ZoneStatistics
+    cube: AggregateCube
+    zones: LazyRecords
+    id_index: Mapping[Any, int]
+    spatial_index: SpatialGridIndex
+    sort_orders: Dict[str, Optional[Tuple[np.ndarray, int]]]
+    encoded: Dict[str, EncodedPayload]
+    views: Dict[str, Any]
+
+# Caches preenchidos sob demanda em cada snapshot (payloads, visões, ordenações)
+ZONE_CACHE_LOOKUPS = METRICS.counter(
+    'zone_cache_lookups', 'Consultas aos caches derivados do snapshot de zonas', ('cache', 'result')
+)
+ZONE_RELOADS = METRICS.counter(
+    'zone_reloads', 'Cargas e recargas dos dados de zonas', ('source', 'kind', 'result')
+)
+ZONE_RELOAD_SECONDS = METRICS.histogram(
+    'zone_reload_duration_seconds', 'Duração das cargas e recargas bem-sucedidas', ('source', 'kind')
+)
+ZONE_LOAD_PHASE_SECONDS = METRICS.histogram(
+    'zone_load_phase_duration_seconds', 'Duração de cada fase da carga completa dos dados', ('source', 'phase')
+)
+ZONE_CACHES = ('payload', 'aggregates', 'view', 'sort_order')
+
+
+def _collect_cache_ratios():
+    """Taxa de acerto de cada cache do snapshot (para /metrics)"""
+    def ratio(cache):
+        hits, misses = ZONE_CACHE_LOOKUPS.value(cache, 'hit'), ZONE_CACHE_LOOKUPS.value(cache, 'miss')
+        return hits / (hits + misses) if hits + misses else None
+
+    return [gauge('zone_cache_hit_ratio', 'Taxa de acerto dos caches derivados do snapshot',
+                  [({'cache': cache}, ratio(cache)) for cache in ZONE_CACHES])]
+
+
+METRICS.register_collector('zone_cache_hit_ratio', _collect_cache_ratios)
+
+# Valores padrão dos registros da API para colunas ausentes no CSV
+RECORD_DEFAULTS = {'regiao': 'São Paulo'}
+
+# Registros do relatório PDF: colunas renomeadas e esquema (coluna, conversor)
+REPORT_COLUMN_NAMES = {'nome': 'bairro', 'densidade_populacional': 'densidade', 'indice_criticidade': 'criticidade'}
+REPORT_RECORD_SCHEMA = (
+    ('bairro', str),
+    ('regiao', str),
+    ('temperatura', float),
+    ('ndvi', float),
+    ('densidade', int),
+    ('criticidade', float),
+    ('classificacao', str),
+)
+REPORT_SOURCE_COLUMNS = ('nome', 'regiao', 'temperatura', 'ndvi',
+                         'densidade_populacional', 'indice_criticidade', 'classificacao')
+
+
+def append_rows(data: pd.DataFrame, rows: pd.DataFrame) -> pd.DataFrame:
+    """
+    Acrescenta linhas ao fim de um DataFrame processado, coluna a coluna
+    
+    Colunas de texto compartilhadas (Categorical, ver services.data_cache)
+    continuam categóricas: as categorias novas entram no fim, sem converter
+    a coluna inteira em objetos.
+    
+    Args:
+        data: DataFrame atual (não é alterado)
+        rows: Linhas novas, com as mesmas colunas
+    
+    Returns:
+        Novo DataFrame com índice 0..n-1
+    """
+    columns = {}
+    for column in data.columns:
+        current, added = data[column], rows[column]
+        if isinstance(current.dtype, pd.CategoricalDtype):
+            added = pd.Categorical(added.astype(current.dtype.categories.dtype))
+            columns[column] = union_categoricals([current.array, added])
+        else:
+            columns[column] = pd.concat([current, added], ignore_index=True)
+    return pd.DataFrame(columns, copy=False)
+
+def replace_values(column: pd.Series, positions: np.ndarray, values: np.ndarray) -> Any:
+    """
+    Cópia de uma coluna com os valores de algumas posições substituídos
+    
+    A cópia é do array da coluna, no tipo dela: colunas categóricas copiam só
+    os códigos (categorias novas entram no fim) e colunas inteiras passam a
+    float se receberem decimais.
+    
+    Args:
+        column: Coluna atual (não é alterada)
+        positions: Posições das linhas substituídas
+        values: Valores novos, na ordem de ``positions``
+    
+    Returns:
+        Array para a coluna da nova versão
+    """
+    values = np.asarray(values)
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        current = column.array
+        categories = current.categories
+        added = [value for value in pd.unique(values) if value not in categories]
+        if added:
+            categories = categories.append(pd.Index(added, dtype=categories.dtype))
+        codes = current.codes.copy()
+        codes[positions] = categories.get_indexer(values)
+        return pd.Categorical.from_codes(codes, dtype=pd.CategoricalDtype(categories))
+    
+    if pd.api.types.is_integer_dtype(column.dtype) and values.dtype.kind == 'f':
+        array = column.to_numpy(dtype=np.float64)
+    elif isinstance(column.dtype, np.dtype):
+        array = column.to_numpy(copy=True)
+    else:
+        array = column.array.copy()
+    array[positions] = values
+    return array
+
+def values_differ(current: pd.Series, updated: pd.Series) -> bool:
+    """Indica se duas colunas alinhadas têm algum valor diferente (nulos em ambas contam como iguais)"""
+    current, updated = current.to_numpy(), updated.to_numpy()
+    both_null = pd.isna(current) & pd.isna(updated)
+    return bool(((current != updated) & ~both_null).any())
+
+# Camadas de alterações da API de escrita (registros, ids e pontos fora da
+# grade espacial): compactadas a partir de ~raiz do total de zonas, de modo
+# que cada escrita copia no máximo isso e a compactação (O(n)) é rara
+OVERLAY_MIN_SIZE = 1024
+
+def overlay_limit(size: int) -> int:
+    """Tamanho máximo de uma camada de alterações sobre ``size`` zonas"""
+    return max(OVERLAY_MIN_SIZE, math.isqrt(size))
+
+def iter_report_records(report: pd.DataFrame,
+                        chunk_rows: int = Config.REPORT_DATA_CHUNK_ROWS) -> Iterator[Dict[str, Any]]:
+    """
+    Gera os registros do relatório sob demanda, convertendo um lote de linhas por vez
+
+    Args:
+        report: Colunas do relatório já ordenadas (ver ZoneService.get_report_frame)
+        chunk_rows: Linhas convertidas para dicionários de cada vez
+
+    Yields:
+        Registros no formato de REPORT_RECORD_SCHEMA
+    """
+    for start in range(0, len(report), chunk_rows):
+        chunk = report.iloc[start:start + chunk_rows]
+        yield from frame_to_records(chunk, REPORT_RECORD_SCHEMA, defaults=RECORD_DEFAULTS)
+
+# Colunas obrigatórias do CSV e colunas convertidas para número na validação
+REQUIRED_COLUMNS = ('id', 'nome', 'latitude', 'longitude', 'temperatura', 'ndvi', 'densidade_populacional')
+NUMERIC_COLUMNS = ('latitude', 'longitude', 'temperatura', 'ndvi', 'densidade_populacional')
+
+# Colunas calculadas pelo serviço (não vêm do CSV)
+DERIVED_COLUMNS = ('indice_criticidade', 'classificacao', 'cor')
+
+# Colunas que a API de escrita pode alterar (o id identifica a zona)
+WRITABLE_COLUMNS = REQUIRED_COLUMNS[1:] + ('regiao',)
+
+# Colunas aceitas para ordenação e para filtros por faixa numérica
+SORTABLE_COLUMNS = ('id', 'nome', 'regiao', 'temperatura', 'ndvi',
+                    'densidade_populacional', 'indice_criticidade', 'classificacao')
+RANGE_FILTER_COLUMNS = ('temperatura', 'ndvi', 'densidade_populacional', 'indice_criticidade')
+
 class ZoneService:
     """
     Serviço responsável pelo processamento e análise de dados de zonas de calor urbano
+    
+    O estado processado vive num ZoneSnapshot publicado por troca atômica de
+    referência, o que permite recarregar os dados enquanto requisições em
+    outras threads continuam lendo a versão anterior.
     """
     
-    def __init__(self, csv_file: str = None):
+    def __init__(self, csv_file: str = None, dataset: Optional[CachedDataset] = None,
+                 thresholds: Optional[Tuple[float, float]] = None,
+                 observations_file: Optional[str] = None):
         """
         Inicializa o serviço de zonas
         
         Args:
             csv_file: Caminho para o arquivo CSV (opcional, usa Config por padrão)
+            dataset: Dados já processados (ex.: publicados pelo processo pai);
+                quando informado, o CSV não é lido
+            thresholds: Limiares (crítico, médio) de classificação; padrão do Config
+            observations_file: CSV de observações datadas das zonas (séries
+                históricas), lido no primeiro acesso
         """
         self.csv_file = csv_file or Config.CSV_FILE_PATH
-        self._data: Optional[pd.DataFrame] = None
-        self._statistics: Optional[ZoneStatistics] = None
-        self._zones_cache: Optional[List[ZoneData]] = None
+        self.critical_threshold = Config.CRITICAL_THRESHOLD
+        self.medium_threshold = Config.MEDIUM_THRESHOLD
+        self._snapshot: Optional[ZoneSnapshot] = None
+        self._versions = itertools.count(1)
+        
+        # Assinatura (mtime, tamanho) e colunas do arquivo que originou o snapshot atual
+        self._source_signature: Optional[Tuple[int, int]] = None
+        self._source_columns: Tuple[str, ...] = ()
+        
+        # Serializa as recargas; leituras nunca esperam por este lock
+        self._write_lock = threading.Lock()
+        
+        # Séries históricas, carregadas sob demanda (ver a propriedade observations)
+        self.observations_file = observations_file
+        self._observations: Optional[ObservationStore] = None
+        self._observations_lock = threading.Lock()
         
         # Carrega e processa dados na inicialização
-        self._load_and_process_data()
+        if dataset is not None:
+            self._load_from_dataset(dataset)
+            if thresholds is not None:
+                self.set_thresholds(*thresholds)
+        else:
+            if thresholds is not None:
+                self.critical_threshold, self.medium_threshold = thresholds
+            self._load_and_process_data()
+    
+    @property
+    def snapshot(self) -> ZoneSnapshot:
+        """Snapshot publicado atualmente"""
+        return self._snapshot
+    
+    @property
+    def version(self) -> int:
+        """Número de versão (monotônico) dos dados publicados"""
+        return self._snapshot.version
+    
+    @contextmanager
+    def _track_reload(self, kind: str) -> Iterator[None]:
+        """
+        Registra nas métricas a duração e o resultado de uma carga ou alteração dos dados
+        
+        Args:
+            kind: 'load' (CSV ou cache colunar), 'shared', 'incremental',
+                'thresholds' ou 'changes'
+        """
+        source = os.path.basename(self.csv_file)
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            ZONE_RELOADS.inc(source, kind, 'error')
+            raise
+        ZONE_RELOADS.inc(source, kind, 'ok')
+        ZONE_RELOAD_SECONDS.observe(time.perf_counter() - start, source, kind)
     
     def _load_and_process_data(self) -> None:
         """
         Carrega e processa os dados do CSV
+        
+        Todo o processamento acontece num DataFrame novo; o snapshot resultante
+        só é publicado no final, substituindo o anterior de uma vez.
         """
-        try:
-            logger.info(f"Carregando dados de: {self.csv_file}")
-            self._data = pd.read_csv(self.csv_file)
-            
-            # Validação básica dos dados
-            self._validate_data()
-            
-            # Processa os dados
-            self._process_data()
-            
-            # Calcula estatísticas
-            self._calculate_statistics()
+        with self._write_lock, self._track_reload('load'):
+            timer = PhaseTimer()
+            try:
+                logger.info(f"Carregando dados de: {self.csv_file}")
+                with timer.phase('cache_lookup'):
+                    signature = self._read_source_signature()
+                    cache = self._source_cache()
+                    cached = cache.load() if cache is not None else None
+                
+                if cached is not None:
+                    # Colunas já processadas, abertas do cache binário sem parsing
+                    data, source_columns = cached.data, cached.source_columns
+                    logger.info(f"Dados lidos do cache colunar: {cache.path}")
+                    with timer.phase('snapshot'):
+                        self._publish(self._snapshot_from_cache(cached))
+                else:
+                    with timer.phase('read_csv'):
+                        data = pd.read_csv(self.csv_file)
+                        source_columns = tuple(data.columns)
+                    
+                    # Validação básica dos dados
+                    with timer.phase('validate'):
+                        self._validate_data(data)
+                    
+                    # Processa os dados
+                    with timer.phase('process'):
+                        self._process_data(data)
+                    
+                    # Monta índices, estatísticas e caches e publica a nova versão
+                    with timer.phase('snapshot'):
+                        self._publish(self._build_snapshot(data))
+                    with timer.phase('cache_store'):
+                        self._store_in_cache(cache, signature, self._snapshot, source_columns)
+                
+                self._source_signature = signature
+                self._source_columns = source_columns
+                
+                self._record_load_phases(timer)
+                logger.info(f"Dados processados com sucesso: {len(data)} zonas (versão {self.version})")
             
-            # Limpa cache
-            self._zones_cache = None
-            
-            logger.info(f"Dados processados com sucesso: {len(self._data)} zonas")
-            
-        except FileNotFoundError:
-            logger.error(f"Arquivo CSV não encontrado: {self.csv_file}")
-            raise
-        except Exception as e:
-            logger.error(f"Erro ao processar dados: {e}")
-            raise
+            except FileNotFoundError:
+                logger.error(f"Arquivo CSV não encontrado: {self.csv_file}")
+                raise
+            except Exception as e:
+                logger.error(f"Erro ao processar dados: {e}")
+                raise
+    
+    def _record_load_phases(self, timer: PhaseTimer) -> None:
+        """
+        Registra as fases da carga nas métricas, no log e no perfil da requisição (se houver)
+        """
+        source = os.path.basename(self.csv_file)
+        for phase, seconds in timer.phases.items():
+            ZONE_LOAD_PHASE_SECONDS.observe(seconds, source, phase)
+        note_phases('zone_load', timer.phases)
+        logger.debug('Fases da carga: ' + ', '.join(f'{phase} {seconds * 1000:.1f} ms'
+                                                   for phase, seconds in timer.phases.items()))
+    
+    def _load_from_dataset(self, dataset: CachedDataset) -> None:
+        """
+        Publica um snapshot montado a partir de dados já processados
+        """
+        with self._write_lock, self._track_reload('shared'):
+            snapshot = self._snapshot_from_cache(dataset)
+            self._publish(snapshot)
+            self.critical_threshold, self.medium_threshold = snapshot.thresholds
+            signature = dataset.attrs.get('source_signature')
+            self._source_signature = tuple(signature) if signature else self._read_source_signature()
+            self._source_columns = dataset.source_columns
+            logger.info(f"Dados processados anexados: {len(dataset.data)} zonas (versão {self.version})")
     
-    def _validate_data(self) -> None:
+    def _build_snapshot(self, data: pd.DataFrame) -> ZoneSnapshot:
+        """
+        Monta um snapshot completo a partir de um DataFrame já processado
+        
+        Args:
+            data: DataFrame processado (não deve mais ser alterado)
+        
+        Returns:
+            Snapshot com nova versão, ainda não publicado
+        """
+        # Serialização colunar: converte cada coluna de uma vez em vez de
+        # montar um ZoneData por linha com iterrows
+        zones = frame_to_records(data, defaults=RECORD_DEFAULTS)
+        
+        return self._assemble_snapshot(
+            data, ZoneAggregates.from_frame(data), LazyRecords(data, defaults=RECORD_DEFAULTS, records=zones)
+        )
+    
+    def _snapshot_from_cache(self, cached: CachedDataset) -> ZoneSnapshot:
+        """
+        Monta um snapshot reaproveitando as ordenações e o payload de zonas do cache
+        
+        Os registros da API não são materializados: cada consulta monta apenas
+        as zonas que devolve, direto das colunas mapeadas.
+        """
+        data = cached.data
+        sort_orders = {
+            column: (cached.arrays[f'sort:{column}'], n_valid)
+            for column, n_valid in cached.attrs['sort_valid'].items()
+        }
+        zones_payload = EncodedPayload(cached.blobs['zones'], cached.attrs['zones_etag'])
+        thresholds = cached.attrs.get('thresholds')
+        
+        return self._assemble_snapshot(
+            data,
+            ZoneAggregates.from_frame(data),
+            LazyRecords(data, defaults=RECORD_DEFAULTS),
+            sort_orders=sort_orders,
+            zones_payload=zones_payload,
+            thresholds=tuple(thresholds) if thresholds else None
+        )
+    
+    def _assemble_snapshot(self, data: pd.DataFrame, aggregates: ZoneAggregates,
+                           zones: LazyRecords,
+                           sort_orders: Optional[Dict[str, Tuple[np.ndarray, int]]] = None,
+                           zones_payload: Optional[EncodedPayload] = None,
+                           cube: Optional[AggregateCube] = None,
+                           thresholds: Optional[Tuple[float, float]] = None) -> ZoneSnapshot:
+        """
+        Monta índices e payloads de um snapshot a partir de dados, agregados e registros prontos
+        
+        Ordenações, payload de zonas e cubo de agregados já calculados (ex.:
+        vindos do cache ou de uma recarga incremental) são reaproveitados.
+        Sem ``thresholds``, os dados foram classificados pelos limiares em uso.
+        """
+        statistics = aggregates.to_statistics()
+        if zones_payload is None:
+            zones_payload = encode_payload(zones.materialize())
+        
+        return ZoneSnapshot(
+            version=next(self._versions),
+            content_id=zones_payload.etag,
+            thresholds=thresholds or (self.critical_threshold, self.medium_threshold),
+            data=data,
+            aggregates=aggregates,
+            statistics=statistics,
+            cube=cube if cube is not None else AggregateCube.from_frame(data),
+            zones=zones,
+            id_index=self._build_id_index(data),
+            spatial_index=self._build_spatial_index(data),
+            sort_orders=sort_orders if sort_orders is not None else self._build_sort_orders(data),
+            encoded={
+                'zones': zones_payload,
+                'statistics': encode_payload(self.format_statistics(statistics))
+            },
+            views={
+                'tiles': self._build_tile_pyramid(data),
+                'clusters': self._build_zone_clusters(data)
+            }
+        )
+    
+    def _publish(self, snapshot: ZoneSnapshot) -> None:
+        """
+        Publica um snapshot (atribuição única de referência, atômica para leitores)
+        """
+        self._snapshot = snapshot
+    
+    def _validate_data(self, data: pd.DataFrame) -> None:
         """
         Valida a estrutura e conteúdo dos dados
         """
-        required_columns = ['id', 'nome', 'latitude', 'longitude', 'temperatura', 'ndvi', 'densidade_populacional']
+        required_columns = list(REQUIRED_COLUMNS)
         
         # Verifica colunas obrigatórias
-        missing_columns = [col for col in required_columns if col not in self._data.columns]
+        missing_columns = [col for col in required_columns if col not in data.columns]
         if missing_columns:
             raise ValueError(f"Colunas obrigatórias ausentes: {missing_columns}")
         
         # Verifica dados nulos
-        null_counts = self._data[required_columns].isnull().sum()
+        null_counts = data[required_columns].isnull().sum()
         if null_counts.any():
             logger.warning(f"Dados nulos encontrados: {null_counts.to_dict()}")
         
         # Verifica tipos de dados
-        numeric_columns = ['latitude', 'longitude', 'temperatura', 'ndvi', 'densidade_populacional']
-        for col in numeric_columns:
-            if col in self._data.columns:
+        for col in NUMERIC_COLUMNS:
+            if col in data.columns:
                 try:
-                    self._data[col] = pd.to_numeric(self._data[col], errors='coerce')
+                    data[col] = pd.to_numeric(data[col], errors='coerce')
                 except Exception as e:
                     logger.warning(f"Erro ao converter coluna {col} para numérico: {e}")
     
-    def _process_data(self) -> None:
+    def _process_data(self, data: pd.DataFrame) -> None:
         """
         Processa os dados calculando métricas e classificações
         """
         # Calcula índice de criticidade
-        self._data['indice_criticidade'] = (
-            self._data['temperatura'] - (self._data['ndvi'] * 10)
+        data['indice_criticidade'] = (
+            data['temperatura'] - (data['ndvi'] * 10)
         )
         
-        # Classifica as zonas
-        self._data['classificacao'] = self._data['indice_criticidade'].apply(self._classify_zone)
-        
-        # Define cores baseadas na classificação
-        color_mapping = {
-            'Crítica': Config.COLORS['critical'],
-            'Média': Config.COLORS['medium'],
-            'Segura': Config.COLORS['safe']
-        }
-        self._data['cor'] = self._data['classificacao'].map(color_mapping)
+        # Classifica as zonas e define as cores
+        self._classify(data)
         
         # Adiciona região padrão se não existir
-        if 'regiao' not in self._data.columns:
-            self._data['regiao'] = 'São Paulo'
+        if 'regiao' not in data.columns:
+            data['regiao'] = 'São Paulo'
     
-    def _classify_zone(self, index: float) -> str:
+    def _classify(self, data: pd.DataFrame, thresholds: Optional[Tuple[float, float]] = None) -> None:
         """
-        Classifica uma zona baseada no índice de criticidade
+        Classifica e colore as zonas pelo índice de criticidade (uma passada vetorizada)
         
         Args:
-            index: Índice de criticidade
+            data: DataFrame com 'indice_criticidade' (alterado no lugar)
+            thresholds: Limiares (crítico, médio); padrão: os em uso
+        """
+        critical_threshold, medium_threshold = thresholds or (self.critical_threshold, self.medium_threshold)
+        data['classificacao'], data['cor'] = classify_criticity(
+            data['indice_criticidade'], critical_threshold, medium_threshold
+        )
+    
+    @property
+    def thresholds(self) -> Dict[str, float]:
+        """Limiares de classificação em uso (os do snapshot publicado)"""
+        critical_threshold, medium_threshold = self._snapshot.thresholds
+        return {'critical_threshold': critical_threshold, 'medium_threshold': medium_threshold}
+    
+    def set_thresholds(self, critical_threshold: float, medium_threshold: float) -> bool:
+        """
+        Altera os limiares de classificação, reclassificando o snapshot atual
+        
+        O CSV não é relido: só as colunas de classificação e cor são
+        recalculadas a partir do índice já existente. Índices, ordenações das
+        demais colunas e colunas originais são compartilhados com a versão
+        anterior.
+        
+        Args:
+            critical_threshold: Índice acima do qual a zona é 'Crítica'
+            medium_threshold: Índice acima do qual a zona é 'Média'
+        
+        Returns:
+            True se uma nova versão foi publicada
+        
+        Raises:
+            ValueError: se o limiar médio não for menor que o crítico
+        """
+        critical_threshold, medium_threshold = float(critical_threshold), float(medium_threshold)
+        if not np.isfinite([critical_threshold, medium_threshold]).all() or medium_threshold >= critical_threshold:
+            raise ValueError('O limiar médio deve ser menor que o crítico')
+        
+        if (critical_threshold, medium_threshold) == (self.critical_threshold, self.medium_threshold):
+            return False
+        
+        with self._write_lock, self._track_reload('thresholds'):
+            if (critical_threshold, medium_threshold) == (self.critical_threshold, self.medium_threshold):
+                return False
+            
+            # Os limiares do serviço só mudam junto com a publicação: se a
+            # montagem falhar, continuam valendo os da versão atual
+            old = self._snapshot
+            data = old.data.copy(deep=False)
+            if not data.empty:
+                self._classify(data, (critical_threshold, medium_threshold))
             
+            aggregates = ZoneAggregates.from_frame(data)
+            statistics = aggregates.to_statistics()
+            zones = LazyRecords(data, defaults=RECORD_DEFAULTS)
+            sort_orders = dict(old.sort_orders)
+            if 'classificacao' in sort_orders:
+                # Recalculada na primeira consulta ordenada por classificação
+                sort_orders['classificacao'] = None
+            
+            snapshot = replace(
+                old,
+                version=next(self._versions),
+                content_id=derive_content_id(old.content_id, {'thresholds': [critical_threshold, medium_threshold]}),
+                thresholds=(critical_threshold, medium_threshold),
+                data=data,
+                aggregates=aggregates,
+                statistics=statistics,
+                cube=AggregateCube.from_frame(data),
+                zones=zones,
+                sort_orders=sort_orders,
+                encoded={'statistics': encode_payload(self.format_statistics(statistics))},
+                views={}
+            )
+            self._publish(snapshot)
+            self.critical_threshold, self.medium_threshold = critical_threshold, medium_threshold
+            logger.info(
+                f"Limiares alterados (crítico > {critical_threshold}, médio > {medium_threshold}): "
+                f"versão {snapshot.version}"
+            )
+            return True
+    
+    def get_encoded_payload(self, name: str, snapshot: Optional[ZoneSnapshot] = None) -> EncodedPayload:
+        """
+        Retorna uma resposta JSON pré-codificada da versão atual dos dados
+        
+        Snapshots reclassificados (set_thresholds) são publicados sem o
+        payload de zonas, que custa mais que a própria reclassificação; ele é
+        codificado na primeira vez que for pedido.
+        
+        Args:
+            name: Nome do payload ('zones' ou 'statistics')
+            snapshot: Snapshot de origem (padrão: o publicado atualmente)
+        
         Returns:
-            Classificação da zona (Crítica, Média, Segura)
+            Corpo em bytes e ETag correspondente
         """
-        if pd.isna(index):
-            return 'Segura'
+        snapshot = snapshot or self._snapshot
+        payload = snapshot.encoded.get(name)
+        ZONE_CACHE_LOOKUPS.inc('payload', 'miss' if payload is None else 'hit')
+        if payload is None and name == 'zones':
+            payload = snapshot.encoded.setdefault(name, encode_payload(snapshot.zones.materialize()))
+        return snapshot.encoded[name] if payload is None else payload
+
+    def get_aggregates_payload(self, group_by: Sequence[str] = CUBE_DIMENSIONS,
+                               snapshot: Optional[ZoneSnapshot] = None) -> EncodedPayload:
+        """
+        Retorna o cubo de agregados por região e classificação, pré-codificado
+
+        As somas do cubo são calculadas junto com o snapshot; cada roll-up é
+        codificado na primeira vez que for pedido e guardado no próprio snapshot.
+
+        Args:
+            group_by: Dimensões mantidas ('regiao', 'classificacao'); vazio = total geral
+            snapshot: Snapshot de origem (padrão: o publicado atualmente)
+
+        Returns:
+            Corpo em bytes (com 'group_by' e 'cells') e ETag correspondente
+
+        Raises:
+            ValueError: se alguma dimensão for desconhecida
+        """
+        unknown = [dimension for dimension in group_by if dimension not in CUBE_DIMENSIONS]
+        if unknown:
+            raise ValueError(f'Dimensões desconhecidas: {unknown}')
+
+        snapshot = snapshot or self._snapshot
+        group_by = [dimension for dimension in CUBE_DIMENSIONS if dimension in group_by]
+        name = 'aggregates:' + ','.join(group_by)
+        payload = snapshot.encoded.get(name)
+        ZONE_CACHE_LOOKUPS.inc('aggregates', 'miss' if payload is None else 'hit')
+        if payload is None:
+            payload = snapshot.encoded.setdefault(name, encode_payload({
+                'group_by': group_by,
+                'cells': snapshot.cube.rollup(group_by)
+            }))
+        return payload
+
+    def get_all_zones(self) -> List[Dict[str, Any]]:
+        """
+        Retorna dados de todas as zonas formatados para API
         
-        if index > Config.CRITICAL_THRESHOLD:
-            return 'Crítica'
-        elif index > Config.MEDIUM_THRESHOLD:
-            return 'Média'
-        else:
-            return 'Segura'
+        Returns:
+            Lista de dicionários com dados das zonas
+        """
+        return list(self._snapshot.zones)
     
-    def _calculate_statistics(self) -> None:
+    def _build_spatial_index(self, data: pd.DataFrame) -> SpatialGridIndex:
         """
-        Calcula estatísticas gerais das zonas
+        Constrói o índice espacial sobre latitude/longitude das zonas
+        
+        Returns:
+            Índice de grade uniforme
         """
-        if self._data is None or self._data.empty:
-            self._statistics = ZoneStatistics(0, 0, 0, 0, 0.0, 0.0, 0.0)
-            return
+        if data is None or data.empty:
+            return SpatialGridIndex(np.empty(0), np.empty(0))
         
-        self._statistics = ZoneStatistics(
-            total_zones=len(self._data),
-            critical_zones=len(self._data[self._data['classificacao'] == 'Crítica']),
-            medium_zones=len(self._data[self._data['classificacao'] == 'Média']),
-            safe_zones=len(self._data[self._data['classificacao'] == 'Segura']),
-            avg_temperature=float(self._data['temperatura'].mean()),
-            avg_ndvi=float(self._data['ndvi'].mean()),
-            avg_criticity=float(self._data['indice_criticidade'].mean())
+        return SpatialGridIndex(
+            data['latitude'].to_numpy(dtype=np.float64),
+            data['longitude'].to_numpy(dtype=np.float64),
+            zones_per_cell=Config.SPATIAL_INDEX_ZONES_PER_CELL
         )
     
-    def get_all_zones(self) -> List[Dict[str, Any]]:
+    def get_zones_in_bbox(self, min_lat: float, max_lat: float,
+                          min_lon: float, max_lon: float) -> List[Dict[str, Any]]:
         """
-        Retorna dados de todas as zonas formatados para API
+        Retorna as zonas dentro de uma caixa delimitadora (ex.: viewport do mapa)
+        
+        Args:
+            min_lat: Latitude mínima
+            max_lat: Latitude máxima
+            min_lon: Longitude mínima
+            max_lon: Longitude máxima
         
         Returns:
-            Lista de dicionários com dados das zonas
+            Lista de zonas no mesmo formato de get_all_zones
         """
-        if self._zones_cache is not None:
-            return [zone.__dict__ for zone in self._zones_cache]
+        snapshot = self._snapshot
+        positions = snapshot.spatial_index.query_bbox(min_lat, max_lat, min_lon, max_lon)
+        return snapshot.zones.take(positions.tolist())
+    
+    def get_nearest_zones(self, lat: float, lon: float, k: int) -> List[Dict[str, Any]]:
+        """
+        Retorna as k zonas mais próximas de um ponto
         
-        if self._data is None or self._data.empty:
-            return []
+        Args:
+            lat: Latitude do ponto
+            lon: Longitude do ponto
+            k: Quantidade de zonas
         
-        zones = []
-        for _, row in self._data.iterrows():
-            zone = ZoneData(
-                id=int(row['id']),
-                nome=str(row['nome']),
-                latitude=float(row['latitude']),
-                longitude=float(row['longitude']),
-                temperatura=float(row['temperatura']),
-                ndvi=float(row['ndvi']),
-                densidade_populacional=int(row['densidade_populacional']),
-                regiao=str(row.get('regiao', 'São Paulo')),
-                indice_criticidade=float(row['indice_criticidade']),
-                classificacao=str(row['classificacao']),
-                cor=str(row['cor'])
-            )
-            zones.append(zone)
+        Returns:
+            Lista de zonas, da mais próxima para a mais distante, com 'distancia_km'
+        """
+        snapshot = self._snapshot
+        positions, distances = snapshot.spatial_index.nearest(lat, lon, k)
+        zones = snapshot.zones.take(positions.tolist())
+        return [
+            dict(zone, distancia_km=round(distance, 3))
+            for zone, distance in zip(zones, distances.tolist())
+        ]
+
+    def _build_tile_pyramid(self, data: pd.DataFrame) -> TilePyramid:
+        """
+        Constrói a pirâmide de tiles (agregados por tile em todos os zooms)
+        """
+        if data is None or data.empty:
+            return TilePyramid(np.empty(0), np.empty(0), np.empty(0), np.empty(0), Config.TILE_MAX_ZOOM)
+
+        return TilePyramid(
+            data['latitude'].to_numpy(dtype=np.float64),
+            data['longitude'].to_numpy(dtype=np.float64),
+            data['indice_criticidade'].to_numpy(dtype=np.float64),
+            data['classificacao'].to_numpy(dtype=object),
+            Config.TILE_MAX_ZOOM
+        )
+
+    def _get_view(self, snapshot: ZoneSnapshot, name: str, build) -> Any:
+        """
+        Retorna uma estrutura derivada do snapshot, montando-a se foi adiada
+
+        Snapshots derivados por alteração (limiares, API de escrita) são
+        publicados sem as estruturas espaciais; cada uma é montada no
+        primeiro uso a partir dos dados do próprio snapshot.
+        """
+        view = snapshot.views.get(name)
+        ZONE_CACHE_LOOKUPS.inc('view', 'miss' if view is None else 'hit')
+        if view is None:
+            view = snapshot.views.setdefault(name, build(snapshot.data))
+        return view
+
+    def get_tile(self, zoom: int, x: int, y: int, depth: int = Config.TILE_CELL_DEPTH) -> Dict[str, Any]:
+        """
+        Retorna o agregado de um tile z/x/y (Web Mercator) e de suas subdivisões
+
+        Args:
+            zoom: Zoom do tile
+            x: Coluna do tile
+            y: Linha do tile
+            depth: Níveis de subdivisão devolvidos em 'cells' (4^depth células no máximo)
+
+        Returns:
+            Contagem, criticidade média, classificação dominante e células do tile
+
+        Raises:
+            ValueError: se o tile não existir
+        """
+        pyramid = self._get_view(self._snapshot, 'tiles', self._build_tile_pyramid)
+        return pyramid.tile(zoom, x, y, depth)
+
+    def _build_zone_clusters(self, data: pd.DataFrame) -> ZoneClusters:
+        """
+        Calcula os clusters de zonas de cada zoom do mapa
+        """
+        if data is None or data.empty:
+            return ZoneClusters(np.empty(0), np.empty(0), np.empty(0), Config.CLUSTER_MAX_ZOOM,
+                                Config.CLUSTER_GRID_LEVELS)
+
+        return ZoneClusters(
+            data['latitude'].to_numpy(dtype=np.float64),
+            data['longitude'].to_numpy(dtype=np.float64),
+            data['classificacao'].to_numpy(dtype=object),
+            Config.CLUSTER_MAX_ZOOM,
+            Config.CLUSTER_GRID_LEVELS
+        )
+
+    def get_zone_clusters(self, zoom: int,
+                          bbox: Optional[Tuple[float, float, float, float]] = None) -> Dict[str, Any]:
+        """
+        Retorna as zonas agrupadas para um zoom do mapa
+        
+        Args:
+            zoom: Zoom do mapa
+            bbox: (oeste, sul, leste, norte) da área visível; None = cidade inteira
+        
+        Returns:
+            Dicionário com 'zoom' (dos clusters) e 'clusters'; cada cluster traz
+            count, centroide (latitude/longitude) e a classificação mais grave,
+            e clusters de uma zona só trazem também o 'id' dela
+        
+        Raises:
+            ValueError: se o zoom for inválido
+        """
+        snapshot = self._snapshot
+        clusters = self._get_view(snapshot, 'clusters', self._build_zone_clusters)
+        zoom, groups, singles = clusters.query(zoom, bbox)
+        
+        ids = snapshot.data['id'].to_numpy()
+        for group, position in zip(groups, singles):
+            if position >= 0:
+                group['id'] = int(ids[position])
+        return {'zoom': zoom, 'clusters': groups}
+
+    @property
+    def observations(self) -> ObservationStore:
+        """
+        Séries históricas das zonas, carregadas no primeiro acesso
+
+        Sem arquivo de observações configurado (ou se ele não existir), o
+        armazenamento começa vazio e só recebe dados por ingest_observations.
+        """
+        store = self._observations
+        if store is None:
+            with self._observations_lock:
+                if self._observations is None:
+                    self._observations = self._load_observations()
+                store = self._observations
+        return store
+
+    def _load_observations(self) -> ObservationStore:
+        """
+        Lê as observações do CSV (ou do cache colunar, sem parsing)
+        """
+        path = self.observations_file
+        if not path or not os.path.exists(path):
+            return ObservationStore.from_frame(pd.DataFrame(columns=OBSERVATION_COLUMNS))
+
+        cache = None
+        if Config.DATA_CACHE_ENABLED:
+            params = {'format': CACHE_FORMAT_VERSION, 'content': 'observations'}
+            cache = ColumnarCache(path, source_cache_key(path, params))
+            cached = cache.load()
+            if cached is not None:
+                logger.info(f"Observações lidas do cache colunar: {cache.path}")
+                return ObservationStore(
+                    zone_ids=cached.arrays['zone_ids'],
+                    starts=cached.arrays['starts'],
+                    days=cached.data['dia'].to_numpy(),
+                    measures={name: cached.data[name].to_numpy() for name in OBSERVATION_MEASURES}
+                )
+
+        logger.info(f"Carregando observações de: {path}")
+        frame = pd.read_csv(path, usecols=list(OBSERVATION_COLUMNS),
+                            dtype={name: np.float32 for name in OBSERVATION_MEASURES})
+        store = ObservationStore.from_frame(frame)
+        logger.info(f"Observações carregadas: {len(store)} de {len(store.zone_ids)} zonas")
+
+        if cache is not None:
+            columns = dict({'dia': store.days}, **store.measures)
+            cache.save(pd.DataFrame(columns, copy=False), OBSERVATION_COLUMNS,
+                       arrays={'zone_ids': store.zone_ids, 'starts': store.starts})
+        return store
+
+    def ingest_observations(self, observations: Any) -> Dict[str, Any]:
+        """
+        Acrescenta observações datadas às séries históricas
+
+        As novas observações são ordenadas e intercaladas com as atuais num
+        armazenamento novo, publicado por troca de referência; no mesmo dia e
+        zona, a observação nova substitui a anterior. Valem até o processo
+        reiniciar (o arquivo de observações não é alterado).
+
+        Args:
+            observations: DataFrame ou lista de dicionários com 'id', 'data',
+                'temperatura' e 'ndvi'
+
+        Returns:
+            Dicionário com 'received', 'observations', 'zones' e 'date_range'
+
+        Raises:
+            ValueError: se faltarem colunas
+        """
+        frame = observations if isinstance(observations, pd.DataFrame) else pd.DataFrame(list(observations))
+        if frame.empty:
+            frame = pd.DataFrame(columns=OBSERVATION_COLUMNS)
+        received = ObservationStore.from_frame(frame)
+
+        with self._observations_lock:
+            current = self._observations
+            if current is None:
+                current = self._observations = self._load_observations()
+            store = current.merge(received)
+            self._observations = store
+
+        date_range = store.date_range()
+        logger.info(f"Observações recebidas: {len(received)} (total {len(store)})")
+        return {
+            'received': len(received),
+            'observations': len(store),
+            'zones': len(store.zone_ids),
+            'date_range': list(date_range) if date_range else None
+        }
+
+    def get_zone_history(self, zone_id: int, start: Optional[str] = None,
+                         end: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Retorna as observações de uma zona num período
+
+        Args:
+            zone_id: Id da zona
+            start: Data inicial (AAAA-MM-DD), inclusiva; None = desde o início
+            end: Data final (AAAA-MM-DD), inclusiva; None = até o fim
+
+        Returns:
+            Dicionário com 'id', 'from', 'to' e 'observations', ou None se a
+            zona não tiver observações
+
+        Raises:
+            ValueError: se alguma data for inválida
+        """
+        first = parse_day(start) if start else None
+        last = parse_day(end) if end else None
+        observations = self.observations.history(zone_id, first, last)
+        if observations is None:
+            return None
+        return {'id': zone_id, 'from': start, 'to': end, 'observations': observations}
+
+    def get_trends(self, measure: str = 'temperatura', window: int = Config.TREND_WINDOW_DAYS,
+                   zone_id: Optional[int] = None, start: Optional[str] = None,
+                   end: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Retorna a série diária de uma medida com média móvel e anomalias sazonais
+
+        Args:
+            measure: 'temperatura' ou 'ndvi'
+            window: Janela da média móvel, em dias
+            zone_id: Zona; None = média diária da cidade
+            start: Data inicial (AAAA-MM-DD); None = desde o início
+            end: Data final (AAAA-MM-DD); None = até o fim
+
+        Returns:
+            Série, climatologia mensal e tendência por ano (ObservationStore.trends),
+            ou None se a zona não tiver observações
+
+        Raises:
+            ValueError: se a medida, a janela ou alguma data forem inválidas
+        """
+        first = parse_day(start) if start else None
+        last = parse_day(end) if end else None
+        trends = self.observations.trends(measure, window, zone_id, first, last)
+        if trends is not None:
+            trends.update({'from': start, 'to': end})
+        return trends
+
+    def _build_id_index(self, data: pd.DataFrame) -> Dict[Any, int]:
+        """
+        Constrói o índice id -> posição da linha no DataFrame
+        
+        Em ids duplicados prevalece a primeira ocorrência, como na busca por máscara.
+        
+        Returns:
+            Dicionário com a posição de cada id
+        """
+        if data is None or data.empty:
+            return {}
+        
+        ids = data['id'].tolist()
+        return dict(zip(reversed(ids), range(len(ids) - 1, -1, -1)))
+    
+    def _extend_id_index(self, id_index: Mapping[Any, int], ids: Sequence[Any], start: int) -> Mapping[Any, int]:
+        """
+        Índice id -> posição com ids novos (linhas acrescentadas no fim), sem copiar o atual
+        
+        Os ids novos ficam numa camada (ChainMap) sobre o dicionário da carga,
+        compactada num dicionário só quando passa de overlay_limit.
+        
+        Args:
+            id_index: Índice atual (dicionário ou ChainMap de duas camadas)
+            ids: Ids novos, ausentes do índice atual
+            start: Posição da primeira linha nova
+        """
+        if not ids:
+            return id_index
+        added = dict(zip(ids, range(start, start + len(ids))))
+        base = id_index
+        if isinstance(id_index, ChainMap):
+            layer, base = id_index.maps
+            added = {**layer, **added}
+        if len(added) > overlay_limit(len(base) + len(added)):
+            merged = dict(base)
+            merged.update(added)
+            return merged
+        return ChainMap(added, base)
+    
+    def _build_zone_details(self, data: pd.DataFrame, positions: List[int]) -> List[Dict[str, Any]]:
+        """
+        Monta os detalhes de várias zonas a partir de suas posições no DataFrame
         
-        # Cache o resultado
-        self._zones_cache = zones
-        return [zone.__dict__ for zone in zones]
+        Args:
+            data: DataFrame do snapshot consultado
+            positions: Posições das linhas (na ordem desejada)
+        
+        Returns:
+            Lista de dicionários com dados e sugestões de ação das zonas
+        """
+        zones = frame_to_records(data.take(positions), defaults=RECORD_DEFAULTS)
+        
+        for zone in zones:
+            action_config = Config.ACTION_SUGGESTIONS.get(zone['classificacao'], {})
+            zone.update({
+                'acao_sugerida': action_config.get('action', ''),
+                'custo_estimado': action_config.get('cost_range', ''),
+                'especies_recomendadas': action_config.get('species', ''),
+                'civil_message': action_config.get('civil_message', ''),
+                'civil_description': action_config.get('civil_description', '')
+            })
+        
+        return zones
     
     def get_zone_by_id(self, zone_id: int) -> Optional[Dict[str, Any]]:
         """
@@ -216,48 +1176,48 @@ class ZoneService:
         
         Args:
             zone_id: ID da zona
-            
+        
         Returns:
             Dicionário com dados da zona ou None se não encontrada
         """
-        if self._data is None or self._data.empty:
-            return None
-        
-        zone_row = self._data[self._data['id'] == zone_id]
-        if zone_row.empty:
+        snapshot = self._snapshot
+        position = snapshot.id_index.get(zone_id)
+        if position is None:
             return None
         
-        row = zone_row.iloc[0]
-        classification = row['classificacao']
-        action_config = Config.ACTION_SUGGESTIONS.get(classification, {})
-        
-        return {
-            'id': int(row['id']),
-            'nome': str(row['nome']),
-            'latitude': float(row['latitude']),
-            'longitude': float(row['longitude']),
-            'temperatura': float(row['temperatura']),
-            'ndvi': float(row['ndvi']),
-            'densidade_populacional': int(row['densidade_populacional']),
-            'regiao': str(row.get('regiao', 'São Paulo')),
-            'indice_criticidade': float(row['indice_criticidade']),
-            'classificacao': classification,
-            'cor': str(row['cor']),
-            'acao_sugerida': action_config.get('action', ''),
-            'custo_estimado': action_config.get('cost_range', ''),
-            'especies_recomendadas': action_config.get('species', ''),
-            'civil_message': action_config.get('civil_message', ''),
-            'civil_description': action_config.get('civil_description', '')
-        }
+        return self._build_zone_details(snapshot.data, [position])[0]
     
-    def get_statistics(self) -> Dict[str, Any]:
+    def get_zones_by_ids(self, zone_ids: List[int]) -> Tuple[List[Dict[str, Any]], List[int]]:
         """
-        Retorna estatísticas gerais das zonas
+        Retorna dados de várias zonas numa única consulta
+        
+        Args:
+            zone_ids: IDs das zonas
         
         Returns:
-            Dicionário com estatísticas
+            Tupla (zonas encontradas na ordem pedida, IDs não encontrados)
+        """
+        snapshot = self._snapshot
+        id_index = snapshot.id_index
+        positions = []
+        not_found = []
+        for zone_id in zone_ids:
+            position = id_index.get(zone_id)
+            if position is None:
+                not_found.append(zone_id)
+            else:
+                positions.append(position)
+        
+        if not positions:
+            return [], not_found
+        
+        return self._build_zone_details(snapshot.data, positions), not_found
+    
+    def format_statistics(self, statistics: Optional[ZoneStatistics]) -> Dict[str, Any]:
         """
-        if self._statistics is None:
+        Formata estatísticas para a API (com arredondamento)
+        """
+        if statistics is None:
             return {
                 'total_zones': 0,
                 'critical_zones': 0,
@@ -269,55 +1229,681 @@ class ZoneService:
             }
         
         return {
-            'total_zones': self._statistics.total_zones,
-            'critical_zones': self._statistics.critical_zones,
-            'medium_zones': self._statistics.medium_zones,
-            'safe_zones': self._statistics.safe_zones,
-            'avg_temperature': round(self._statistics.avg_temperature, 1),
-            'avg_ndvi': round(self._statistics.avg_ndvi, 2),
-            'avg_criticity': round(self._statistics.avg_criticity, 2)
+            'total_zones': statistics.total_zones,
+            'critical_zones': statistics.critical_zones,
+            'medium_zones': statistics.medium_zones,
+            'safe_zones': statistics.safe_zones,
+            'avg_temperature': round(statistics.avg_temperature, 1),
+            'avg_ndvi': round(statistics.avg_ndvi, 2),
+            'avg_criticity': round(statistics.avg_criticity, 2)
         }
     
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Retorna estatísticas gerais das zonas
+        
+        Returns:
+            Dicionário com estatísticas
+        """
+        snapshot = self._snapshot
+        return self.format_statistics(snapshot.statistics if snapshot else None)
+    
+    def get_report_frame(self) -> pd.DataFrame:
+        """
+        Retorna as colunas do relatório PDF, da maior para a menor criticidade
+        
+        O DataFrame é compacto (só as colunas do relatório) e pode ser enviado
+        a outro processo e convertido em registros aos poucos com iter_report_records.
+        
+        Returns:
+            DataFrame com as colunas renomeadas para o relatório
+        """
+        data = self._snapshot.data
+        if data is None or data.empty:
+            return pd.DataFrame(columns=[name for name, _ in REPORT_RECORD_SCHEMA])
+        
+        # Ordena por criticidade (maior primeiro, empates na ordem original)
+        order = np.argsort(-data['indice_criticidade'].to_numpy(dtype=np.float64), kind='stable')
+        columns = [column for column in REPORT_SOURCE_COLUMNS if column in data.columns]
+        report = data[columns].take(order).rename(columns=REPORT_COLUMN_NAMES)
+        return report.reset_index(drop=True)
+    
     def get_report_data(self) -> List[Dict[str, Any]]:
         """
         Retorna dados formatados para relatório PDF
         
         Returns:
-            Lista de dicionários com dados para relatório
+            Lista de dicionários com dados para relatório, da maior para a menor criticidade
         """
-        if self._data is None or self._data.empty:
+        report = self.get_report_frame()
+        if report.empty:
             return []
+        return frame_to_records(report, REPORT_RECORD_SCHEMA, defaults=RECORD_DEFAULTS)
+    
+    def iter_report_data(self) -> Iterator[Dict[str, Any]]:
+        """
+        Como get_report_data, mas gera os registros sob demanda (memória limitada a um lote)
+        """
+        return iter_report_records(self.get_report_frame())
+    
+    def _build_sort_orders(self, data: pd.DataFrame) -> Dict[str, Tuple[np.ndarray, int]]:
+        """
+        Pré-calcula a ordem crescente (estável) de cada coluna ordenável
         
-        report_data = []
-        for _, row in self._data.iterrows():
-            report_data.append({
-                'bairro': str(row['nome']),
-                'regiao': str(row.get('regiao', 'São Paulo')),
-                'temperatura': float(row['temperatura']),
-                'ndvi': float(row['ndvi']),
-                'densidade': int(row['densidade_populacional']),
-                'criticidade': float(row['indice_criticidade']),
-                'classificacao': str(row['classificacao'])
-            })
+        Textos são comparados sem diferenciar maiúsculas; valores nulos ficam no fim.
         
-        # Ordena por criticidade (maior primeiro)
-        report_data.sort(key=lambda x: x['criticidade'], reverse=True)
-        return report_data
+        Returns:
+            Dicionário coluna -> (posições em ordem crescente, quantidade de valores não nulos)
+        """
+        if data is None or data.empty:
+            return {}
+        
+        return {
+            column: self._sort_order(data[column])
+            for column in SORTABLE_COLUMNS
+            if column in data.columns
+        }
+    
+    def _sort_order(self, series: pd.Series) -> Tuple[np.ndarray, int]:
+        """
+        Ordem crescente (estável) de uma coluna e quantidade de valores não nulos
+        """
+        if pd.api.types.is_numeric_dtype(series):
+            keys = series.to_numpy(dtype=np.float64)
+            return np.argsort(keys, kind='stable'), int(np.isfinite(keys).sum())
+        
+        # Ordena pelos códigos de categoria: evita comparar strings n log n vezes
+        keys = series.astype(str).str.lower()
+        codes = pd.Categorical(keys, categories=sorted(keys.unique())).codes
+        return np.argsort(codes, kind='stable'), len(codes)
+    
+    def _get_sort_order(self, snapshot: ZoneSnapshot, column: str) -> Optional[Tuple[np.ndarray, int]]:
+        """
+        Retorna a ordem de uma coluna do snapshot, calculando-a se foi adiada
+        
+        Snapshots derivados por alteração (limiares, API de escrita) marcam
+        com None as ordens das colunas alteradas em vez de recalculá-las.
+        
+        Returns:
+            (posições em ordem crescente, quantidade de valores não nulos) ou
+            None se a coluna não for ordenável
+        """
+        if column not in snapshot.sort_orders:
+            return None
+        order = snapshot.sort_orders[column]
+        ZONE_CACHE_LOOKUPS.inc('sort_order', 'miss' if order is None else 'hit')
+        if order is None:
+            order = self._sort_order(snapshot.data[column])
+            snapshot.sort_orders[column] = order
+        return order
+    
+    def query_zones(self, page: int = 1, page_size: int = Config.DEFAULT_PAGE_SIZE,
+                    sort: Optional[str] = None, order: str = 'asc',
+                    classificacao: Optional[List[str]] = None, regiao: Optional[List[str]] = None,
+                    ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+                    search: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Retorna uma página de zonas filtradas e ordenadas
+        
+        A ordenação usa os índices pré-calculados: os filtros geram uma máscara
+        booleana que é aplicada sobre a ordem já pronta, sem reordenar dados.
+        
+        Args:
+            page: Página desejada (começando em 1)
+            page_size: Zonas por página
+            sort: Coluna de ordenação (None mantém a ordem do arquivo)
+            order: 'asc' ou 'desc'
+            classificacao: Classificações aceitas
+            regiao: Regiões aceitas
+            ranges: Faixas numéricas por coluna, {coluna: (mínimo, máximo)}
+            search: Trecho do nome da zona (sem diferenciar maiúsculas)
+        
+        Returns:
+            Dicionário com 'zones', 'total', 'page', 'page_size' e 'pages'
+        """
+        snapshot = self._snapshot
+        zones = snapshot.zones
+        data = snapshot.data
+        n_zones = len(zones)
+        
+        sort_order = self._get_sort_order(snapshot, sort) if sort is not None else None
+        if sort_order is None:
+            positions = np.arange(n_zones)
+        else:
+            positions, n_valid = sort_order
+            if order == 'desc':
+                # Inverte apenas os valores válidos, mantendo os nulos no fim
+                positions = np.concatenate([positions[:n_valid][::-1], positions[n_valid:]])
+        
+        mask = None
+        if n_zones:
+            conditions = []
+            if classificacao:
+                conditions.append(data['classificacao'].isin(classificacao).to_numpy())
+            if regiao and 'regiao' in data.columns:
+                conditions.append(data['regiao'].isin(regiao).to_numpy())
+            for column, (minimum, maximum) in (ranges or {}).items():
+                values = data[column].to_numpy(dtype=np.float64)
+                if minimum is not None:
+                    conditions.append(values >= minimum)
+                if maximum is not None:
+                    conditions.append(values <= maximum)
+            if search:
+                conditions.append(
+                    data['nome'].astype(str).str.lower().str.contains(search.lower(), regex=False).to_numpy()
+                )
+            if conditions:
+                mask = np.logical_and.reduce(conditions)
+        
+        if mask is not None:
+            positions = positions[mask[positions]]
+        
+        total = len(positions)
+        start = (page - 1) * page_size
+        page_positions = positions[start:start + page_size].tolist()
+        
+        return {
+            'zones': zones.take(page_positions),
+            'total': total,
+            'page': page,
+            'page_size': page_size,
+            'pages': (total + page_size - 1) // page_size
+        }
+    
+    def memory_usage(self) -> int:
+        """
+        Estima a memória (bytes) ocupada pelos dados e caches do serviço
+        
+        Returns:
+            Soma do DataFrame, índices, payloads codificados e registros em cache
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            return 0
+        
+        total = int(snapshot.data.memory_usage(deep=True).sum())
+        total += sum(len(payload.body) for payload in snapshot.encoded.values())
+        total += sum(order[0].nbytes for order in snapshot.sort_orders.values() if order is not None)
+        total += sum(sys.getsizeof(layer) for layer in getattr(snapshot.id_index, 'maps', [snapshot.id_index]))
+        total += snapshot.spatial_index.nbytes
+        total += sum(view.nbytes for view in snapshot.views.values())
+        if self._observations is not None:
+            total += self._observations.nbytes
+        
+        if snapshot.zones.materialized and len(snapshot.zones):
+            # Estimativa: dicionário por zona + um objeto Python por valor
+            sample = snapshot.zones.take([0])[0]
+            total += len(snapshot.zones) * (sys.getsizeof(sample) + 32 * len(sample))
+        
+        return total
     
     def refresh_data(self) -> None:
         """
         Recarrega e reprocessa os dados
+        
+        Requisições em andamento continuam usando o snapshot anterior até a
+        nova versão ser publicada; se a recarga falhar, a versão atual é mantida.
         """
         logger.info("Recarregando dados...")
         self._load_and_process_data()
     
+    def _read_source_signature(self) -> Tuple[int, int]:
+        """
+        Retorna (mtime em ns, tamanho) do arquivo de origem
+        """
+        stat = os.stat(self.csv_file)
+        return stat.st_mtime_ns, stat.st_size
+    
+    def _source_cache(self) -> Optional[ColumnarCache]:
+        """
+        Retorna o cache colunar do conteúdo atual do CSV (ou None se desativado)
+        
+        A chave combina o hash do arquivo com tudo o que altera o processamento.
+        """
+        if not Config.DATA_CACHE_ENABLED:
+            return None
+        
+        params = {
+            'format': CACHE_FORMAT_VERSION,
+            'critical_threshold': self.critical_threshold,
+            'medium_threshold': self.medium_threshold,
+            'colors': Config.COLORS
+        }
+        return ColumnarCache(self.csv_file, source_cache_key(self.csv_file, params))
+    
+    def _store_in_cache(self, cache: Optional[ColumnarCache], signature: Tuple[int, int],
+                        snapshot: ZoneSnapshot, source_columns: Tuple[str, ...]) -> None:
+        """
+        Grava colunas, ordenações e payload de zonas do snapshot no cache colunar
+        
+        Nada é gravado se o arquivo mudou desde o cálculo da chave.
+        """
+        if cache is None or self._read_source_signature() != signature:
+            return
+        self._write_dataset(cache, snapshot, source_columns, signature)
+    
+    def export_dataset(self, cache: ColumnarCache) -> bool:
+        """
+        Grava o snapshot atual num ColumnarCache (ex.: para outros processos anexarem)
+        
+        Returns:
+            True se os dados foram gravados
+        """
+        with self._write_lock:
+            return self._write_dataset(cache, self._snapshot, self._source_columns, self._source_signature)
+    
+    def _write_dataset(self, cache: ColumnarCache, snapshot: ZoneSnapshot,
+                       source_columns: Tuple[str, ...], signature: Tuple[int, int]) -> bool:
+        """
+        Grava colunas, ordenações e payload de zonas de um snapshot
+        """
+        zones_payload = self.get_encoded_payload('zones', snapshot)
+        sort_orders = {column: self._get_sort_order(snapshot, column) for column in snapshot.sort_orders}
+        return cache.save(
+            snapshot.data,
+            source_columns,
+            arrays={f'sort:{column}': order for column, (order, _) in sort_orders.items()},
+            blobs={'zones': zones_payload.body},
+            attrs={
+                'sort_valid': {column: n_valid for column, (_, n_valid) in sort_orders.items()},
+                'zones_etag': zones_payload.etag,
+                'source_signature': list(signature),
+                'thresholds': list(snapshot.thresholds)
+            }
+        )
+    
+    def source_changed(self) -> bool:
+        """
+        Indica se o arquivo de origem mudou desde a última carga (mtime ou tamanho)
+        """
+        try:
+            return self._read_source_signature() != self._source_signature
+        except FileNotFoundError:
+            return False
+    
+    def reload_if_changed(self) -> bool:
+        """
+        Recarrega os dados de forma incremental se o arquivo de origem mudou
+        
+        As linhas do arquivo novo são comparadas por id com o snapshot atual;
+        criticidade, classificação, registros de API e estatísticas só são
+        recalculados para as linhas novas ou alteradas. Se o esquema mudou ou
+        há ids duplicados, faz uma recarga completa.
+        
+        Returns:
+            True se uma nova versão foi publicada
+        """
+        if not self.source_changed():
+            return False
+        
+        with self._write_lock, self._track_reload('incremental'):
+            signature = self._read_source_signature()
+            if signature == self._source_signature:
+                return False
+            
+            cache = self._source_cache()
+            data = pd.read_csv(self.csv_file)
+            source_columns = tuple(data.columns)
+            self._validate_data(data)
+            
+            snapshot = None
+            if source_columns == self._source_columns:
+                snapshot = self._build_incremental_snapshot(self._snapshot, data)
+            
+            if snapshot is None:
+                logger.info("Esquema ou ids incompatíveis com recarga incremental; reprocessando tudo")
+                self._process_data(data)
+                snapshot = self._build_snapshot(data)
+            
+            self._source_signature = signature
+            self._source_columns = source_columns
+            self._store_in_cache(cache, signature, snapshot, source_columns)
+            if snapshot is self._snapshot:
+                return False
+            
+            self._publish(snapshot)
+            logger.info(f"Dados recarregados: {len(data)} zonas (versão {snapshot.version})")
+            return True
+    
+    def _build_incremental_snapshot(self, old: ZoneSnapshot, data: pd.DataFrame) -> Optional[ZoneSnapshot]:
+        """
+        Monta um snapshot reaproveitando as linhas que não mudaram
+        
+        Args:
+            old: Snapshot atual
+            data: Dados novos, já validados e ainda sem colunas calculadas
+        
+        Returns:
+            Novo snapshot, o próprio ``old`` se nada mudou, ou None se a
+            recarga incremental não se aplica
+        """
+        old_data = old.data
+        if old_data.empty or data.empty or any(column in data.columns for column in DERIVED_COLUMNS):
+            return None
+        if not data['id'].is_unique or not old_data['id'].is_unique:
+            return None
+        
+        # Junta por id: posição de cada linha nova no snapshot atual (-1 = nova)
+        old_positions = pd.Index(old_data['id']).get_indexer(data['id'])
+        existing = old_positions >= 0
+        source = np.where(existing, old_positions, 0)
+        
+        changed = ~existing
+        for column in data.columns:
+            new_values = data[column].to_numpy()
+            old_values = old_data[column].to_numpy()[source]
+            both_null = pd.isna(new_values) & pd.isna(old_values)
+            changed |= (new_values != old_values) & ~both_null
+        
+        removed = np.ones(len(old_data), dtype=bool)
+        removed[old_positions[existing]] = False
+        
+        changed_positions = np.flatnonzero(changed)
+        if len(changed_positions) == 0 and not removed.any():
+            logger.info("Arquivo alterado, mas sem mudanças nos dados")
+            return old
+        
+        # Recalcula as colunas derivadas apenas das linhas alteradas
+        changed_rows = data.iloc[changed_positions].copy()
+        self._process_data(changed_rows)
+        
+        for column in DERIVED_COLUMNS + (('regiao',) if 'regiao' not in data.columns else ()):
+            values = old_data[column].to_numpy()[source]
+            values[changed_positions] = changed_rows[column].to_numpy()
+            data[column] = values
+        
+        # Estatísticas por diferença: sai a versão antiga das linhas alteradas/removidas
+        outgoing = np.concatenate([np.flatnonzero(removed), old_positions[changed & existing]])
+        outgoing_rows = old_data.take(outgoing)
+        aggregates = old.aggregates.apply_delta(
+            added=ZoneAggregates.from_frame(changed_rows),
+            removed=ZoneAggregates.from_frame(outgoing_rows)
+        )
+        cube = old.cube.apply_delta(
+            added=AggregateCube.from_frame(changed_rows),
+            removed=AggregateCube.from_frame(outgoing_rows)
+        )
+        
+        # Reaproveita os registros de API das linhas inalteradas
+        old_zones = old.zones.materialize()
+        zones = [old_zones[position] for position in source.tolist()]
+        changed_records = frame_to_records(changed_rows, defaults=RECORD_DEFAULTS)
+        for position, record in zip(changed_positions.tolist(), changed_records):
+            zones[position] = record
+        
+        logger.info(
+            f"Recarga incremental: {int((changed & existing).sum())} alteradas, "
+            f"{int((~existing).sum())} novas, {int(removed.sum())} removidas"
+        )
+        return self._assemble_snapshot(
+            data, aggregates, LazyRecords(data, defaults=RECORD_DEFAULTS, records=zones), cube=cube
+        )
+    
+    def _parse_zone_change(self, record: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """
+        Valida uma zona enviada à API de escrita e converte seus campos
+        
+        Returns:
+            Tupla (id, campos alterados)
+        
+        Raises:
+            ValueError: se faltar o id ou algum campo for desconhecido ou inválido
+        """
+        if not isinstance(record, dict) or 'id' not in record:
+            raise ValueError('Cada zona deve ser um objeto com id')
+        
+        unknown = [column for column in record if column != 'id' and column not in WRITABLE_COLUMNS]
+        if unknown:
+            raise ValueError(f'Campos não permitidos: {unknown}')
+        
+        fields = {}
+        try:
+            zone_id = int(record['id'])
+            for column, value in record.items():
+                if column == 'id':
+                    continue
+                if column in NUMERIC_COLUMNS:
+                    value = float(value)
+                    if not np.isfinite(value):
+                        raise ValueError(column)
+                    if column == 'densidade_populacional':
+                        if not value.is_integer():
+                            raise ValueError(column)
+                        value = int(value)
+                elif value is None:
+                    raise ValueError(column)
+                else:
+                    value = str(value)
+                fields[column] = value
+        except (TypeError, ValueError):
+            raise ValueError(f'Valor inválido na zona {record.get("id")!r}')
+        
+        return zone_id, fields
+    
+    def apply_changes(self, upserts: Sequence[Dict[str, Any]] = (),
+                      deletes: Sequence[Any] = ()) -> Dict[str, Any]:
+        """
+        Insere, atualiza e remove zonas em memória (API de escrita)
+        
+        As alterações são aplicadas juntas numa nova versão do snapshot.
+        Colunas calculadas, registros da API e estatísticas são recalculados só
+        para as linhas alteradas: os agregados recebem as linhas novas e perdem
+        as antigas (ZoneAggregates.apply_delta e AggregateCube.apply_rows), sem
+        varrer a tabela. Atualizações e inserções não refazem índices: registros,
+        ids e pontos novos ou movidos entram em camadas sobre a versão anterior
+        (LazyRecords.patch, _extend_id_index, SpatialGridIndex.with_points),
+        compactadas quando passam de overlay_limit.
+        
+        Ainda dependem do total de zonas: a cópia do array de cada coluna cujos
+        valores mudaram (os leitores continuam com a versão anterior), o
+        acréscimo de linhas novas ao fim das colunas e as remoções, que
+        deslocam as posições e refazem tabela, registros e índices. Ordenações
+        e estruturas espaciais afetadas são refeitas no próximo uso.
+        
+        As alterações valem para este processo até a próxima recarga do CSV.
+        
+        Args:
+            upserts: Zonas a inserir ou atualizar; cada uma tem 'id' e os campos
+                alterados (inserções precisam de todas as colunas obrigatórias)
+            deletes: Ids das zonas a remover
+        
+        Returns:
+            Dicionário com 'inserted', 'updated', 'deleted', 'not_found' e 'data_version'
+        
+        Raises:
+            ValueError: se alguma zona for inválida
+        """
+        changes: Dict[int, Dict[str, Any]] = {}
+        for record in upserts:
+            zone_id, fields = self._parse_zone_change(record)
+            changes.setdefault(zone_id, {}).update(fields)
+        
+        try:
+            delete_ids = list(dict.fromkeys(int(zone_id) for zone_id in deletes))
+        except (TypeError, ValueError):
+            raise ValueError('Ids de remoção inválidos')
+        conflicts = sorted(set(delete_ids) & set(changes))
+        if conflicts:
+            raise ValueError(f'Zonas alteradas e removidas na mesma operação: {conflicts}')
+        
+        with self._write_lock, self._track_reload('changes'):
+            old = self._snapshot
+            old_data = old.data
+            id_index = old.id_index
+            
+            update_ids = [zone_id for zone_id in changes if zone_id in id_index]
+            insert_ids = [zone_id for zone_id in changes if zone_id not in id_index]
+            not_found = [zone_id for zone_id in delete_ids if zone_id not in id_index]
+            
+            incomplete = [zone_id for zone_id in insert_ids
+                          if any(column not in changes[zone_id] for column in REQUIRED_COLUMNS[1:])]
+            if incomplete:
+                raise ValueError(f'Zonas novas sem todas as colunas obrigatórias: {incomplete}')
+            
+            update_positions = np.array([id_index[zone_id] for zone_id in update_ids], dtype=np.intp)
+            delete_positions = np.array(
+                sorted(id_index[zone_id] for zone_id in delete_ids if zone_id in id_index), dtype=np.intp
+            )
+            
+            summary = {
+                'inserted': len(insert_ids),
+                'updated': len(update_ids),
+                'deleted': len(delete_positions),
+                'not_found': not_found
+            }
+            if not changes and not len(delete_positions):
+                return dict(summary, data_version=old.version)
+            
+            # Linhas atualizadas: cópia só dessas linhas, com as colunas calculadas refeitas
+            previous_rows = old_data.take(update_positions)
+            updated_rows = previous_rows.copy()
+            written = set()
+            for column in WRITABLE_COLUMNS:
+                rows = [(row, changes[zone_id][column]) for row, zone_id in enumerate(update_ids)
+                        if column in changes[zone_id]]
+                if not rows:
+                    continue
+                values = updated_rows[column].to_numpy(copy=True)
+                if column in NUMERIC_COLUMNS and column != 'densidade_populacional':
+                    # Colunas lidas como inteiras passam a aceitar decimais
+                    values = values.astype(np.float64)
+                for row, value in rows:
+                    values[row] = value
+                updated_rows[column] = values
+                written.add(column)
+            touched = set()
+            if len(updated_rows):
+                self._process_data(updated_rows)
+                # Só as colunas cujos valores mudaram de fato são copiadas
+                touched = {column for column in written.union(DERIVED_COLUMNS)
+                           if values_differ(previous_rows[column], updated_rows[column])}
+            
+            # Linhas novas, processadas isoladamente
+            new_rows = pd.DataFrame(
+                [dict(changes[zone_id], id=zone_id) for zone_id in insert_ids],
+                columns=[column for column in old_data.columns if column not in DERIVED_COLUMNS]
+            )
+            if len(new_rows):
+                self._validate_data(new_rows)
+                if 'regiao' in new_rows.columns:
+                    new_rows['regiao'] = new_rows['regiao'].fillna(RECORD_DEFAULTS['regiao'])
+                self._process_data(new_rows)
+                new_rows = new_rows.reindex(columns=old_data.columns)
+                for column in old_data.columns:
+                    dtype = old_data[column].dtype
+                    # Colunas categóricas recebem as categorias novas em append_rows
+                    if pd.api.types.is_string_dtype(dtype) and not isinstance(dtype, pd.CategoricalDtype):
+                        new_rows[column] = new_rows[column].astype(dtype)
+            
+            # Estatísticas e cubo de agregados por diferença, só com as linhas envolvidas
+            deleted_rows = old_data.take(delete_positions)
+            aggregates = old.aggregates.apply_delta(
+                added=ZoneAggregates.from_frame(updated_rows),
+                removed=ZoneAggregates.from_frame(previous_rows)
+            ).apply_delta(
+                added=ZoneAggregates.from_frame(new_rows),
+                removed=ZoneAggregates.from_frame(deleted_rows)
+            )
+            cube = old.cube.apply_rows(added=[updated_rows, new_rows], removed=[previous_rows, deleted_rows])
+            
+            # Novas colunas: cópia (do array) só das colunas alteradas
+            data = old_data.copy(deep=False)
+            for column in touched:
+                data[column] = replace_values(old_data[column], update_positions, updated_rows[column].to_numpy())
+            
+            if len(delete_positions):
+                # Remoções deslocam as posições: tabela, registros e índices são refeitos
+                keep = np.ones(len(old_data), dtype=bool)
+                keep[delete_positions] = False
+                keep_positions = np.flatnonzero(keep)
+                data = data.take(keep_positions).reset_index(drop=True)
+                if len(new_rows):
+                    data = append_rows(data, new_rows)
+                
+                zones_list = None
+                if old.zones.materialized:
+                    old_zones = old.zones.patch(old_data, dict(zip(
+                        update_positions.tolist(), frame_to_records(updated_rows, defaults=RECORD_DEFAULTS)
+                    ))).materialize()
+                    zones_list = [old_zones[position] for position in keep_positions.tolist()]
+                    zones_list.extend(frame_to_records(new_rows, defaults=RECORD_DEFAULTS))
+                zones = LazyRecords(data, defaults=RECORD_DEFAULTS, records=zones_list)
+                
+                id_index = self._build_id_index(data)
+                spatial_index = self._build_spatial_index(data)
+                sort_orders = {column: None for column in SORTABLE_COLUMNS if column in data.columns}
+            else:
+                if len(new_rows):
+                    data = append_rows(data, new_rows)
+                
+                # Registros, ids e pontos novos em camadas sobre a versão anterior
+                zones = old.zones
+                if zones.materialized:
+                    records = dict(zip(update_positions.tolist(),
+                                       frame_to_records(updated_rows, defaults=RECORD_DEFAULTS)))
+                    records.update(zip(range(len(old_data), len(data)),
+                                       frame_to_records(new_rows, defaults=RECORD_DEFAULTS)))
+                    zones = zones.patch(data, records)
+                    if len(zones.overrides) > overlay_limit(len(data)):
+                        zones.materialize()
+                else:
+                    zones = LazyRecords(data, defaults=RECORD_DEFAULTS)
+                
+                id_index = self._extend_id_index(old.id_index, insert_ids, len(old_data))
+                
+                spatial_index = old.spatial_index
+                moved = update_positions if touched & {'latitude', 'longitude'} else update_positions[:0]
+                points = np.concatenate([moved, np.arange(len(old_data), len(data))])
+                if spatial_index.n_extra + len(points) > overlay_limit(len(data)):
+                    spatial_index = self._build_spatial_index(data)
+                elif len(points):
+                    spatial_index = spatial_index.with_points(
+                        data['latitude'].to_numpy(dtype=np.float64),
+                        data['longitude'].to_numpy(dtype=np.float64),
+                        points
+                    )
+                
+                sort_orders = dict(old.sort_orders)
+                for column in sort_orders:
+                    if column in touched or len(new_rows):
+                        sort_orders[column] = None
+            
+            statistics = aggregates.to_statistics()
+            change = {
+                'upsert': sorted([zone_id, changes[zone_id]] for zone_id in changes),
+                'delete': sorted(delete_ids),
+                'thresholds': list(old.thresholds)
+            }
+            snapshot = replace(
+                old,
+                version=next(self._versions),
+                content_id=derive_content_id(old.content_id, change),
+                data=data,
+                aggregates=aggregates,
+                statistics=statistics,
+                cube=cube,
+                zones=zones,
+                id_index=id_index,
+                spatial_index=spatial_index,
+                sort_orders=sort_orders,
+                encoded={'statistics': encode_payload(self.format_statistics(statistics))},
+                views={}
+            )
+            self._publish(snapshot)
+            
+            logger.info(
+                f"Zonas alteradas via API: {summary['inserted']} inseridas, {summary['updated']} "
+                f"atualizadas, {summary['deleted']} removidas (versão {snapshot.version})"
+            )
+            return dict(summary, data_version=snapshot.version)
+    
     def get_zones_by_classification(self, classification: str) -> List[Dict[str, Any]]:
         """
         Retorna zonas filtradas por classificação
         
         Args:
             classification: Classificação desejada (Crítica, Média, Segura)
-            
+        
         Returns:
             Lista de zonas com a classificação especificada
         """
@@ -2,13 +2,227 @@
 """
 Ponto de entrada principal para o sistema Cidades Frias, Corações Quentes
 Sistema de Identificação de Ilhas de Calor Urbano - São Paulo
+
+Uso:
+    python src/main.py                  # servidor de desenvolvimento
+    python src/main.py --workers 8      # produção: servidor pré-fork com dados compartilhados
 """
 
+import argparse
+import json
+import signal
+import socket
 import sys
 import os
+import time
+from collections import deque
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app import app
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Sinais que encerram o servidor pré-fork
+SHUTDOWN_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+
+
+class ShutdownRequested(Exception):
+    """Sinal de desligamento recebido pelo processo pai do servidor pré-fork"""
+
+
+def run_worker(listener: socket.socket, host: str, port: int, metrics_dir: str) -> None:
+    """
+    Executa um worker: importa a aplicação (que anexa os dados publicados) e atende no socket herdado
+
+    As métricas do worker são gravadas em metrics_dir, onde /metrics soma as de todos.
+    """
+    from werkzeug.serving import make_server
+    from config import Config
+    from services.metrics import METRICS
+
+    METRICS.share(metrics_dir, Config.METRICS_FLUSH_SECONDS)
+    from app_refactored import app
+
+    server = make_server(host, port, app, threaded=True, fd=listener.fileno())
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        server.serve_forever()
+    finally:
+        METRICS.flush()
+
+
+def worker_main(listener: socket.socket, host: str, port: int, metrics_dir: str) -> None:
+    """
+    Corpo do processo filho: restaura os sinais, atende e sai com o código do worker
+
+    Um worker que falha ao iniciar sai com código 1, para o pai contar a falha.
+    """
+    for signum in SHUTDOWN_SIGNALS:
+        signal.signal(signum, signal.SIG_DFL)
+    signal.pthread_sigmask(signal.SIG_UNBLOCK, SHUTDOWN_SIGNALS)
+
+    code = 1
+    try:
+        run_worker(listener, host, port, metrics_dir)
+        code = 0
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else 0
+    except BaseException:
+        logger.exception("Erro no worker")
+    finally:
+        os._exit(code)
+
+
+def stop_workers(children: dict, timeout: float) -> None:
+    """
+    Envia SIGTERM aos workers e espera que terminem; os que passarem do prazo recebem SIGKILL
+    """
+    for pid in list(children):
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    deadline = time.monotonic() + timeout
+    while children and time.monotonic() < deadline:
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            children.clear()
+            break
+        if pid == 0:
+            time.sleep(0.05)
+        else:
+            children.pop(pid, None)
+
+    for pid in list(children):
+        logger.warning(f"Worker {pid} não terminou em {timeout:.0f}s; encerrando com SIGKILL")
+        try:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        except (ProcessLookupError, ChildProcessError):
+            pass
+        children.pop(pid, None)
+
+
+def serve_prefork(host: str, port: int, workers: int) -> int:
+    """
+    Servidor de produção pré-fork
+
+    O processo pai carrega e processa os dados uma única vez, publica as
+    colunas em arquivos mapeados em memória e só então cria os workers, que
+    compartilham o mesmo socket e anexam os dados sem cópia. As métricas de
+    cada worker vão para um diretório ao lado dos dados publicados, e /metrics
+    expõe a soma de todos (ver MetricsRegistry.share).
+
+    Workers que terminam são recriados; os que morrem logo após iniciar
+    esperam cada vez mais para voltar (backoff exponencial) e, se houver mais
+    de Config.PREFORK_MAX_RESTARTS reinícios na janela configurada, o servidor
+    é encerrado em vez de continuar criando processos. SIGTERM e SIGINT são
+    repassados aos workers (como SIGTERM) antes de o pai esperar por eles.
+
+    Returns:
+        Código de saída do processo (1 se desligado pelo limite de reinícios)
+    """
+    from config import Config
+    from services.shared_dataset import SharedDatasetPublisher
+
+    publisher = SharedDatasetPublisher()
+    Config.SHARED_DATASETS = publisher.publish(Config.CITY_DATA_FILES)
+    os.environ['ZONE_SHARED_DATASETS'] = json.dumps(Config.SHARED_DATASETS)
+    metrics_dir = os.path.join(publisher.directory, 'metrics')
+    os.makedirs(metrics_dir)
+
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, port))
+    listener.listen(128)
+    listener.set_inheritable(True)
+
+    # pid -> instante (monotônico) em que o worker foi criado
+    children = {}
+
+    def spawn() -> None:
+        # Sinais bloqueados durante o fork: o filho não pode executar o
+        # tratador do pai antes de restaurar os seus
+        signal.pthread_sigmask(signal.SIG_BLOCK, SHUTDOWN_SIGNALS)
+        try:
+            pid = os.fork()
+            if pid == 0:
+                worker_main(listener, host, port, metrics_dir)
+            children[pid] = time.monotonic()
+        finally:
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, SHUTDOWN_SIGNALS)
+
+    def request_shutdown(signum, _frame) -> None:
+        raise ShutdownRequested(signum)
+
+    for signum in SHUTDOWN_SIGNALS:
+        signal.signal(signum, request_shutdown)
+
+    logger.info(f"Servidor pré-fork em http://{host}:{port} com {workers} workers")
+    exit_code = 0
+    restarts = deque()
+    failures = 0
+    try:
+        for _ in range(workers):
+            spawn()
+
+        # Supervisiona os workers, recriando os que terminarem inesperadamente
+        while True:
+            pid, status = os.wait()
+            started = children.pop(pid, None)
+            if started is None:
+                continue
+
+            now = time.monotonic()
+            uptime = now - started
+            restarts.append(now)
+            while now - restarts[0] > Config.PREFORK_RESTART_WINDOW_SECONDS:
+                restarts.popleft()
+            if len(restarts) > Config.PREFORK_MAX_RESTARTS:
+                logger.error(
+                    f"{len(restarts)} workers encerrados em {Config.PREFORK_RESTART_WINDOW_SECONDS:.0f}s "
+                    f"(o último com código {os.waitstatus_to_exitcode(status)}); desligando o servidor"
+                )
+                exit_code = 1
+                break
+
+            failures = failures + 1 if uptime < Config.PREFORK_MIN_UPTIME_SECONDS else 0
+            delay = 0.0
+            if failures:
+                delay = min(Config.PREFORK_RESTART_BACKOFF_SECONDS * 2 ** (failures - 1),
+                            Config.PREFORK_RESTART_BACKOFF_MAX_SECONDS)
+            logger.warning(
+                f"Worker {pid} encerrado (código {os.waitstatus_to_exitcode(status)}) após {uptime:.1f}s; "
+                f"iniciando outro em {delay:.1f}s"
+            )
+            time.sleep(delay)
+            spawn()
+    except ShutdownRequested as e:
+        logger.info(f"{signal.Signals(e.args[0]).name} recebido; encerrando os workers")
+    finally:
+        # Outro sinal durante o desligamento não interrompe a espera pelos workers
+        for signum in SHUTDOWN_SIGNALS:
+            signal.signal(signum, signal.SIG_IGN)
+        stop_workers(children, Config.PREFORK_SHUTDOWN_TIMEOUT_SECONDS)
+        listener.close()
+        publisher.close()
+    return exit_code
+
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=False)
+    parser = argparse.ArgumentParser(description='Sistema Cidades Frias, Corações Quentes')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=0,
+                        help='processos do servidor pré-fork (0 = servidor de desenvolvimento)')
+    args = parser.parse_args()
+
+    if args.workers > 0 and hasattr(os, 'fork'):
+        logging.basicConfig(level=logging.INFO)
+        sys.exit(serve_prefork(args.host, args.port, args.workers))
+    else:
+        from app import app
+        app.run(host=args.host, port=args.port, debug=False)
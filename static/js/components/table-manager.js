@@ -11,6 +11,13 @@ class TableManager {
         this.sortDirection = 'asc';
         this.filteredData = [];
         this.originalData = [];
+
+        // Modo servidor: a API pagina, ordena e filtra; só a página atual fica no cliente
+        this.serverSide = false;
+        this.endpoint = '/api/zones';
+        this.pageData = [];
+        this.totalItems = 0;
+        this.searchTerm = '';
     }
 
     /**
@@ -18,12 +25,78 @@ class TableManager {
      */
     init(tableId, data) {
         this.tableId = tableId;
+        this.serverSide = false;
         this.originalData = data;
         this.filteredData = [...data];
         this.render();
         this.setupEventListeners();
     }
 
+    /**
+     * Inicializa a tabela em modo servidor, buscando apenas a página exibida
+     */
+    async initServerSide(tableId, endpoint = '/api/zones') {
+        this.tableId = tableId;
+        this.endpoint = endpoint;
+        this.serverSide = true;
+        await this.loadPage();
+        this.setupEventListeners();
+    }
+
+    /**
+     * Monta os parâmetros da consulta paginada
+     */
+    buildQuery(page, pageSize) {
+        const params = new URLSearchParams({
+            page: page,
+            page_size: pageSize,
+            order: this.sortDirection
+        });
+        if (this.sortColumn) {
+            params.set('sort', this.sortColumn);
+        }
+        if (this.searchTerm) {
+            params.set('q', this.searchTerm);
+        }
+        return params;
+    }
+
+    /**
+     * Busca a página atual na API e renderiza
+     */
+    async loadPage() {
+        try {
+            const response = await fetch(`${this.endpoint}?${this.buildQuery(this.currentPage, this.itemsPerPage)}`);
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+
+            const result = await response.json();
+
+            // Servidor sem paginação: volta ao modo local com a lista completa
+            if (Array.isArray(result)) {
+                this.serverSide = false;
+                this.originalData = result;
+                this.filteredData = [...result];
+            } else {
+                this.pageData = result.zones;
+                this.totalItems = result.total;
+            }
+
+            this.render();
+
+        } catch (error) {
+            console.error('❌ Erro ao carregar página da tabela:', error);
+        }
+    }
+
+    /**
+     * Total de zonas após os filtros
+     */
+    getTotalItems() {
+        return this.serverSide ? this.totalItems : this.filteredData.length;
+    }
+
     /**
      * Renderiza a tabela
      */
@@ -46,7 +119,7 @@ class TableManager {
         // Calcula dados da página atual
         const startIndex = (this.currentPage - 1) * this.itemsPerPage;
         const endIndex = startIndex + this.itemsPerPage;
-        const pageData = this.filteredData.slice(startIndex, endIndex);
+        const pageData = this.serverSide ? this.pageData : this.filteredData.slice(startIndex, endIndex);
 
         // Renderiza linhas
         pageData.forEach((zone, index) => {
@@ -153,6 +226,12 @@ class TableManager {
             this.sortDirection = 'asc';
         }
 
+        if (this.serverSide) {
+            this.currentPage = 1;
+            this.loadPage().then(() => this.updateSortIndicators());
+            return;
+        }
+
         this.filteredData.sort((a, b) => {
             let aValue = a[column];
             let bValue = b[column];
@@ -201,7 +280,8 @@ class TableManager {
      * Atualiza controles de paginação
      */
     updatePagination() {
-        const totalPages = Math.ceil(this.filteredData.length / this.itemsPerPage);
+        const totalItems = this.getTotalItems();
+        const totalPages = Math.ceil(totalItems / this.itemsPerPage);
         const paginationContainer = document.getElementById('tablePagination');
         
         if (!paginationContainer) return;
@@ -211,8 +291,8 @@ class TableManager {
                 <div class="pagination-info">
                     <small class="text-muted">
                         Mostrando ${((this.currentPage - 1) * this.itemsPerPage) + 1} a 
-                        ${Math.min(this.currentPage * this.itemsPerPage, this.filteredData.length)} 
-                        de ${this.filteredData.length} zonas
+                        ${Math.min(this.currentPage * this.itemsPerPage, totalItems)} 
+                        de ${totalItems} zonas
                     </small>
                 </div>
                 <div class="pagination-controls">
@@ -240,7 +320,7 @@ class TableManager {
     previousPage() {
         if (this.currentPage > 1) {
             this.currentPage--;
-            this.render();
+            this.serverSide ? this.loadPage() : this.render();
         }
     }
 
@@ -248,10 +328,10 @@ class TableManager {
      * Vai para próxima página
      */
     nextPage() {
-        const totalPages = Math.ceil(this.filteredData.length / this.itemsPerPage);
+        const totalPages = Math.ceil(this.getTotalItems() / this.itemsPerPage);
         if (this.currentPage < totalPages) {
             this.currentPage++;
-            this.render();
+            this.serverSide ? this.loadPage() : this.render();
         }
     }
 
@@ -259,6 +339,13 @@ class TableManager {
      * Filtra dados
      */
     filter(searchTerm) {
+        if (this.serverSide) {
+            this.searchTerm = searchTerm || '';
+            this.currentPage = 1;
+            this.loadPage();
+            return;
+        }
+
         if (!searchTerm) {
             this.filteredData = [...this.originalData];
         } else {
@@ -291,14 +378,35 @@ class TableManager {
         document.dispatchEvent(customEvent);
     }
 
+    /**
+     * Busca todas as zonas filtradas, página a página (modo servidor)
+     */
+    async fetchAllFiltered() {
+        const pageSize = 500;
+        const zones = [];
+        let page = 1;
+        let pages = 1;
+
+        do {
+            const response = await fetch(`${this.endpoint}?${this.buildQuery(page, pageSize)}`);
+            const result = await response.json();
+            zones.push(...result.zones);
+            pages = result.pages;
+            page++;
+        } while (page <= pages);
+
+        return zones;
+    }
+
     /**
      * Exporta dados da tabela
      */
-    exportToCSV() {
+    async exportToCSV() {
+        const exportData = this.serverSide ? await this.fetchAllFiltered() : this.filteredData;
         const headers = ['Nome', 'Temperatura (°C)', 'NDVI', 'Densidade (hab/km²)', 'Índice de Criticidade', 'Classificação'];
         const csvContent = [
             headers.join(','),
-            ...this.filteredData.map(zone => [
+            ...exportData.map(zone => [
                 zone.nome,
                 zone.temperatura.toFixed(1),
                 zone.ndvi.toFixed(2),
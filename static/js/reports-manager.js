@@ -79,8 +79,8 @@ class DashboardManager {
         this.chartManager.renderClassificationChart('classificationChart', this.zonesData);
         this.chartManager.renderTemperatureChart('temperatureChart', this.zonesData);
 
-        // Inicializa tabela
-        this.tableManager.init('zonesTable', this.zonesData);
+        // Inicializa tabela: a API entrega apenas a página exibida
+        this.tableManager.initServerSide('zonesTable');
     }
 
     /**
@@ -0,0 +1,66 @@
+"""
+Testes das métricas compartilhadas entre workers (MetricsRegistry.share)
+
+No servidor pré-fork cada scrape cai num worker qualquer: contadores e
+histogramas expostos devem ser a soma de todos os workers.
+"""
+
+import os
+from services.metrics import MetricsRegistry, gauge
+
+
+def worker_registry(directory) -> MetricsRegistry:
+    """Registro de um worker (mesmas métricas em todos, como na aplicação)"""
+    registry = MetricsRegistry()
+    registry.counter('requests', 'Requisições', ('route',))
+    registry.histogram('latency_seconds', 'Latência', ('route',), buckets=(0.1, 1.0))
+    registry.register_collector('version', lambda: [gauge('data_version', 'Versão', [({}, 3)])])
+    registry.share(str(directory), interval=3600)
+    return registry
+
+
+def samples(registry: MetricsRegistry):
+    return {(name, tuple(sorted(labels.items()))): value
+            for family in registry.collect() for name, labels, value in family.samples}
+
+
+def test_shared_counters_and_histograms_are_summed(tmp_path):
+    """Cada worker expõe a soma de todos; gauges dos coletores levam o rótulo worker"""
+    first, second = worker_registry(tmp_path), worker_registry(tmp_path)
+
+    first.counter('requests', '').inc('/api/zones', amount=3)
+    first.histogram('latency_seconds', '').observe(0.05, '/api/zones')
+    second.counter('requests', '').inc('/api/zones')
+    second.counter('requests', '').inc('/api/statistics', amount=2)
+    second.histogram('latency_seconds', '').observe(0.5, '/api/zones')
+    first.flush()
+    second.flush()
+
+    for registry in (first, second):
+        exposed = samples(registry)
+        assert exposed[('requests_total', (('route', '/api/zones'),))] == 4
+        assert exposed[('requests_total', (('route', '/api/statistics'),))] == 2
+        assert exposed[('latency_seconds_bucket', (('le', '0.1'), ('route', '/api/zones')))] == 1
+        assert exposed[('latency_seconds_bucket', (('le', '1'), ('route', '/api/zones')))] == 2
+        assert exposed[('latency_seconds_count', (('route', '/api/zones'),))] == 2
+        assert exposed[('latency_seconds_sum', (('route', '/api/zones'),))] == 0.55
+        assert exposed[('data_version', (('worker', str(os.getpid())),))] == 3
+
+
+def test_own_values_are_current_and_unreadable_files_ignored(tmp_path):
+    """Os valores do próprio worker não esperam a gravação; arquivos vazios ou inválidos são ignorados"""
+    registry = worker_registry(tmp_path)
+    (tmp_path / '1-vazio.json').write_text('')
+    (tmp_path / '2-parcial.json').write_text('{"requests": [[["/api/zones"]')
+
+    registry.counter('requests', '').inc('/api/zones', amount=5)
+
+    assert samples(registry)[('requests_total', (('route', '/api/zones'),))] == 5
+
+
+def test_unshared_registry_has_no_worker_label():
+    """Fora do servidor pré-fork as métricas são só do processo, sem rótulo worker"""
+    registry = MetricsRegistry()
+    registry.register_collector('version', lambda: [gauge('data_version', 'Versão', [({}, 3)])])
+
+    assert samples(registry) == {('data_version', ()): 3}
@@ -0,0 +1,89 @@
+"""
+Testes do relatório PDF (PDFService.generate_heat_island_report)
+
+A história do documento é entregue ao ReportLab por FlowableStream, que
+depende de como o DocTemplate.build consome a lista (não é API pública):
+o relatório de várias páginas precisa sair idêntico ao montado com uma
+lista comum.
+"""
+
+import io
+import os
+import re
+from datetime import datetime
+import pytest
+from reportlab import rl_config
+import services.pdf_service as pdf_service
+from config import Config
+from services.pdf_service import PDFService
+
+
+class FixedDatetime(datetime):
+    """Data fixa no cabeçalho, para comparar os PDFs byte a byte"""
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2024, 1, 15, 10, 30)
+
+
+@pytest.fixture
+def report_inputs(zones_frame, make_service):
+    service = make_service(zones_frame)
+    return service.get_report_data(), service.get_statistics()
+
+
+@pytest.fixture
+def deterministic_pdf(monkeypatch):
+    """PDF sem compressão, datas nem ids variáveis"""
+    monkeypatch.setattr(rl_config, 'invariant', 1)
+    monkeypatch.setattr(rl_config, 'pageCompression', 0)
+    monkeypatch.setattr(pdf_service, 'datetime', FixedDatetime)
+
+
+def page_count(pdf: bytes) -> int:
+    return len(re.findall(rb'/Type /Page\b', pdf))
+
+
+# Linhas por bloco da tabela: o padrão cabe numa página; 90 obriga o
+# ReportLab a dividir os blocos (partes devolvidas ao início da história)
+@pytest.mark.parametrize('rows_per_page', [Config.PDF_TABLE_ROWS_PER_PAGE, 90])
+def test_streamed_report_matches_list_story(report_inputs, deterministic_pdf, monkeypatch, rows_per_page):
+    """O relatório gerado sob demanda é idêntico ao gerado com a história numa lista"""
+    monkeypatch.setattr(Config, 'PDF_TABLE_ROWS_PER_PAGE', rows_per_page)
+    zones, statistics = report_inputs
+
+    streamed = PDFService().generate_heat_island_report(iter(zones), statistics, in_memory=True).getvalue()
+    monkeypatch.setattr(pdf_service, 'FlowableStream', list)
+    expected = PDFService().generate_heat_island_report(zones, statistics, in_memory=True).getvalue()
+
+    assert page_count(streamed) > 5
+    assert streamed == expected
+    for zone in (zones[0], zones[len(zones) // 2], zones[-1]):
+        assert f"({zone['bairro']})".encode('latin-1') in streamed
+
+
+def test_report_defaults_to_temporary_file(report_inputs):
+    """Sem destino, o PDF vai para um arquivo temporário cujo caminho é devolvido"""
+    zones, statistics = report_inputs
+
+    path = PDFService().generate_heat_island_report(zones, statistics)
+    try:
+        assert isinstance(path, str) and path.endswith('.pdf')
+        with open(path, 'rb') as pdf:
+            assert pdf.read(5) == b'%PDF-'
+    finally:
+        os.remove(path)
+
+
+def test_report_writes_to_given_output(report_inputs, tmp_path):
+    """Com destino (caminho ou arquivo binário), o próprio destino é devolvido"""
+    zones, statistics = report_inputs
+    service = PDFService()
+
+    path = str(tmp_path / 'relatorio.pdf')
+    assert service.generate_heat_island_report(zones, statistics, path) == path
+    assert os.path.getsize(path) > 0
+
+    buffer = io.BytesIO()
+    assert service.generate_heat_island_report(zones, statistics, buffer) is buffer
+    assert buffer.getvalue().startswith(b'%PDF-')
@@ -0,0 +1,200 @@
+"""
+Testes da ingestão de rasters (services/raster_ingestion.py)
+
+As médias zonais calculadas bloco a bloco (grades alinhadas ou rotacionadas,
+resoluções diferentes, nodata, escala, ids esparsos, com e sem pool de
+processos) são comparadas com uma conta pixel a pixel, feita à parte com a
+inversa da transformação afim calculada pelo numpy.
+"""
+
+import json
+import math
+import numpy as np
+import pandas as pd
+import pytest
+import services.raster_ingestion as raster_ingestion
+from services.raster_ingestion import OUTPUT_COLUMNS, Raster, RasterIngestion, ZoneGrid
+
+# Rótulos: 40 × 50 pixels de 0,001° a partir de (-46,0; -23,0), em blocos de 8 × 10 pixels
+LABELS_TRANSFORM = [0.001, 0.0, -46.0, 0.0, -0.001, -23.0]
+LABEL_NODATA = 0
+# Id presente no raster mas não na tabela de atributos
+UNKNOWN_ID = 424242
+
+# Temperatura: pixels de 0,0007° com origem fora da grade de rótulos, em Kelvin × 50
+# (uint16, binário bruto); as origens evitam centros de pixel sobre bordas dos rótulos
+TEMPERATURE_TRANSFORM = [0.0007, 0.0, -46.002877, 0.0, -0.0007, -22.997923]
+TEMPERATURE_META = {'nodata': 0, 'scale': 0.02, 'offset': -273.15}
+
+# NDVI: pixels de 0,0012° rotacionados em 0,1 rad (float32, .npy, nodata e NaN)
+ANGLE, SIZE = 0.1, 0.0012
+NDVI_TRANSFORM = [SIZE * math.cos(ANGLE), SIZE * math.sin(ANGLE), -46.0061,
+                  SIZE * math.sin(ANGLE), -SIZE * math.cos(ANGLE), -22.9987]
+NDVI_NODATA = -9999.0
+
+
+def write_raster(tmp_path, name: str, array: np.ndarray, transform, raw: bool = False, **meta) -> Raster:
+    """Grava a grade (.npy ou binário bruto) com o arquivo de metadados e a abre"""
+    meta = dict(meta, transform=list(transform))
+    if raw:
+        path = tmp_path / f'{name}.bin'
+        array.tofile(path)
+        meta.update(dtype=array.dtype.str, shape=list(array.shape))
+    else:
+        path = tmp_path / f'{name}.npy'
+        np.save(path, array)
+    (tmp_path / f'{name}.json').write_text(json.dumps(meta))
+    return Raster.open(str(path))
+
+
+def label_array(zone_ids) -> np.ndarray:
+    """Blocos de 8 × 10 pixels com os ids das zonas, um bloco sem zona e um com id desconhecido"""
+    blocks = list(zone_ids[:23]) + [LABEL_NODATA, UNKNOWN_ID]
+    return np.kron(np.array(blocks, dtype=np.int64).reshape(5, 5), np.ones((8, 10), dtype=np.int64))
+
+
+@pytest.fixture(params=['densos', 'esparsos'])
+def zone_ids(request) -> np.ndarray:
+    """Ids da tabela de atributos (o último não aparece no raster); esparsos usam busca binária"""
+    if request.param == 'densos':
+        return np.arange(1, 25)
+    return np.arange(1, 25) * 10_000_019 + 7
+
+
+@pytest.fixture
+def rasters(tmp_path, zone_ids):
+    """Rótulos, temperatura e NDVI sintéticos"""
+    rng = np.random.default_rng(11)
+
+    kelvin = rng.uniform(295.0, 320.0, size=(64, 80))
+    raw_temperature = np.round(kelvin / TEMPERATURE_META['scale']).astype(np.uint16)
+    raw_temperature[rng.random(raw_temperature.shape) < 0.1] = TEMPERATURE_META['nodata']
+
+    ndvi = rng.uniform(-0.2, 0.9, size=(45, 50)).astype(np.float32)
+    ndvi[rng.random(ndvi.shape) < 0.1] = NDVI_NODATA
+    ndvi[rng.random(ndvi.shape) < 0.05] = np.nan
+
+    return {
+        'labels': write_raster(tmp_path, 'zonas', label_array(zone_ids), LABELS_TRANSFORM, nodata=LABEL_NODATA),
+        'temperature': write_raster(tmp_path, 'lst', raw_temperature, TEMPERATURE_TRANSFORM, raw=True,
+                                    **TEMPERATURE_META),
+        'ndvi': write_raster(tmp_path, 'ndvi', ndvi, NDVI_TRANSFORM, nodata=NDVI_NODATA),
+    }
+
+
+def brute_force_means(values: Raster, labels: Raster, zone_ids) -> np.ndarray:
+    """Média por zona, pixel a pixel: centro do pixel -> pixel de rótulo pela inversa da transformação"""
+    array = np.load(values.path) if values.path.endswith('.npy') else np.fromfile(
+        values.path, dtype=values.dtype).reshape(values.shape)
+    label_values = np.load(labels.path)
+    position = {int(zone_id): index for index, zone_id in enumerate(zone_ids)}
+    a, b, c, d, e, f = labels.transform
+    inverse = np.linalg.inv([[a, b], [d, e]])
+
+    sums = np.zeros(len(zone_ids))
+    counts = np.zeros(len(zone_ids))
+    va, vb, vc, vd, ve, vf = values.transform
+    for row in range(array.shape[0]):
+        for col in range(array.shape[1]):
+            raw = array[row, col]
+            if (values.nodata is not None and raw == values.nodata) or np.isnan(raw):
+                continue
+            x = va * (col + 0.5) + vb * (row + 0.5) + vc
+            y = vd * (col + 0.5) + ve * (row + 0.5) + vf
+            label_col, label_row = (math.floor(value) for value in inverse @ [x - c, y - f])
+            if not (0 <= label_row < label_values.shape[0] and 0 <= label_col < label_values.shape[1]):
+                continue
+            label = int(label_values[label_row, label_col])
+            if label == labels.nodata or label not in position:
+                continue
+            sums[position[label]] += float(raw) * values.scale + values.offset
+            counts[position[label]] += 1
+
+    with np.errstate(invalid='ignore'):
+        return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+
+@pytest.mark.parametrize('transform', [TEMPERATURE_TRANSFORM, NDVI_TRANSFORM], ids=['alinhada', 'rotacionada'])
+def test_pixel_index_inverts_pixel_centers(tmp_path, transform):
+    """A transformação inversa devolve o pixel de cada centro e de pontos perto dos cantos"""
+    raster = write_raster(tmp_path, 'grade', np.zeros((30, 20), dtype=np.float32), transform)
+    window = (3, 30, 2, 17)
+
+    x, y = raster.pixel_centers(window)
+    rows, cols = raster.pixel_index(x, y)
+
+    expected_rows, expected_cols = np.mgrid[3:30, 2:17]
+    np.testing.assert_array_equal(rows, expected_rows)
+    np.testing.assert_array_equal(cols, expected_cols)
+
+    # Perto do canto superior esquerdo do pixel (1/10 do passo em linha e coluna)
+    a, b, c, d, e, f = transform
+    near = raster.pixel_index(x - 0.4 * (a + b), y - 0.4 * (d + e))
+    np.testing.assert_array_equal(near[0], expected_rows)
+    np.testing.assert_array_equal(near[1], expected_cols)
+
+
+def test_sparse_and_dense_id_lookup(rasters, zone_ids):
+    """Rótulos viram posições na tabela; nodata, ids desconhecidos e fora do intervalo viram -1"""
+    grid = ZoneGrid(rasters['labels'], zone_ids[::-1])
+    assert (grid._lookup is None) == (zone_ids[-1] > raster_ingestion.DENSE_LOOKUP_MIN_SIZE)
+
+    labels = np.array([[zone_ids[0], zone_ids[-1], LABEL_NODATA],
+                       [UNKNOWN_ID, zone_ids[0] - 1, zone_ids[-1] + 1]])
+    np.testing.assert_array_equal(grid.positions(labels), [[len(zone_ids) - 1, 0, -1], [-1, -1, -1]])
+
+
+def test_aligned_fast_path_matches_generic_locate(rasters, zone_ids, monkeypatch):
+    """Em grades sem rotação, a localização 1D coincide com a conversão de coordenadas pixel a pixel"""
+    grid = ZoneGrid(rasters['labels'], zone_ids)
+    temperature = rasters['temperature']
+    windows = temperature.windows(16)
+    fast = [grid.locate(temperature, window) for window in windows]
+
+    monkeypatch.setattr(Raster, 'axis_aligned', property(lambda raster: False))
+    for window, positions in zip(windows, fast):
+        np.testing.assert_array_equal(positions, grid.locate(temperature, window))
+    assert (np.concatenate([positions.ravel() for positions in fast]) >= 0).any()
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+@pytest.mark.parametrize('name', ['temperature', 'ndvi'])
+def test_zonal_means_match_brute_force(rasters, zone_ids, caplog, name, workers):
+    """Médias por bloco (no processo ou na pool) coincidem com a conta pixel a pixel"""
+    grid = ZoneGrid(rasters['labels'], zone_ids)
+    ingestion = RasterIngestion(tile_size=16, workers=workers)
+
+    means = ingestion.zonal_means(rasters[name], grid)
+
+    expected = brute_force_means(rasters[name], rasters['labels'], zone_ids)
+    np.testing.assert_allclose(means, expected, rtol=1e-9, equal_nan=True)
+    # Zona fora do raster de rótulos: sem pixels
+    assert np.isnan(means[-1]) and np.isfinite(means[:-1]).all()
+    assert 'Pool de processos indisponível' not in caplog.text
+
+
+def test_run_writes_zone_csv(tmp_path, rasters, zone_ids):
+    """O CSV gerado traz médias, centroides (só onde faltam coordenadas) e região padrão"""
+    attributes = pd.DataFrame({
+        'id': zone_ids,
+        'nome': [f'Zona {index}' for index in range(len(zone_ids))],
+        'densidade_populacional': 1000,
+        'latitude': [-23.5] + [np.nan] * (len(zone_ids) - 1),
+        'longitude': [-46.5] + [np.nan] * (len(zone_ids) - 1),
+    })
+    attributes.to_csv(tmp_path / 'atributos.csv', index=False)
+    output = tmp_path / 'zonas.csv'
+
+    RasterIngestion(tile_size=16).run(str(tmp_path / 'atributos.csv'), rasters['labels'],
+                                      rasters['temperature'], rasters['ndvi'], str(output))
+
+    zones = pd.read_csv(output)
+    assert list(zones.columns) == list(OUTPUT_COLUMNS)
+    assert (zones['regiao'] == 'São Paulo').all()
+    expected = brute_force_means(rasters['temperature'], rasters['labels'], zone_ids)
+    np.testing.assert_allclose(zones['temperatura'], np.round(expected, 2), equal_nan=True)
+
+    # Centroide da zona do bloco (linha 0, coluna 1): pixels 0-7 × 10-19
+    assert (zones.loc[0, 'latitude'], zones.loc[0, 'longitude']) == (-23.5, -46.5)
+    assert zones.loc[1, 'latitude'] == pytest.approx(-23.0 - 0.004, abs=1e-6)
+    assert zones.loc[1, 'longitude'] == pytest.approx(-46.0 + 0.015, abs=1e-6)
@@ -0,0 +1,118 @@
+"""
+Testes da simulação de cenários (ScenarioService.simulate)
+
+O cenário, calculado por diferença sobre os agregados do snapshot, deve
+coincidir com reclassificar do zero uma cópia dos dados com as variações
+aplicadas.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from services.scenario_service import NDVI_RANGE, Intervention, ScenarioService
+from services.zone_service import ZoneAggregates
+from utils.classification import classify_criticity
+
+# Limiares diferentes dos do Config, para que classificar com os padrões dê outro resultado
+THRESHOLDS = (33.0, 29.0)
+
+INTERVENTIONS = [
+    Intervention(ndvi_delta=0.3, regions=('Zona Leste', 'Centro')),
+    Intervention(temperature_delta=-2.5, classifications=('Crítica',)),
+    Intervention(ndvi_delta=-0.4, temperature_delta=1.5, ids=(3, 4, 5, 999999)),
+]
+
+
+def reclassified_copy(service) -> pd.DataFrame:
+    """Aplica as intervenções a uma cópia dos dados atuais e reclassifica todas as zonas do zero"""
+    frame = service.snapshot.data.copy()
+    ndvi_delta = np.zeros(len(frame))
+    temperature_delta = np.zeros(len(frame))
+    for intervention in INTERVENTIONS:
+        mask = np.ones(len(frame), dtype=bool)
+        if intervention.regions:
+            mask &= frame['regiao'].isin(intervention.regions).to_numpy()
+        if intervention.classifications:
+            mask &= frame['classificacao'].isin(intervention.classifications).to_numpy()
+        if intervention.ids:
+            mask &= frame['id'].isin(intervention.ids).to_numpy()
+        ndvi_delta[mask] += intervention.ndvi_delta
+        temperature_delta[mask] += intervention.temperature_delta
+    frame['ndvi'] = np.clip(frame['ndvi'] + ndvi_delta, *NDVI_RANGE)
+    frame['temperatura'] = frame['temperatura'] + temperature_delta
+    frame['indice_criticidade'] = frame['temperatura'] - frame['ndvi'] * 10
+    frame['classificacao'], frame['cor'] = classify_criticity(frame['indice_criticidade'], *THRESHOLDS)
+    return frame
+
+
+def test_simulation_matches_reclassified_copy(zones_frame, make_service, monkeypatch):
+    """Estatísticas, transições e zonas reclassificadas coincidem com reclassificar uma cópia dos dados"""
+    service = make_service(zones_frame)
+    service.set_thresholds(*THRESHOLDS)
+    # Limiares do serviço fora de sincronia com o snapshot (como durante uma
+    # troca em outra thread): o cenário usa os do snapshot
+    monkeypatch.setattr(service, 'critical_threshold', 100.0)
+    monkeypatch.setattr(service, 'medium_threshold', 90.0)
+
+    result = ScenarioService(service).simulate(INTERVENTIONS, name='arborização', include_zones=True)
+
+    before = service.snapshot.data.set_index('id')
+    after = reclassified_copy(service).set_index('id')
+    changed = before['classificacao'] != after['classificacao']
+    statistics = ZoneAggregates.from_frame(after).to_statistics()
+
+    assert result['name'] == 'arborização'
+    assert result['data_version'] == service.version
+    assert result['baseline'] == service.get_statistics()
+    assert result['statistics'] == pytest.approx(service.format_statistics(statistics))
+    assert result['reclassified_zones'] == int(changed.sum()) > 0
+
+    transitions = pd.DataFrame({'from': before['classificacao'][changed], 'to': after['classificacao'][changed]})
+    counts = transitions.value_counts()
+    assert {(item['from'], item['to']): item['zones'] for item in result['transitions']} == counts.to_dict()
+
+    zones = {zone['id']: zone for zone in result['zones']}
+    assert sorted(zones) == sorted(after.index[changed])
+    for zone_id, zone in zones.items():
+        assert zone['classificacao'] == after.loc[zone_id, 'classificacao']
+        assert zone['cor'] == after.loc[zone_id, 'cor']
+        assert zone['indice_criticidade'] == pytest.approx(after.loc[zone_id, 'indice_criticidade'], abs=0.01)
+
+
+def test_simulation_does_not_change_published_data(zones_frame, make_service):
+    """Simular não publica versão nova nem altera os dados"""
+    service = make_service(zones_frame)
+    version = service.version
+    zones = service.get_all_zones()
+
+    ScenarioService(service).simulate(INTERVENTIONS)
+
+    assert service.version == version
+    assert service.get_all_zones() == zones
+
+
+@pytest.mark.parametrize('payload', [
+    {'ndvi_delta': 2.5},
+    {'ndvi_delta': -1e308},
+    {'temperatura_delta': 1e308},
+    {'temperatura_delta': -100.5},
+    {'temperatura_delta': float('inf')},
+    {'ndvi_delta': 'muito'},
+    {'classificacao': 'Extrema'},
+])
+def test_invalid_interventions(zones_frame, make_service, payload):
+    """Variações não numéricas, não finitas ou fora dos limites são recusadas (400 na API)"""
+    scenarios = ScenarioService(make_service(zones_frame))
+
+    with pytest.raises(ValueError):
+        scenarios.run([{'interventions': [payload]}])
+
+
+def test_interventions_at_the_limits(zones_frame, make_service):
+    """Variações no limite são aceitas e dão estatísticas finitas"""
+    scenarios = ScenarioService(make_service(zones_frame))
+
+    [result] = scenarios.run([{'interventions': [{'ndvi_delta': -2.0, 'temperatura_delta': 100.0}] * 20}])
+
+    assert result['affected_zones'] == len(zones_frame)
+    assert all(np.isfinite(value) for value in result['statistics'].values())
@@ -0,0 +1,112 @@
+"""
+Testes da API de escrita do serviço de zonas (ZoneService.apply_changes)
+
+Cada sequência de alterações é comparada com um serviço carregado do zero
+a partir do CSV equivalente: estatísticas, cubo e índices mantidos por
+diferença devem coincidir com os recalculados.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+import services.zone_service as zone_service
+
+NEW_ZONE = {'nome': 'Zona Nova', 'latitude': -23.61, 'longitude': -46.52, 'temperatura': 44.5,
+            'ndvi': 0.08, 'densidade_populacional': 18000, 'regiao': 'Zona Leste'}
+
+
+def apply_to_frame(frame: pd.DataFrame, upserts=(), deletes=()) -> pd.DataFrame:
+    """Aplica as mesmas alterações ao DataFrame de origem (atualiza no lugar, remove, acrescenta no fim)"""
+    frame = frame.copy()
+    positions = {zone_id: position for position, zone_id in enumerate(frame['id'])}
+    new_rows = []
+    for record in upserts:
+        fields = {column: value for column, value in record.items() if column != 'id'}
+        if record['id'] in positions:
+            for column, value in fields.items():
+                if column in ('latitude', 'longitude', 'temperatura', 'ndvi'):
+                    frame[column] = frame[column].astype(float)
+                frame.loc[frame.index[positions[record['id']]], column] = value
+        else:
+            new_rows.append(dict(fields, id=record['id']))
+    frame = frame[~frame['id'].isin(list(deletes))]
+    return pd.concat([frame, pd.DataFrame(new_rows, columns=frame.columns)], ignore_index=True)
+
+
+# Sequências de operações: (upserts, deletes)
+OPERATIONS = [
+    ([{'id': 3, 'temperatura': 47.0}, {'id': 10, 'ndvi': 0.9}], []),
+    ([{'id': 11, 'latitude': -23.41, 'longitude': -46.39}, {'id': 12, 'nome': 'Vila Renomeada'}], []),
+    ([dict(NEW_ZONE, id=5000), dict(NEW_ZONE, id=5001, regiao='Região Nova', latitude=-22.5)], []),
+    ([{'id': 5000, 'temperatura': 30.0}, {'id': 20, 'regiao': 'Região Nova'}], []),
+    ([], [4, 5001, 999999]),
+    ([dict(NEW_ZONE, id=5002, longitude=-46.84)], [6]),
+    ([{'id': 7, 'temperatura': 38.0, 'ndvi': 0.5}], []),
+]
+
+
+@pytest.mark.parametrize('cached', [False, True], ids=['csv', 'colunar'])
+@pytest.mark.parametrize('overlay_min', [1024, 2], ids=['camadas', 'compactando'])
+@pytest.mark.parametrize('materialized', [False, True], ids=['sob-demanda', 'materializado'])
+def test_apply_changes_matches_full_reload(zones_frame, make_service, assert_same_state, monkeypatch,
+                                           cached, overlay_min, materialized):
+    """Cada versão publicada por apply_changes equivale a carregar o CSV alterado do zero"""
+    monkeypatch.setattr(zone_service, 'OVERLAY_MIN_SIZE', overlay_min)
+    service = make_service(zones_frame, cached=cached)
+    frame = zones_frame
+
+    for upserts, deletes in OPERATIONS:
+        if materialized:
+            service.get_all_zones()
+        # Consultas antes da escrita montam as ordenações e estruturas da versão anterior
+        service.query_zones(sort='temperatura')
+        service.get_nearest_zones(-23.55, -46.63, 3)
+
+        before = service.version
+        summary = service.apply_changes(upserts, deletes)
+        assert summary['data_version'] == service.version > before
+
+        frame = apply_to_frame(frame, upserts, deletes)
+        assert_same_state(service, make_service(frame))
+
+
+def test_apply_changes_summary(zones_frame, make_service):
+    """O resumo conta inserções, atualizações, remoções e ids não encontrados"""
+    service = make_service(zones_frame)
+
+    summary = service.apply_changes([{'id': 1, 'temperatura': 40.0}, dict(NEW_ZONE, id=9000)], [2, 123456])
+
+    assert summary == {'inserted': 1, 'updated': 1, 'deleted': 1, 'not_found': [123456],
+                       'data_version': service.version}
+    assert service.get_zone_by_id(2) is None
+    assert service.get_zone_by_id(9000)['nome'] == 'Zona Nova'
+
+
+def test_apply_changes_rejects_invalid_batches(zones_frame, make_service):
+    """Lotes inválidos não publicam versão nova"""
+    service = make_service(zones_frame)
+    version = service.version
+
+    with pytest.raises(ValueError):
+        service.apply_changes([{'id': 9001, 'temperatura': 30.0}])
+    with pytest.raises(ValueError):
+        service.apply_changes([{'id': 1, 'temperatura': 30.0}], [1])
+    with pytest.raises(ValueError):
+        service.apply_changes([{'id': 1, 'cor': '#000000'}])
+
+    assert service.version == version
+
+
+def test_unchanged_values_keep_columns(zones_frame, make_service):
+    """Valores iguais aos atuais não copiam as colunas nem invalidam ordenações"""
+    service = make_service(zones_frame)
+    service.query_zones(sort='temperatura')
+    old = service.snapshot
+    temperature = float(old.data['temperatura'].iloc[0])
+
+    service.apply_changes([{'id': int(old.data['id'].iloc[0]), 'temperatura': temperature}])
+
+    snapshot = service.snapshot
+    assert snapshot.version > old.version
+    assert np.shares_memory(snapshot.data['temperatura'].to_numpy(), old.data['temperatura'].to_numpy())
+    assert snapshot.sort_orders['temperatura'] is not None
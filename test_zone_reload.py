@@ -0,0 +1,87 @@
+"""
+Testes da recarga incremental do CSV de zonas (ZoneService.reload_if_changed)
+
+O snapshot montado por diferença (só as linhas novas, alteradas ou
+removidas) deve coincidir com uma carga completa do arquivo novo.
+"""
+
+import os
+import pandas as pd
+import pytest
+from benchmarks.synthetic import generate_zones
+
+
+def rewrite_csv(service, frame: pd.DataFrame) -> None:
+    """Regrava o CSV do serviço, garantindo mtime diferente do anterior"""
+    stat = os.stat(service.csv_file)
+    frame.to_csv(service.csv_file, index=False)
+    os.utime(service.csv_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def edited(frame: pd.DataFrame) -> pd.DataFrame:
+    """Altera, remove e acrescenta linhas (e muda a ordem de algumas)"""
+    frame = frame.copy()
+    frame.loc[frame['id'].isin([3, 4, 5]), 'temperatura'] += 6.0
+    frame.loc[frame['id'] == 8, 'ndvi'] = 0.91
+    frame.loc[frame['id'] == 9, ['latitude', 'longitude']] = [-23.41, -46.39]
+    frame.loc[frame['id'] == 10, 'regiao'] = 'Região Nova'
+    frame = frame[~frame['id'].isin([20, 21, 22])]
+    added = generate_zones(5, seed=99).assign(id=range(1000, 1005))
+    frame = pd.concat([added.iloc[:2], frame.iloc[::-1], added.iloc[2:]], ignore_index=True)
+    return frame
+
+
+@pytest.mark.parametrize('cached', [False, True], ids=['csv', 'colunar'])
+@pytest.mark.parametrize('materialized', [False, True], ids=['sob-demanda', 'materializado'])
+def test_incremental_reload_matches_full_load(zones_frame, make_service, assert_same_state, caplog,
+                                              cached, materialized):
+    """Recarga incremental equivale a carregar o CSV novo do zero (agregados, cubo, id_index e consultas)"""
+    caplog.set_level('INFO', logger='services.zone_service')
+    service = make_service(zones_frame, cached=cached)
+    if materialized:
+        service.get_all_zones()
+    version = service.version
+    frame = edited(zones_frame)
+
+    rewrite_csv(service, frame)
+
+    assert service.reload_if_changed() is True
+    assert 'Recarga incremental: 6 alteradas, 5 novas, 3 removidas' in caplog.text
+    assert service.version > version
+    assert_same_state(service, make_service(frame))
+
+
+def test_reload_after_thresholds_and_changes(zones_frame, make_service, assert_same_state):
+    """A recarga parte do snapshot atual, com os limiares em uso, e descarta as alterações da API"""
+    service = make_service(zones_frame)
+    service.set_thresholds(33.0, 29.0)
+    service.apply_changes([{'id': 1, 'temperatura': 50.0}], [2])
+    frame = edited(zones_frame)
+
+    rewrite_csv(service, frame)
+
+    assert service.reload_if_changed() is True
+    assert_same_state(service, make_service(frame, thresholds=(33.0, 29.0)))
+
+
+def test_unchanged_content_keeps_version(zones_frame, make_service):
+    """Arquivo regravado com o mesmo conteúdo não publica versão nova"""
+    service = make_service(zones_frame)
+    version = service.version
+
+    rewrite_csv(service, zones_frame)
+
+    assert service.reload_if_changed() is False
+    assert service.version == version
+    assert service.reload_if_changed() is False
+
+
+def test_schema_change_falls_back_to_full_load(zones_frame, make_service, assert_same_state):
+    """Coluna nova no arquivo faz recarga completa, com o mesmo resultado"""
+    service = make_service(zones_frame)
+    frame = edited(zones_frame).assign(fonte='satélite')
+
+    rewrite_csv(service, frame)
+
+    assert service.reload_if_changed() is True
+    assert_same_state(service, make_service(frame))
@@ -0,0 +1,72 @@
+"""
+Testes da reclassificação por limiares (ZoneService.set_thresholds)
+"""
+
+import pytest
+import services.zone_service as zone_service
+
+
+def test_set_thresholds_matches_full_load(zones_frame, make_service, assert_same_state):
+    """Reclassificar o snapshot equivale a carregar o CSV com os novos limiares"""
+    service = make_service(zones_frame)
+    service.query_zones(sort='classificacao')
+
+    assert service.set_thresholds(33.0, 29.0) is True
+
+    assert service.thresholds == {'critical_threshold': 33.0, 'medium_threshold': 29.0}
+    assert_same_state(service, make_service(zones_frame, thresholds=(33.0, 29.0)))
+
+
+@pytest.mark.parametrize('cached', [False, True], ids=['csv', 'colunar'])
+def test_changes_after_thresholds_use_new_thresholds(zones_frame, make_service, assert_same_state, cached):
+    """Zonas inseridas ou alteradas depois da troca são classificadas pelos novos limiares"""
+    service = make_service(zones_frame, cached=cached)
+    service.set_thresholds(33.0, 29.0)
+    service.apply_changes([{'id': 1, 'temperatura': 30.5, 'ndvi': 0.1}])
+
+    frame = zones_frame.copy()
+    frame['temperatura'] = frame['temperatura'].astype(float)
+    frame.loc[0, ['temperatura', 'ndvi']] = [30.5, 0.1]
+
+    assert service.get_zone_by_id(1)['classificacao'] == 'Média'
+    assert_same_state(service, make_service(frame, thresholds=(33.0, 29.0)))
+
+
+def test_same_thresholds_do_not_publish(zones_frame, make_service):
+    """Limiares iguais aos atuais não geram versão nova"""
+    service = make_service(zones_frame)
+    thresholds = service.thresholds
+    version = service.version
+
+    assert service.set_thresholds(thresholds['critical_threshold'], thresholds['medium_threshold']) is False
+    assert service.version == version
+
+
+@pytest.mark.parametrize('critical, medium', [(30.0, 30.0), (25.0, 30.0), (float('nan'), 20.0)])
+def test_invalid_thresholds(zones_frame, make_service, critical, medium):
+    """O limiar médio precisa ser menor que o crítico (e ambos finitos)"""
+    service = make_service(zones_frame)
+
+    with pytest.raises(ValueError):
+        service.set_thresholds(critical, medium)
+
+
+def test_failed_reclassification_keeps_thresholds(zones_frame, make_service, monkeypatch):
+    """Se a montagem do snapshot falha, limiares e versão continuam os anteriores e a troca pode ser refeita"""
+    service = make_service(zones_frame)
+    thresholds = service.thresholds
+    version = service.version
+
+    def fail(data):
+        raise MemoryError('falha simulada')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(zone_service.AggregateCube, 'from_frame', staticmethod(fail))
+        with pytest.raises(MemoryError):
+            service.set_thresholds(33.0, 29.0)
+
+    assert service.thresholds == thresholds
+    assert service.version == version
+
+    assert service.set_thresholds(33.0, 29.0) is True
+    assert service.thresholds == {'critical_threshold': 33.0, 'medium_threshold': 29.0}
@@ -0,0 +1,51 @@
+"""
+Classificação vetorizada das zonas por índice de criticidade
+Sistema Clima Vida - NASA Space Apps Hackathon
+"""
+
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+from config import Config
+
+# Classificações em ordem de gravidade e a chave de cor de cada uma em Config.COLORS
+CLASSIFICATIONS = ('Crítica', 'Média', 'Segura')
+COLOR_KEYS = ('critical', 'medium', 'safe')
+
+
+def classification_buckets(index: Any, critical_threshold: float, medium_threshold: float) -> np.ndarray:
+    """
+    Retorna a faixa de cada índice: posição da classificação em CLASSIFICATIONS
+
+    Valores nulos caem na última faixa ('Segura').
+    """
+    values = np.asarray(index, dtype=np.float64)
+    return np.select(
+        [values > critical_threshold, values > medium_threshold],
+        [0, 1],
+        default=2
+    ).astype(np.int8)
+
+
+def classify_criticity(index: Any, critical_threshold: float, medium_threshold: float,
+                       colors: Optional[Dict[str, str]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Classifica índices de criticidade e define a cor de cada zona de uma só vez
+
+    Cada índice cai numa faixa (acima do limiar crítico, acima do médio ou
+    o restante) com np.select; classificação e cor são lidas da mesma faixa.
+    Valores nulos são classificados como 'Segura'.
+
+    Args:
+        index: Índices de criticidade (Series, array ou lista)
+        critical_threshold: Índice acima do qual a zona é 'Crítica'
+        medium_threshold: Índice acima do qual a zona é 'Média'
+        colors: Cores por chave de COLOR_KEYS (padrão: Config.COLORS)
+
+    Returns:
+        Tupla (classificações, cores), arrays de objetos com um valor por índice
+    """
+    colors = colors or Config.COLORS
+    buckets = classification_buckets(index, critical_threshold, medium_threshold)
+    labels = np.array(CLASSIFICATIONS, dtype=object)
+    palette = np.array([colors[key] for key in COLOR_KEYS], dtype=object)
+    return labels[buckets], palette[buckets]
@@ -0,0 +1,184 @@
+"""
+Serialização colunar de DataFrames para registros da API
+Sistema Clima Vida - NASA Space Apps Hackathon
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import pandas as pd
+
+# Conversor de coluna: int, float, str, outro callable aplicado por valor,
+# ou None para manter os valores como o pandas os devolve
+Converter = Optional[Callable[[Any], Any]]
+
+# Esquema padrão de uma zona na API: (coluna, conversor)
+ZONE_RECORD_SCHEMA: Tuple[Tuple[str, Converter], ...] = (
+    ('id', int),
+    ('nome', str),
+    ('latitude', float),
+    ('longitude', float),
+    ('temperatura', float),
+    ('ndvi', float),
+    ('densidade_populacional', int),
+    ('regiao', str),
+    ('indice_criticidade', float),
+    ('classificacao', str),
+    ('cor', str),
+)
+
+
+def column_to_list(frame: pd.DataFrame, column: str, kind: Converter,
+                   default: Any = None) -> List[Any]:
+    """
+    Converte uma coluna inteira para lista de objetos Python nativos
+
+    Args:
+        frame: DataFrame de origem
+        column: Nome da coluna
+        kind: Conversor da coluna (int, float, str, callable ou None)
+        default: Valor usado quando a coluna não existe
+
+    Returns:
+        Lista com um valor por linha
+    """
+    if column not in frame.columns:
+        return [default] * len(frame)
+
+    series = frame[column]
+    if kind is None:
+        return series.tolist()
+    if kind is int or kind is float:
+        return series.astype(kind).tolist()
+    return [kind(value) for value in series.tolist()]
+
+
+def frame_to_records(frame: pd.DataFrame,
+                     schema: Sequence[Tuple[str, Converter]] = ZONE_RECORD_SCHEMA,
+                     defaults: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Converte um DataFrame em lista de dicionários numa única passada colunar
+
+    Cada coluna é convertida de uma vez e as colunas são combinadas com zip,
+    evitando criar uma Series por linha como faz ``iterrows``.
+
+    Args:
+        frame: DataFrame de origem
+        schema: Sequência de pares (coluna, conversor) na ordem de saída
+        defaults: Valores padrão para colunas ausentes
+
+    Returns:
+        Lista de dicionários, um por linha
+    """
+    if frame is None or frame.empty:
+        return []
+
+    defaults = defaults or {}
+    names = [name for name, _ in schema]
+    columns = [
+        column_to_list(frame, name, kind, defaults.get(name))
+        for name, kind in schema
+    ]
+    return [dict(zip(names, values)) for values in zip(*columns)]
+
+
+class LazyRecords(Sequence):
+    """
+    Registros da API de um DataFrame, materializados sob demanda
+
+    Enquanto a lista completa não é pedida, ``take`` monta apenas os
+    registros das posições solicitadas. Assim um processo que anexou dados
+    compartilhados não precisa manter um dicionário por zona em memória.
+
+    Registros alterados podem ficar numa camada à parte (``overrides``,
+    posição -> registro) sobre a lista de uma versão anterior, que é
+    compartilhada em vez de copiada; a lista própria só é montada quando
+    a lista completa é pedida.
+    """
+
+    def __init__(self, frame: pd.DataFrame,
+                 schema: Sequence[Tuple[str, Converter]] = ZONE_RECORD_SCHEMA,
+                 defaults: Optional[Dict[str, Any]] = None,
+                 records: Optional[List[Dict[str, Any]]] = None,
+                 overrides: Optional[Dict[int, Dict[str, Any]]] = None):
+        """
+        Args:
+            frame: DataFrame de origem (não deve mais ser alterado)
+            schema: Sequência de pares (coluna, conversor) na ordem de saída
+            defaults: Valores padrão para colunas ausentes
+            records: Registros já convertidos, se existirem (com ``overrides``,
+                podem faltar as posições do fim)
+            overrides: Registros que substituem (ou completam) os de ``records``
+        """
+        self._frame = frame
+        self._schema = schema
+        self._defaults = defaults
+        # Lista e camada de alterações trocadas juntas, numa única atribuição
+        self._state = (records, overrides if records is not None and overrides else None)
+
+    @property
+    def materialized(self) -> bool:
+        """Indica se os registros já estão convertidos (lista completa ou lista + alterações)"""
+        return self._state[0] is not None
+
+    @property
+    def overrides(self) -> Dict[int, Dict[str, Any]]:
+        """Registros da camada de alterações ainda não incorporados à lista"""
+        return self._state[1] or {}
+
+    def materialize(self) -> List[Dict[str, Any]]:
+        """Monta (uma vez) e retorna a lista completa de registros"""
+        records, overrides = self._state
+        if records is None:
+            records = frame_to_records(self._frame, self._schema, self._defaults)
+        elif overrides:
+            records = records + [None] * (len(self._frame) - len(records))
+            for position, record in overrides.items():
+                records[position] = record
+        else:
+            return records
+        self._state = (records, None)
+        return records
+
+    def patch(self, frame: pd.DataFrame, records: Dict[int, Dict[str, Any]]) -> 'LazyRecords':
+        """
+        Registros de uma nova versão do DataFrame com algumas posições substituídas
+
+        A lista atual é compartilhada; só a camada de alterações é copiada.
+        Sem lista convertida, os registros novos nem são necessários: a nova
+        versão os monta do próprio ``frame`` sob demanda.
+
+        Args:
+            frame: Nova versão do DataFrame (mesmas posições, linhas novas no fim)
+            records: Posição -> registro das linhas alteradas ou novas
+        """
+        base, overrides = self._state
+        if base is None:
+            return LazyRecords(frame, self._schema, self._defaults)
+        merged = dict(overrides or {})
+        merged.update(records)
+        return LazyRecords(frame, self._schema, self._defaults, records=base, overrides=merged)
+
+    def take(self, positions: Sequence[int]) -> List[Dict[str, Any]]:
+        """
+        Retorna os registros das posições informadas, na ordem informada
+
+        Args:
+            positions: Posições das linhas no DataFrame
+        """
+        records, overrides = self._state
+        if overrides:
+            return [overrides[position] if position in overrides else records[position]
+                    for position in positions]
+        if records is not None:
+            return [records[position] for position in positions]
+        if len(positions) == 0:
+            return []
+        return frame_to_records(self._frame.take(positions), self._schema, self._defaults)
+
+    def __len__(self) -> int:
+        return len(self._frame)
+
+    def __getitem__(self, index):
+        return self.materialize()[index]
+
+    def __iter__(self):
+        return iter(self.materialize())
@@ -0,0 +1,50 @@
+"""
+Contexto de Criação dos Processos de Trabalho
+Sistema Clima Vida - NASA Space Apps Hackathon
+"""
+
+import multiprocessing
+import threading
+from typing import Sequence
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Módulos pré-carregados pelo forkserver (acumulados entre as pools do processo);
+# com o __main__ pré-carregado, os processos não o importam de novo cada um
+_forkserver_preload = {'__main__'}
+_preload_lock = threading.Lock()
+
+
+def process_context(method: str = '', preload: Sequence[str] = ()) -> multiprocessing.context.BaseContext:
+    """
+    Retorna o contexto de multiprocessing das pools de processos
+
+    Sem método configurado, usa forkserver onde existe (Linux e macOS): os
+    processos nascem de um servidor de processo único, não do processo da
+    aplicação, que já tem threads (um fork dele copiaria locks em uso). Nas
+    demais plataformas (Windows) usa o método padrão, spawn.
+
+    Args:
+        method: 'fork', 'forkserver', 'spawn' ou '' (automático)
+        preload: Módulos que o forkserver importa uma única vez, além do
+            __main__; os processos já nascem com eles carregados
+
+    Returns:
+        Contexto para o mp_context de ProcessPoolExecutor
+    """
+    available = multiprocessing.get_all_start_methods()
+    if method and method not in available:
+        logger.warning(f"Método de criação de processos indisponível: {method}; usando o padrão")
+        method = ''
+    if not method:
+        method = 'forkserver' if 'forkserver' in available else None
+
+    context = multiprocessing.get_context(method)
+    if context.get_start_method() == 'forkserver':
+        # Vale só até o forkserver iniciar; depois disso os módulos são
+        # importados pelos processos na primeira tarefa
+        with _preload_lock:
+            _forkserver_preload.update(preload)
+            context.set_forkserver_preload(sorted(_forkserver_preload))
+    return context
@@ -5,14 +5,32 @@ Processador de Dados de Zonas para o Sistema Cidades Frias, Corações Quentes
 import pandas as pd
 from typing import Dict, List, Any, Optional
 from config import Config
+from utils.columnar import frame_to_records
+from utils.classification import classify_criticity
 
 class ZoneProcessor:
     """Classe para processar dados das zonas de calor urbano"""
     
+    # Colunas textuais seguem sem conversão, como os valores lidos do CSV
+    ZONE_SCHEMA = (
+        ('id', int),
+        ('nome', None),
+        ('latitude', float),
+        ('longitude', float),
+        ('temperatura', float),
+        ('ndvi', float),
+        ('densidade_populacional', int),
+        ('regiao', None),
+        ('indice_criticidade', float),
+        ('classificacao', None),
+        ('cor', None)
+    )
+    
     def __init__(self, csv_file: str = None):
         """Inicializa o processador com dados do CSV"""
         self.csv_file = csv_file or Config.CSV_FILE_PATH
         self.data = None
+        self._id_index = {}
         self.process_data()
     
     def process_data(self):
@@ -25,19 +43,10 @@ class ZoneProcessor:
                 self.data['temperatura'] - (self.data['ndvi'] * 10)
             )
             
-            # Classifica as zonas
-            def classify_zone(index):
-                if index > Config.CRITICAL_THRESHOLD:
-                    return 'Crítica'
-                elif index > Config.MEDIUM_THRESHOLD:
-                    return 'Média'
-                else:
-                    return 'Segura'
-            
-            self.data['classificacao'] = self.data['indice_criticidade'].apply(classify_zone)
-            
-            # Define cores
-            self.data['cor'] = self.data['classificacao'].map(Config.COLORS)
+            # Classifica as zonas e define as cores numa única passada vetorizada
+            self.data['classificacao'], self.data['cor'] = classify_criticity(
+                self.data['indice_criticidade'], Config.CRITICAL_THRESHOLD, Config.MEDIUM_THRESHOLD
+            )
             
             # Calcula estatísticas
             self._calculate_statistics()
@@ -45,17 +54,23 @@ class ZoneProcessor:
         except Exception as e:
             print(f"Erro ao processar dados: {e}")
             self.data = pd.DataFrame()
+        
+        # Índice id -> posição (primeira ocorrência prevalece)
+        ids = self.data['id'].tolist() if 'id' in self.data.columns else []
+        self._id_index = dict(zip(reversed(ids), range(len(ids) - 1, -1, -1)))
     
     def _calculate_statistics(self):
         """Calcula estatísticas gerais das zonas"""
         if self.data.empty:
             return
             
+        # Contagem por classificação numa única passada
+        counts = self.data['classificacao'].value_counts()
         self.stats = {
             'total_zones': len(self.data),
-            'critical_zones': len(self.data[self.data['classificacao'] == 'Crítica']),
-            'medium_zones': len(self.data[self.data['classificacao'] == 'Média']),
-            'safe_zones': len(self.data[self.data['classificacao'] == 'Segura']),
+            'critical_zones': int(counts.get('Crítica', 0)),
+            'medium_zones': int(counts.get('Média', 0)),
+            'safe_zones': int(counts.get('Segura', 0)),
             'avg_temperature': self.data['temperatura'].mean(),
             'avg_ndvi': self.data['ndvi'].mean(),
             'avg_criticity': self.data['indice_criticidade'].mean()
@@ -66,31 +81,15 @@ class ZoneProcessor:
         if self.data.empty:
             return []
         
-        zones = []
-        for _, row in self.data.iterrows():
-            zones.append({
-                'id': int(row['id']),
-                'nome': row['nome'],
-                'latitude': float(row['latitude']),
-                'longitude': float(row['longitude']),
-                'temperatura': float(row['temperatura']),
-                'ndvi': float(row['ndvi']),
-                'densidade_populacional': int(row['densidade_populacional']),
-                'regiao': row['regiao'],
-                'indice_criticidade': float(row['indice_criticidade']),
-                'classificacao': row['classificacao'],
-                'cor': row['cor']
-            })
-        
-        return zones
+        return frame_to_records(self.data, schema=self.ZONE_SCHEMA)
     
     def get_zone_details(self, zone_id: int) -> Optional[Dict[str, Any]]:
         """Retorna detalhes completos de uma zona específica"""
-        zone = self.data[self.data['id'] == zone_id]
-        if zone.empty:
+        position = self._id_index.get(zone_id)
+        if position is None:
             return None
         
-        zone_data = zone.iloc[0]
+        zone_data = self.data.iloc[position]
         classification = zone_data['classificacao']
         action_config = Config.ACTION_SUGGESTIONS.get(classification, {})
         